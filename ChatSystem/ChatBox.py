@@ -1,3 +1,4 @@
+import asyncio
 import json
 import sys
 import os
@@ -7,7 +8,7 @@ from urllib import response
 # sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ChatSystem.util.Response import (
-    Response, BotResponse, UserResponse, CompositeResponse,
+    Response, BotResponse, UserResponse, CompositeResponse, SavedResponse,
     Bot_ask_clarify, Bot_ask_category,
     Bot_suggest_categories,
     Bot_suggest_attractions, Bot_search_by_name, Bot_create_itinerary, Bot_ask_extra_info,
@@ -19,16 +20,18 @@ from ChatSystem.util.Response import (
 # Add parent directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ChatSystem.util.UserInputProcessing import process_user_input
+from ChatSystem.util.UserInputProcessing import process_user_input, process_user_input_async
 
 from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.suggestion_context import SuggestionContext
+from ChatSystem.history_manager import HistoryManager
 
 
 class ChatBox :
     def __init__(self,location_sequence: LocationSequence) :
         self.location_sequence = location_sequence
-        self.response_history = []
-        self.message_history = []  # for process_user_input
+        # Recent responses/messages plus a summary of older ones
+        self.history = HistoryManager(location_sequence)
         self.collected_information = {
             'destination': None,
             'categories': None,
@@ -48,23 +51,40 @@ class ChatBox :
                 location_sequence=self.location_sequence,
                 collected_information=self.collected_information
             )
-            self._add_response(bot_response)
+            # The greeting's suggestions stay lazy until it is first read
+            self._add_response(bot_response, with_suggestions=False)
             return bot_response
         return None
     
+    @property
+    def response_history(self) :
+        return self.history.responses
+
+    @property
+    def message_history(self) :
+        return self.history.messages
+
     def get_history(self) :
         return self.message_history
     
-    def _add_response(self, response: Response) :
-        self.response_history.append(response)
-        self.message_history.append({
+    def _add_response(self, response: Response, message_en: str = None, with_suggestions: bool = True) :
+        entry = {
             'role': response.whom,
             'message': response.get_message()
-        })
+        }
+        # The chips offered with a bot message, so the next turn can tell a clicked chip from free text
+        if with_suggestions and response.whom == 'bot':
+            entry['suggestions'] = response.get_suggestions()
+        # Bot messages are generated in English; user messages get their English
+        # form from process_user_input on first use.
+        if message_en is None and response.whom == 'bot':
+            message_en = entry['message']
+        if message_en is not None:
+            entry['message_en'] = message_en
+        self.history.append(response, entry)
   
     def _clear_conversation(self) :
-        self.response_history = []
-        self.message_history = []
+        self.history.clear()
     
     def _build_context_string(self) -> str:
         """Build a context string from collected information and recent messages."""
@@ -81,17 +101,20 @@ class ChatBox :
         
         # Add recent conversation (last 3 messages)
         if self.message_history:
-            recent = self.message_history[-3:]
+            recent = self.history.window(3)
             msg_strs = [f"{m['role']}: {m['message']}" for m in recent]
             context_parts.append("Recent conversation: " + " | ".join(msg_strs))
         
         return " // ".join(context_parts) if context_parts else "Starting new conversation"
 
-    def _computeResponse_from_outputDict(self, outputDict: dict) -> BotResponse:
+    def _computeResponse_from_outputDict(self, outputDict: dict, location_sequence=None) -> BotResponse:
         """
         Process user input and return appropriate BotResponse.
         Uses the full pipeline and converts to concrete Response objects.
+        `location_sequence` overrides the ChatBox sequence (e.g. a per-request SuggestionContext).
         """
+        if location_sequence is None:
+            location_sequence = self.location_sequence
         
         function_name = outputDict.get('function')
         params = outputDict.get('params', {})
@@ -101,14 +124,14 @@ class ChatBox :
         if function_name == 'ask_clarify':
             return Bot_ask_clarify(
                 text,
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 collected_information=self.collected_information
             )
     
 
         elif function_name == 'suggest_categories':
             return Bot_suggest_categories(
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 collected_information=self.collected_information
             )
         
@@ -124,7 +147,7 @@ class ChatBox :
             
             return Bot_suggest_attractions(
                 category, location, limit,
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 collected_information=self.collected_information
             )
         
@@ -132,7 +155,7 @@ class ChatBox :
             attraction_name = params.get('attraction_name') or params.get('destination') or params.get('name') or 'unknown place'
             return Bot_search_by_name(
                 attraction_name,
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 collected_information=self.collected_information
             )
         
@@ -146,7 +169,7 @@ class ChatBox :
             # Categories are now optional - Bot_create_itinerary will handle None/empty categories
             return Bot_create_itinerary(
                 categories=categories,  # Can be None or []
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 limit=limit,
                 collected_information=self.collected_information
             )
@@ -155,7 +178,7 @@ class ChatBox :
             # Default fallback for unknown functions
             return Bot_ask_clarify(
                 text or 'I\'m not sure how to help with that. Could you provide more details?',
-                location_sequence=self.location_sequence,
+                location_sequence=location_sequence,
                 collected_information=self.collected_information
             )        
     
@@ -247,11 +270,74 @@ class ChatBox :
         user_response = UserResponse(user_input)
         self._add_response(user_response)
 
-        outputDict = process_user_input(user_input, self.collected_information, self.message_history)
+        context = self._start_context()
+        outputDict = process_user_input(user_input, self.collected_information, self.history.window(),
+                                        history_summary=self.history.prompt_summary())
         print("concak0")
-        bot_response = self._computeResponse_from_outputDict(outputDict)
+        return self._respond(outputDict, context)
+
+    async def process_input_async(self, user_input: str):
+        """
+        Async process_input: the extraction is awaited and building the response
+        (SQLite suggestion queries) runs in a worker thread.
+        """
+        user_response = UserResponse(user_input)
+        self._add_response(user_response)
+
+        context = self._start_context()
+        outputDict = await process_user_input_async(user_input, self.collected_information, self.history.window(),
+                                                    history_summary=self.history.prompt_summary())
+        return await asyncio.to_thread(self._respond, outputDict, context)
+
+    def process_input_stream(self, user_input: str):
+        """
+        Staged process_input. Yields (event, data) pairs as each part of the turn completes:
+        'acknowledged', 'intent', 'database_results' (message and place IDs),
+        'suggestions', then 'done' with the same payload process_input's response serializes to.
+        """
+        yield 'acknowledged', {'input': user_input}
+
+        user_response = UserResponse(user_input)
+        self._add_response(user_response)
+        context = self._start_context()
+        outputDict = process_user_input(user_input, self.collected_information, self.history.window(),
+                                        history_summary=self.history.prompt_summary())
+        yield 'intent', {'function': outputDict.get('function'), 'params': outputDict.get('params', {})}
+
+        # Suggestions are computed lazily, on first read below
+        bot_response = self._respond(outputDict, context, defer_suggestions=True)
+        yield 'database_results', {
+            'message': bot_response.get_message(),
+            'database_results': bot_response.get_database_results()
+        }
+        suggestions = bot_response.get_suggestions()
+        self.message_history[-1]['suggestions'] = suggestions
+        yield 'suggestions', {'suggestions': suggestions}
+        yield 'done', bot_response.get_json_serializable()
+
+    def _start_context(self) -> SuggestionContext:
+        """
+        One memoizing view per request so the response and its follow-up suggestions share geo queries.
+        The likely queries start on a worker thread now and overlap with the LLM extraction.
+        """
+        context = SuggestionContext(self.location_sequence, width=self.collected_information.get('limit') or 5)
+        context.start_prefetch(self.collected_information)
+        return context
+
+    def _respond(self, outputDict: dict, context: SuggestionContext = None, defer_suggestions: bool = False) -> BotResponse:
+        """
+        Build the bot response and record it. Suggestions are resolved here, against
+        this turn's sequence and on the calling (worker) thread, unless the caller
+        reads them itself before the turn ends (`defer_suggestions`, for streaming).
+        """
+        if context is None:
+            context = SuggestionContext(self.location_sequence, width=self.collected_information.get('limit') or 5)
+        bot_response = self._computeResponse_from_outputDict(outputDict, location_sequence=context)
         print("concak1")
-        self._add_response(bot_response)
+        if not defer_suggestions:
+            bot_response.get_database_results()
+            bot_response.get_suggestions()
+        self._add_response(bot_response, with_suggestions=not defer_suggestions)
         self._update_collected_information(outputDict)
         
         print(f"\n🤖 Bot Response complete\n")
@@ -263,7 +349,7 @@ class ChatBox :
             'collected_information' : self.collected_information
         }
 
-        for response in self.response_history:
+        for response, message in zip(self.response_history, self.message_history):
             if save_data['responses'] is None :
                 save_data['responses'] = []
             
@@ -273,28 +359,27 @@ class ChatBox :
                 'suggestions' : response.get_suggestions(),
                 'database_results' : response.get_database_results()
             }
+            if 'message_en' in message:
+                response_dict['message_en'] = message['message_en']
             save_data['responses'].append(response_dict)
 
+        summary = self.history.summary()
+        if summary:
+            save_data['summary'] = summary
         return save_data
 
     def load_chatbox(self, json_data: dict) -> None :
+        """
+        Restore a conversation saved by save_chatbox. Saved messages stay plain
+        SavedResponse records: loading is a single pass over the list and runs no
+        database queries (only new turns build live response objects).
+        """
         self._clear_conversation()
         self.collected_information = json_data.get('collected_information', self.collected_information)
+        self.history.load_summary(json_data.get('summary'))
 
-        for response_dict in json_data.get('responses', []) :
-            if response_dict['whom'] == 'bot' :
-                response = BotResponse(
-                    location_sequence=self.location_sequence,
-                    bot_message=response_dict['message'],
-                    collected_information=self.collected_information
-                )
-                # Manually set suggestions if they exist in saved data
-                if response_dict.get('suggestions'):
-                    response.suggestions = response_dict['suggestions']
-            else :
-                response = UserResponse(response_dict['message'])
-            
-            self._add_response(response)
+        for response_dict in json_data.get('responses') or [] :
+            self._add_response(SavedResponse.from_dict(response_dict), message_en=response_dict.get('message_en'))
 
 if __name__ == "__main__" :
     # interactive test
@@ -323,8 +408,9 @@ if __name__ == "__main__" :
 
         if (bot_response.get_database_results()):
             print(f"📚 Database Results: {bot_response.get_database_results()}")
-            for  x in bot_response.get_database_results() :
-                print(f"  - {x} {LocationSequence().id_to_name(x)}")
+            ids = bot_response.get_database_results()
+            for x, place in zip(ids, chat_box.location_sequence.ids_to_places(ids, fields=("title",))) :
+                print(f"  - {x} {place['title'] if place else None}")
         else:   
             print(f"(No database results.)")
 
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 # import sys
@@ -28,6 +29,13 @@ class TOOL:
             "start coordinate" : self.sequence.get_start_coordinate(),
             "sequence" : sequence
         }
+    def snapshot(self) :
+        """State in the shape `load` accepts."""
+        return {
+            "history" : self.chatbox.save_chatbox(),
+            "start_coordinate" : self.sequence.get_start_coordinate(),
+            "sequence" : self.sequence.get_sequence()
+        }
     
     # location sequence related
     def append(self , position , ID ) : 
@@ -44,6 +52,9 @@ class TOOL:
     
     def id_to_name(self, placeid) :
         return self.sequence.id_to_name(placeid)
+
+    def ids_to_places(self, ids, fields=None) :
+        return self.sequence.ids_to_places(ids, fields=fields)
     
     def input_start_coordinate(self, lat: float, lon: float):
         return self.sequence.input_start_coordinate(lat, lon)
@@ -51,8 +62,8 @@ class TOOL:
     def get_start_coordinate(self):
         return self.sequence.get_start_coordinate()
     
-    def search_by_name(self,name,exact=False,limit=10):
-        return self.sequence.search_by_name(name,exact,limit)
+    def search_by_name(self,name,exact=False,limit=10,backend="fuzzy"):
+        return self.sequence.search_by_name(name,exact,limit,backend=backend)
 
     def get_suggest_category(self):
         return self.sequence.get_suggest_category()
@@ -65,14 +76,34 @@ class TOOL:
         # Use keywords to align with LocationSequence signature
         return self.sequence.suggest_around(lat=lat, lon=lon, limit=limit, category=category)
 
-    def suggest_itinerary_to_sequence(self, limit=5):
-        return self.sequence.suggest_itinerary_to_sequence(limit)
+    def suggest_itinerary_to_sequence(self, limit=5, categories=None, ordered=False):
+        return self.sequence.suggest_itinerary_to_sequence(limit, categories=categories, ordered=ordered)
+
+    def suggest_itineraries(self, limit=5, k=3, categories=None, ordered=False):
+        return self.sequence.suggest_itineraries(limit, k=k, categories=categories, ordered=ordered)
+
+    def optimize_order(self, apply=False):
+        return self.sequence.optimize_order(apply=apply)
+
+    def route_length(self, sequence=None):
+        return self.sequence.route_length(sequence)
     
     # chatbox related  
     def process_input(self, user_input : str): 
         if user_input == "" :
             return self.chatbox.start_conversation().get_json_serializable()
         return self.chatbox.process_input(user_input=user_input).get_json_serializable()
+    def process_input_stream(self, user_input : str):
+        """(event, data) pairs for one turn; see ChatBox.process_input_stream."""
+        if user_input == "" :
+            yield "done", self.process_input(user_input)
+            return
+        yield from self.chatbox.process_input_stream(user_input=user_input)
+    async def process_input_async(self, user_input : str):
+        if user_input == "" :
+            return await asyncio.to_thread(self.process_input, user_input)
+        bot_response = await self.chatbox.process_input_async(user_input=user_input)
+        return bot_response.get_json_serializable()
     def clear_conversation(self) :
         pass 
   
@@ -82,8 +113,9 @@ class TOOL:
         while True : 
             user_input = input("User: ")
             bot_response = self.chatbox.process_input(user_input=user_input)
-            for id in bot_response.get_database_results() :
-                place_name = self.sequence.id_to_name(id)
+            ids = bot_response.get_database_results()
+            for id, place in zip(ids, self.sequence.ids_to_places(ids, fields=("title",))) :
+                place_name = place["title"] if place else None
                 print(f"(Database Result) ID: {id}, Name: {place_name}")
             print("Bot: ", bot_response.message)
             print("Suggestions: ", bot_response.suggestions)
@@ -0,0 +1,13 @@
+"""
+Pieces shared by the Flask app (`app.py`) and the ASGI app (`asgi.py`), so the
+two entry points answer in the same shape.
+"""
+
+
+def response_template(success, data=None, message=""):
+    """Standard response body for all endpoints, as a plain dict."""
+    return {
+        "success": success,
+        "data": data,
+        "message": message
+    }
@@ -1,5 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from ChatSystem import api_common
 from ChatSystem.TOOL import TOOL
+from ChatSystem.db_pool import pool_stats
+from ChatSystem.session_store import apply_deltas, get_session_store, json_param, request_tool
 import logging
 from deepdiff import DeepDiff
 import pprint
@@ -75,11 +78,43 @@ def home():
 
 def response_template(success, data=None, message=""):
     """Standard response template for all endpoints"""
-    return jsonify({
-        "success": success,
-        "data": data,
-        "message": message
-    })
+    return jsonify(api_common.response_template(success, data, message))
+
+
+# ============ Session Endpoints ============
+
+@app.route('/api/session', methods=['POST'])
+def create_session():
+    """Create a server-side session, optionally seeded from a chat history"""
+    try:
+        data = request.get_json(silent=True) or {}
+        history = json_param(data.get('history', {}))
+        session_id = get_session_store().create(history or None)
+        with get_session_store().session(session_id) as tool:
+            apply_deltas(tool, data)
+            snapshot = tool.snapshot()
+        return response_template(True, data={"session_id": session_id, **snapshot},
+                               message="Session created")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
+@app.route('/api/session/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Current state of a session, in the same shape as `history`"""
+    try:
+        with get_session_store().session(session_id) as tool:
+            snapshot = tool.snapshot()
+        return response_template(True, data=snapshot, message="Session retrieved")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
+@app.route('/api/session/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """Drop a session"""
+    get_session_store().delete(session_id)
+    return response_template(True, message="Session deleted")
 
 
 # ============ Location Sequence Endpoints ============
@@ -98,9 +133,10 @@ def search_by_name():
             limit = int(data.get('limit', 10))
         except (ValueError, TypeError):
             limit = 10
-        logging.info(f"Searching for name: {name}, exact: {exact}, limit: {limit}")
+        backend = data.get('backend', 'fuzzy')
+        logging.info(f"Searching for name: {name}, exact: {exact}, limit: {limit}, backend: {backend}")
         # tool = get_or_create_tool(chat_id)
-        results = Query_without_chat_instance.search_by_name(name, exact=exact, limit=limit)
+        results = Query_without_chat_instance.search_by_name(name, exact=exact, limit=limit, backend=backend)
         
         return response_template(True, data=results, 
                                message="Search completed")
@@ -108,18 +144,30 @@ def search_by_name():
         return response_template(False, message=str(e))
 
 
+@app.route('/api/places', methods=['GET'])
+def get_places():
+    """Place details for a comma-separated list of IDs, in one round trip"""
+    try:
+        data = request.args
+        raw_ids = data.get('ids', '')
+        ids = [int(x) for x in raw_ids.split(',') if x.strip()]
+        raw_fields = data.get('fields')
+        fields = [f.strip() for f in raw_fields.split(',') if f.strip()] if raw_fields else None
+        places = Query_without_chat_instance.ids_to_places(ids, fields=fields)
+
+        return response_template(True, data=places,
+                               message="Places retrieved")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
 @app.route('/api/get-suggest-category', methods=['GET'])
 def get_suggest_category():
     """Get available suggestion categories"""
     try:
-        history = request.args.get('history', {})
-        if isinstance(history, str):
-            history = json.loads(history)
-        tool = TOOL()
-        tool.load(history)
-        # tool = TOOL("hisory"=history)
-        # tool = chat_demo
-        categories = tool.get_suggest_category()
+        with request_tool(request.args) as tool:
+            # tool = chat_demo
+            categories = tool.get_suggest_category()
         
         return response_template(True, data=categories, 
                                message="Categories retrieved")
@@ -141,9 +189,6 @@ def suggest_for_position():
             limit = int(data.get('limit', 5))
         except (ValueError, TypeError):
             limit = 5
-        history = data.get('history', {})
-        if isinstance(history, str):
-            history = json.loads(history)
         # # Thay thế dòng assert cũ bằng đoạn này:
         # diff = DeepDiff(history, history_example, ignore_order=True)
 
@@ -154,10 +199,9 @@ def suggest_for_position():
         #     raise AssertionError("history does not match example")
         # else:
         #     print("✅ Hai object giống hệt nhau!")
-        tool = TOOL()
-        tool.load(history)
-        #tool = chat_demo
-        suggestions = tool.suggest_for_position(position=position, category=category, limit=limit)
+        with request_tool(data) as tool:
+            #tool = chat_demo
+            suggestions = tool.suggest_for_position(position=position, category=category, limit=limit)
         
         return response_template(True, data=suggestions, 
                                message="Suggestions retrieved")
@@ -183,13 +227,8 @@ def suggest_around():
         except (ValueError, TypeError):
             limit = 10
         category = data.get('category')
-        history = data.get('history', {})
-        if isinstance(history, str):
-            history = json.loads(history)
-        
-        tool = TOOL()
-        tool.load(history)
-        suggestions = tool.suggest_around(lat=lat, lon=lon, limit=limit, category=category)
+        with request_tool(data) as tool:
+            suggestions = tool.suggest_around(lat=lat, lon=lon, limit=limit, category=category)
         
         return response_template(True, data=suggestions, 
                                message="Suggestions retrieved")
@@ -197,22 +236,29 @@ def suggest_around():
         return response_template(False, message=str(e))
 
 
+def _category_mix_param(data):
+    """`categories` as comma-separated names, a JSON list, or a JSON {name: count} object"""
+    raw = data.get('categories')
+    if not raw:
+        return None
+    if raw.lstrip().startswith(('[', '{')):
+        return json.loads(raw)
+    return [c.strip() for c in raw.split(',') if c.strip()]
+
+
 @app.route('/api/suggest-itinerary-to-sequence', methods=['GET'])
 def suggest_itinerary_to_sequence():
-    """Get suggestions for completing the itinerary"""
+    """Get suggestions for completing the itinerary, optionally from a category mix (`categories`, `ordered`)"""
     try:
         data = request.args
         try:
             limit = int(data.get('limit', 5))
         except (ValueError, TypeError):
             limit = 5
-        history = data.get('history', {})
-        if isinstance(history, str):
-            history = json.loads(history)
-        # tool = TOOL("hisory"=history)
-        tool = TOOL()
-        tool.load(history)
-        suggestions = tool.suggest_itinerary_to_sequence(limit)
+        categories = _category_mix_param(data)
+        ordered = str(data.get('ordered', 'false')).lower() == 'true'
+        with request_tool(data) as tool:
+            suggestions = tool.suggest_itinerary_to_sequence(limit, categories=categories, ordered=ordered)
         
         return response_template(True, data=suggestions, 
                                message="Itinerary suggestions retrieved")
@@ -220,6 +266,56 @@ def suggest_itinerary_to_sequence():
         return response_template(False, message=str(e))
 
 
+@app.route('/api/suggest-itineraries', methods=['GET'])
+def suggest_itineraries():
+    """Get up to `k` alternative itineraries to append to the sequence, best first"""
+    try:
+        data = request.args
+        try:
+            limit = int(data.get('limit', 5))
+        except (ValueError, TypeError):
+            limit = 5
+        try:
+            k = int(data.get('k', 3))
+        except (ValueError, TypeError):
+            k = 3
+        categories = _category_mix_param(data)
+        ordered = str(data.get('ordered', 'false')).lower() == 'true'
+        with request_tool(data) as tool:
+            itineraries = tool.suggest_itineraries(limit, k=k, categories=categories, ordered=ordered)
+
+        return response_template(True, data=itineraries,
+                               message="Itinerary alternatives retrieved")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
+@app.route('/api/optimize-sequence', methods=['GET'])
+def optimize_sequence():
+    """
+    Shortest visiting order for the current sequence. `apply=true` stores it in
+    the session, so it requires `session_id` (400 without one).
+    """
+    try:
+        data = request.args
+        apply = str(data.get('apply', 'false')).lower() == 'true'
+        if apply and not data.get('session_id'):
+            return response_template(False, message="apply=true requires a session_id"), 400
+        with request_tool(data) as tool:
+            original_distance = tool.route_length()
+            order = tool.optimize_order(apply=apply)
+            distance = tool.route_length(order)
+
+        return response_template(True, data={
+            "sequence": order,
+            "distance_m": distance,
+            "original_distance_m": original_distance,
+            "applied": apply
+        }, message="Sequence optimized")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
 # ============ ChatBox Endpoints ============
 
 @app.route('/api/process-input', methods=['POST'])
@@ -229,12 +325,6 @@ def process_input():
         logging.info("process_input endpoint called")
         data = request.get_json()
         user_input = data.get('input')
-        history = data.get('history', {})
-        if isinstance(history, str):
-            history = json.loads(history)
-        tool = TOOL()
-        tool.load(history)
-        #tool = TOOL("hisory"=history)
         #response = tool.process_input(user_input)
         
         # response = {
@@ -250,7 +340,10 @@ def process_input():
         #     ]
         # }
         logging.info(f"Processing input: {user_input}")
-        response = tool.process_input(user_input)
+        with request_tool(data) as tool:
+            response = tool.process_input(user_input)
+        if data.get('session_id'):
+            response['session_id'] = data['session_id']
         logging.info("done processing input")
         logging.info(f"Processed input: {user_input}, Response: {response}")
         return response_template(True, data=response, 
@@ -259,6 +352,36 @@ def process_input():
         return response_template(False, message=str(e))
 
 
+def sse_event(event, data):
+    """One Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/process-input/stream', methods=['POST'])
+def process_input_stream():
+    """
+    Process user input as a Server-Sent Events stream.
+    Events: acknowledged, intent, database_results, suggestions, done (the same
+    payload /api/process-input returns in `data`), or error. Accepts `session_id`
+    like /api/process-input.
+    """
+    logging.info("process_input_stream endpoint called")
+    data = request.get_json()
+    user_input = data.get('input')
+
+    def generate():
+        try:
+            with request_tool(data) as tool:
+                for event, payload in tool.process_input_stream(user_input):
+                    yield sse_event(event, payload)
+        except Exception as e:
+            logging.exception("process_input_stream failed")
+            yield sse_event("error", {"message": str(e)})
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 # ============ Health Check ============
 
 @app.route('/health', methods=['GET'])
@@ -267,6 +390,18 @@ def health_check():
     return response_template(True, data={"status": "healthy"}, message="Server is running")
 
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats():
+    """SQLite connection pool metrics (connections opened, reuse hit rate, queries)"""
+    return response_template(True, data=pool_stats(), message="Pool stats retrieved")
+
+
+@app.route('/api/session-stats', methods=['GET'])
+def session_stats():
+    """Session store metrics (live sessions, hits, restores, evictions)"""
+    return response_template(True, data=get_session_store().stats(), message="Session stats retrieved")
+
+
 # ============ Error Handlers ============
 
 @app.errorhandler(404)
@@ -0,0 +1,120 @@
+"""
+ASGI entry point for the chat pipeline.
+
+`/api/process-input` runs `TOOL.process_input_async`: the Gemini call is awaited
+(httpx when installed) while translation and SQLite work run in worker
+threads, so one process can hold many in-flight chat turns instead of one per
+WSGI worker thread. Requests and responses use the same JSON shapes as the
+Flask app in `app.py`, which stays the WSGI entry point for everything else;
+`session_id` and the `start_coordinate` / `sequence` deltas work the same way
+(see `session_store.request_tool`).
+
+Run with any ASGI server, e.g.:
+    uvicorn ChatSystem.asgi:app --host 0.0.0.0 --port 8000
+"""
+
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.api_common import response_template
+from ChatSystem.db_pool import pool_stats
+from ChatSystem.session_store import request_tool_async
+from ChatSystem.util.orchestrator import get_gemini_client
+
+# Largest request body accepted (chat history included).
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def process_input(body):
+    """Process user input through the chatbox"""
+    try:
+        data = json.loads(body or b"{}")
+        user_input = data.get('input')
+        logging.info(f"Processing input: {user_input}")
+        async with request_tool_async(data) as tool:
+            response = await tool.process_input_async(user_input)
+        if data.get('session_id'):
+            response['session_id'] = data['session_id']
+        return response_template(True, data=response, message="Input processed successfully")
+    except Exception as e:
+        return response_template(False, message=str(e))
+
+
+async def health_check(body):
+    return response_template(True, data={"status": "healthy"}, message="Server is running")
+
+
+async def db_pool_stats(body):
+    return response_template(True, data=pool_stats(), message="Pool stats retrieved")
+
+
+ROUTES = {
+    ('POST', '/api/process-input'): process_input,
+    ('GET', '/health'): health_check,
+    ('GET', '/api/db-pool-stats'): db_pool_stats,
+}
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise HTTPError(400, "Client disconnected")
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def _send_json(send, payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await get_gemini_client().aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await _send_json(send, response_template(False, message="Endpoint not found"), 404)
+    try:
+        payload = await handler(await _read_body(receive))
+    except HTTPError as e:
+        return await _send_json(send, response_template(False, message=str(e)), e.status)
+    except Exception:
+        logging.exception("Unhandled error in %s", scope['path'])
+        return await _send_json(send, response_template(False, message="Internal server error"), 500)
+    await _send_json(send, payload)
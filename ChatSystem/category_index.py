@@ -0,0 +1,69 @@
+"""
+Inverted index from category tag to the places that carry it.
+
+Each place's comma-separated `categories` value is parsed once into tags, and
+every tag keeps a sorted NumPy array of PlaceStore positions (its posting
+list). Category filters become posting-list unions that are intersected with
+spatial candidates, instead of a substring scan or a per-row re-parse of
+`categories` on every request. Posting unions for the known vocabulary
+(`util/categories.txt`, which covers `LocationSequence.categories`) are
+precomputed when the index is built.
+"""
+
+import os
+
+import numpy as np
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'util', 'categories.txt')
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def load_vocabulary(path=VOCABULARY_PATH):
+    """Return the lowercase category words listed in `path` (comma-separated)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [w.strip().lower() for w in f.read().split(',') if w.strip()]
+    except OSError:
+        return []
+
+
+class CategoryIndex:
+    """Posting lists of store positions keyed by category tag."""
+
+    def __init__(self, category_tags, vocabulary=()):
+        self.size = len(category_tags)
+        postings = {}
+        for pos, tags in enumerate(category_tags):
+            for tag in set(tags):
+                postings.setdefault(tag, []).append(pos)
+        self.postings = {tag: np.asarray(p, dtype=np.int64) for tag, p in postings.items()}
+        self.tagged = np.fromiter((bool(tags) for tags in category_tags), dtype=bool, count=self.size)
+        self._like = {}
+        for word in vocabulary:
+            self._like[word] = self.positions_for(self.tags_containing(word))
+
+    def tags_containing(self, needle):
+        """Tags that contain `needle` as a substring."""
+        return [tag for tag in self.postings if needle in tag]
+
+    def positions_for(self, tags):
+        """Sorted union of the posting lists of `tags` (unknown tags are ignored)."""
+        parts = [self.postings[t] for t in tags if t in self.postings]
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+    def like_positions(self, needle):
+        """Positions of places with a tag containing `needle` (lowercase)."""
+        cached = self._like.get(needle)
+        if cached is not None:
+            return cached
+        return self.positions_for(self.tags_containing(needle))
+
+    def to_mask(self, positions):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return mask
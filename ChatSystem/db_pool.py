@@ -0,0 +1,156 @@
+"""
+Process-wide SQLite connection pool.
+
+Every thread gets one long-lived, read-only connection per database file
+(`mode=ro&immutable=1`, memory-mapped I/O, enlarged page cache). Keeping the
+connection open also keeps sqlite3's prepared-statement cache warm, so repeated
+queries skip re-parsing. Pools are shared per database path and expose simple
+hit/miss counters via `pool_stats()`; the counters are updated under a lock
+because every request thread touches them.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """Per-thread read-only connections to a single SQLite file."""
+
+    def __init__(self, db_path, immutable=True):
+        self.db_path = os.path.abspath(db_path)
+        self.immutable = immutable
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._connections = []
+        self.hits = 0
+        self.misses = 0
+        self.reopens = 0
+        self.queries = 0
+
+    def _uri(self):
+        uri = Path(self.db_path).as_uri() + "?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA query_only = 1")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def acquire(self):
+        """Return this thread's connection, opening (or reopening) it when needed."""
+        # immutable=1 tells SQLite the file never changes, so reopen if it was rebuilt.
+        mtime = os.path.getmtime(self.db_path)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.mtime == mtime:
+            with self._stats_lock:
+                self.hits += 1
+            return conn
+        with self._stats_lock:
+            if conn is not None:
+                self.reopens += 1
+            else:
+                self.misses += 1
+        if conn is not None:
+            self._discard(conn)
+        self._local.conn = self._open()
+        self._local.mtime = mtime
+        return self._local.conn
+
+    @contextmanager
+    def connection(self):
+        yield self.acquire()
+
+    def execute(self, sql, params=()):
+        """Run `sql` on this thread's connection and return the cursor."""
+        with self._stats_lock:
+            self.queries += 1
+        return self.acquire().execute(sql, params)
+
+    def fetchone(self, sql, params=()):
+        return self.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        return self.execute(sql, params).fetchall()
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses, reopens, queries = self.hits, self.misses, self.reopens, self.queries
+        total = hits + misses + reopens
+        return {
+            "db_path": self.db_path,
+            "open_connections": len(self._connections),
+            "hits": hits,
+            "misses": misses,
+            "reopens": reopens,
+            "queries": queries,
+            "hit_rate": (hits / total) if total else 0.0,
+        }
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path):
+    """Return the shared ConnectionPool for `db_path`."""
+    key = os.path.abspath(db_path)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = ConnectionPool(key)
+                _POOLS[key] = pool
+    return pool
+
+
+def pool_stats():
+    """Return metrics for every pool opened in this process."""
+    return [pool.stats() for pool in list(_POOLS.values())]
+
+
+def close_all_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
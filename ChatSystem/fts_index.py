@@ -0,0 +1,146 @@
+"""
+SQLite FTS5 sidecar index for place search.
+
+The index lives next to the source database (`places.db` -> `places_fts.db`)
+so the data file itself stays read-only. It covers the text columns present
+in `places` (title/name, address, category name and cuisine tags), and uses
+the `unicode61 remove_diacritics 2` tokenizer, so "Ben Thanh" matches "Bến Thành".
+Results are ranked with BM25, with the title weighted highest.
+
+Build or refresh it offline:
+    python ChatSystem/fts_index.py [path/to/places.db]
+
+A sidecar built from an older copy of the source database is ignored, and
+`fts_search` returns None so callers fall back to their LIKE/fuzzy paths.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.db_pool import get_pool
+
+FTS_TABLE = "places_fts"
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Indexed fields in rank order, each with the source column names it may have
+# (the older DataCollector schema uses Name/Address/Categories) and its BM25 weight.
+FIELDS = [
+    ("title", ("title", "name"), 10.0),
+    ("address", ("address",), 2.0),
+    ("categoryname", ("categoryname", "categories"), 3.0),
+    ("cuisine_tags", ("cuisine_tags",), 3.0),
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def sidecar_path(db_path):
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_fts{ext or '.db'}"
+
+
+def _source_columns(conn):
+    """Map each FTS field to the matching `places` column, or None if absent."""
+    present = {row[1].lower(): row[1] for row in conn.execute("PRAGMA table_info(places)")}
+    mapping = {}
+    for field, candidates, _ in FIELDS:
+        mapping[field] = next((present[c] for c in candidates if c in present), None)
+    return mapping
+
+
+def build_fts_index(db_path, fts_path=None):
+    """(Re)build the FTS5 sidecar for `db_path` and return its path."""
+    fts_path = fts_path or sidecar_path(db_path)
+    tmp_path = fts_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    source_mtime = os.path.getmtime(db_path)
+    with sqlite3.connect(Path(os.path.abspath(db_path)).as_uri() + "?mode=ro", uri=True) as src:
+        columns = _source_columns(src)
+        select = ", ".join(f'"{col}"' if col else "NULL" for col in columns.values())
+        rows = src.execute(f"SELECT rowid, {select} FROM places").fetchall()
+
+    field_names = ", ".join(field for field, _, _ in FIELDS)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({field_names}, tokenize='{TOKENIZER}')")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {field_names}) VALUES (?, ?, ?, ?, ?)",
+            ((row[0], *("" if v is None else str(v) for v in row[1:])) for row in rows),
+        )
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        conn.execute("INSERT INTO meta VALUES ('source_mtime', ?)", (repr(source_mtime),))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, fts_path)
+    return fts_path
+
+
+def _fresh_pool(db_path):
+    """Pool for the sidecar of `db_path`, or None if missing or older than the source."""
+    fts_path = sidecar_path(db_path)
+    if not os.path.exists(fts_path) or not os.path.exists(db_path):
+        return None
+    pool = get_pool(fts_path)
+    try:
+        row = pool.fetchone("SELECT value FROM meta WHERE key = 'source_mtime'")
+    except sqlite3.Error:
+        return None
+    if not row or float(row[0]) != os.path.getmtime(db_path):
+        return None
+    return pool
+
+
+def match_expression(query, any_term=False):
+    """FTS5 MATCH string for free text: quoted tokens, ANDed (or ORed if `any_term`)."""
+    tokens = _TOKEN_RE.findall(str(query or ""))
+    if not tokens:
+        return None
+    joiner = " OR " if any_term else " "
+    return joiner.join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+
+def fts_search(db_path, query, limit=10, exclude=()):
+    """Return rowids matching `query`, best BM25 first, or None if no usable index exists.
+
+    Places matching every query token rank ahead of those matching only some.
+    """
+    pool = _fresh_pool(db_path)
+    if pool is None:
+        return None
+    weights = ", ".join(str(w) for _, _, w in FIELDS)
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? "
+        f"ORDER BY bm25({FTS_TABLE}, {weights}), rowid LIMIT ?"
+    )
+    skip = set(exclude)
+    results = []
+    for any_term in (False, True):
+        expr = match_expression(query, any_term)
+        if expr is None or len(results) >= limit:
+            break
+        for row in pool.fetchall(sql, (expr, limit + len(skip) + len(results))):
+            rid = row[0]
+            if rid in skip:
+                continue
+            skip.add(rid)
+            results.append(rid)
+            if len(results) >= limit:
+                break
+    return results
+
+
+if __name__ == "__main__":
+    default_db = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'DataCollector', 'result', 'places.db')
+    target = sys.argv[1] if len(sys.argv) > 1 else default_db
+    print(f"Built {build_fts_index(target)}")
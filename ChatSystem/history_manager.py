@@ -0,0 +1,117 @@
+"""
+Bounded conversation history for ChatBox.
+
+ChatBox used to keep every message of a session. The whole list was checked
+for translation on every turn and re-serialized on every save, but the
+extraction prompt only reads the last HISTORY_WINDOW messages.
+`HistoryManager` keeps the most recent `max_messages` messages verbatim and
+folds older ones into a compact structured summary. The summary records how
+many messages were folded and which places the bot offered in them,
+partitioned against the current sequence:
+
+    confirmed_places  offered places that are in the itinerary
+    rejected_places   offered places the user did not add
+
+The collected slots are kept separately by ChatBox as `collected_information`.
+Only `window()` is passed on to translation and prompting, so per-turn cost
+does not grow with the length of the session. `prompt_summary()` gives the
+extraction prompt the summary with place names instead of IDs (its EARLIER IN
+CONVERSATION section), capped at MAX_PROMPT_PLACES names per list.
+
+Configuration:
+    HISTORY_MAX_MESSAGES  messages kept verbatim (default 40)
+"""
+
+import os
+
+from ChatSystem.util.prompt_builder import HISTORY_WINDOW
+
+MAX_STORED_MESSAGES = int(os.getenv('HISTORY_MAX_MESSAGES', 40))
+# Most recent offered places remembered in the summary.
+MAX_SUMMARY_PLACES = 100
+# Most recent places per list named in the extraction prompt.
+MAX_PROMPT_PLACES = 10
+
+
+class HistoryManager:
+    """Recent messages (response objects and their message entries) plus a summary of older ones."""
+
+    def __init__(self, location_sequence, max_messages=MAX_STORED_MESSAGES):
+        self.location_sequence = location_sequence
+        self.max_messages = max(HISTORY_WINDOW, max_messages)
+        self.responses = []
+        self.messages = []
+        self.summarized_messages = 0
+        self._offered_places = []
+
+    def append(self, response, entry):
+        self.responses.append(response)
+        self.messages.append(entry)
+        if len(self.messages) > self.max_messages:
+            self._fold(len(self.messages) - self.max_messages)
+
+    def window(self, size=HISTORY_WINDOW):
+        """The last `size` message entries (the same dicts, so annotations such as 'message_en' stick)."""
+        return self.messages[-size:] if size > 0 else []
+
+    def clear(self):
+        self.responses = []
+        self.messages = []
+        self.summarized_messages = 0
+        self._offered_places = []
+
+    def _fold(self, count):
+        for response in self.responses[:count]:
+            if response.whom == 'bot':
+                self._remember_places(response.get_database_results())
+        del self.responses[:count]
+        del self.messages[:count]
+        self.summarized_messages += count
+
+    def _remember_places(self, place_ids):
+        for place_id in place_ids or []:
+            # Category suggestions also come back as "database results"; only place IDs count.
+            if isinstance(place_id, int) and not isinstance(place_id, bool):
+                if place_id in self._offered_places:
+                    self._offered_places.remove(place_id)
+                self._offered_places.append(place_id)
+        del self._offered_places[:-MAX_SUMMARY_PLACES]
+
+    def summary(self):
+        """Structured summary of the folded messages, or None if nothing was folded."""
+        if not self.summarized_messages:
+            return None
+        in_sequence = set(self.location_sequence.get_sequence() or []) if self._offered_places else set()
+        return {
+            'summarized_messages': self.summarized_messages,
+            'confirmed_places': [p for p in self._offered_places if p in in_sequence],
+            'rejected_places': [p for p in self._offered_places if p not in in_sequence],
+            # Oldest first, so a restore keeps which places are the most recent
+            'offered_places': list(self._offered_places),
+        }
+
+    def load_summary(self, summary):
+        self.summarized_messages = 0
+        self._offered_places = []
+        if summary:
+            self.summarized_messages = summary.get('summarized_messages', 0)
+            offered = summary.get('offered_places')
+            if offered is None:  # saved before the order was kept
+                offered = summary.get('confirmed_places', []) + summary.get('rejected_places', [])
+            self._remember_places(offered)
+
+    def prompt_summary(self):
+        """`summary()` for the extraction prompt: the most recent place names, or None if nothing was folded."""
+        summary = self.summary()
+        if summary is None:
+            return None
+        confirmed = summary['confirmed_places'][-MAX_PROMPT_PLACES:]
+        rejected = summary['rejected_places'][-MAX_PROMPT_PLACES:]
+        ids = confirmed + rejected
+        places = self.location_sequence.ids_to_places(ids, fields=("title",)) if ids else []
+        names = [place['title'] if place else str(place_id) for place_id, place in zip(ids, places)]
+        return {
+            'summarized_messages': summary['summarized_messages'],
+            'confirmed_places': names[:len(confirmed)],
+            'rejected_places': names[len(confirmed):],
+        }
@@ -0,0 +1,248 @@
+"""
+Beam-search itinerary planning over an in-memory candidate graph.
+
+`LocationSequence.suggest_itinerary_to_sequence` used to extend the trip one
+stop at a time, taking the single cheapest of the 30 nearest places at each
+hop, so an early choice could strand the rest of the route. `plan_itineraries`
+keeps the `beam_width` cheapest partial routes at every step and returns the
+best `k` complete ones.
+
+The candidate pool is fetched once per call. Its pairwise distances are a
+single NumPy matrix, and each place is linked to its NEIGHBOURS nearest pool
+members. Every step then runs in memory.
+
+A hop costs what the greedy loop charged, plus a diversity factor:
+
+    distance * rating penalty * direction penalty * (1 + DIVERSITY_WEIGHT * repeats)
+
+- rating penalty: 1 for five stars, up to 5 for one star;
+- direction penalty: 1 straight ahead, 3 for a U-turn;
+- repeats: stops already on the route that share the candidate's main category.
+
+A route's cost is the sum of its hops.
+
+`plan_category_itineraries` solves the category-constrained version, a set
+TSP over category groups. Each stop is a slot that must be filled from one
+category's places, taken from the category index. Ordered mixes fill the
+slots in sequence. Unordered mixes only have to meet the per-category counts
+by the end, so the search picks whichever needed category is cheapest to
+reach next. The pool is the nearest places of each requested category.
+Slots whose category has no places are left open and filled from an
+unconstrained fallback pool instead, so the route keeps its length.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from ChatSystem.place_store import haversine_m
+
+BEAM_WIDTH = 8
+# Extensions tried per partial route (its cheapest next hops).
+BRANCHING = 10
+# Candidate-graph edges per place, nearest first (the greedy loop's 30).
+NEIGHBOURS = 30
+DIVERSITY_WEIGHT = 0.25
+
+
+class _Route:
+    __slots__ = ("cost", "nodes", "visited", "tag_counts")
+
+    def __init__(self, cost, nodes, visited, tag_counts):
+        self.cost = cost
+        self.nodes = nodes
+        self.visited = visited
+        self.tag_counts = tag_counts
+
+
+class CandidateGraph:
+    """Distances, penalties and nearest-neighbour lists for one candidate pool.
+
+    Node 0 is the point the route continues from; node i > 0 is pool[i - 1].
+    """
+
+    def __init__(self, store, pool, current, previous=None, neighbours=NEIGHBOURS):
+        self.store = store
+        self.pool = np.asarray(pool, dtype=np.int64)
+        self.lat = np.concatenate([[current[0]], store.lat[self.pool]])
+        self.lng = np.concatenate([[current[1]], store.lng[self.pool]])
+        self.previous = previous
+        self.dist = haversine_m(self.lat[:, None], self.lng[:, None], self.lat[None, :], self.lng[None, :])
+        self.rating_penalty = np.concatenate([[1.0], np.maximum(1, 6 - store.rating_or_one[self.pool])])
+        self.tags = [None] + [tags[0] if tags else None for tags in (store.category_tags[p] for p in self.pool)]
+        # The node itself sorts first (distance 0); drop it.
+        self.order = np.argsort(self.dist, axis=1, kind="stable")[:, 1:]
+        self.neighbours = self.order[:, :neighbours]
+
+    def __len__(self):
+        return len(self.pool)
+
+    def coords(self, node):
+        return (self.lat[node], self.lng[node])
+
+    def hop_costs(self, route, candidates):
+        """Cost of extending `route` by each of `candidates` (node indices)."""
+        last = route.nodes[-1] if route.nodes else 0
+        c_lat, c_lng = self.coords(last)
+        if len(route.nodes) >= 2:
+            prev = self.coords(route.nodes[-2])
+        elif route.nodes:
+            prev = (self.lat[0], self.lng[0])
+        else:
+            prev = self.previous
+
+        dir_penalty = np.ones(candidates.size)
+        if prev is not None:
+            vec_prev = np.array([c_lat - prev[0], c_lng - prev[1]])
+            mag = np.hypot(*vec_prev)
+            if mag > 0:
+                vec_prev /= mag
+                vec_next = np.stack([self.lat[candidates] - c_lat, self.lng[candidates] - c_lng])
+                mag_next = np.hypot(vec_next[0], vec_next[1])
+                moved = mag_next > 0
+                cos_theta = np.clip((vec_prev @ vec_next[:, moved]) / mag_next[moved], -1.0, 1.0)
+                dir_penalty[moved] = 1.0 + (1.0 - cos_theta)
+
+        repeats = np.array([route.tag_counts.get(self.tags[c], 0) if self.tags[c] else 0 for c in candidates])
+        diversity = 1.0 + DIVERSITY_WEIGHT * repeats
+        return self.dist[last, candidates] * self.rating_penalty[candidates] * dir_penalty * diversity
+
+    def candidates_for(self, route, allowed=None):
+        """
+        Unvisited neighbours of the route's last node. With an `allowed` node mask,
+        the nearest unvisited allowed nodes instead, however far down the list they are.
+        """
+        last = route.nodes[-1] if route.nodes else 0
+        nbrs = self.neighbours[last] if allowed is None else self.order[last]
+        keep = ~np.isin(nbrs, list(route.visited))
+        if allowed is not None:
+            keep &= allowed[nbrs]
+        return nbrs[keep][:self.neighbours.shape[1]]
+
+
+def _extend(graph, route, node, hop_cost):
+    tag = graph.tags[node]
+    tag_counts = route.tag_counts
+    if tag:
+        tag_counts = dict(tag_counts)
+        tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    return _Route(route.cost + hop_cost, route.nodes + [node], route.visited | {node}, tag_counts)
+
+
+def beam_search(graph, steps, k=1, beam_width=BEAM_WIDTH, branching=BRANCHING, allowed_for_step=None):
+    """
+    Up to `k` cheapest routes of `steps` stops over `graph`, as lists of node
+    indices. `allowed_for_step(step, route)` may return a boolean mask over the
+    nodes to restrict what the route can visit next.
+    """
+    beam = [_Route(0.0, [], frozenset([0]), {})]
+    for step in range(steps):
+        children = {}
+        for route in beam:
+            allowed = allowed_for_step(step, route) if allowed_for_step else None
+            candidates = graph.candidates_for(route, allowed)
+            if not candidates.size:
+                continue
+            costs = graph.hop_costs(route, candidates)
+            for i in np.argsort(costs, kind="stable")[:branching]:
+                node = int(candidates[i])
+                child = _extend(graph, route, node, float(costs[i]))
+                # Routes over the same stops ending at the same place are interchangeable from here on.
+                key = (node, child.visited)
+                if key not in children or child.cost < children[key].cost:
+                    children[key] = child
+        if not children:
+            break
+        beam = sorted(children.values(), key=lambda r: r.cost)[:beam_width]
+
+    routes, seen = [], set()
+    for route in sorted(beam, key=lambda r: (-len(r.nodes), r.cost)):
+        if route.visited in seen:
+            continue
+        seen.add(route.visited)
+        routes.append(route.nodes)
+        if len(routes) >= k:
+            break
+    return routes
+
+
+def plan_itineraries(store, pool, current, previous=None, limit=5, k=1,
+                     beam_width=BEAM_WIDTH, branching=BRANCHING):
+    """Up to `k` itineraries of `limit` store positions drawn from `pool`, best first."""
+    if limit <= 0 or len(pool) == 0:
+        return []
+    graph = CandidateGraph(store, pool, current, previous)
+    routes = beam_search(graph, min(limit, len(graph)), k=k, beam_width=beam_width, branching=branching)
+    return [[int(graph.pool[n - 1]) for n in nodes] for nodes in routes]
+
+
+def category_slots(categories, limit):
+    """
+    The category of each of at most `limit` stops. A {category: count} mapping is
+    expanded in order; a list is repeated round-robin. Either is cut at `limit`,
+    so with more categories than stops only the first `limit` are used.
+    """
+    if isinstance(categories, dict):
+        slots = [c for c, count in categories.items() for _ in range(max(0, int(count)))]
+        return slots[:max(0, limit)]
+    categories = list(categories)
+    if not categories:
+        return []
+    return [categories[i % len(categories)] for i in range(max(0, limit))]
+
+
+def _remaining(counts, node_groups, nodes):
+    """Slots still open per category after `nodes`; a node matching several categories fills the neediest."""
+    remaining = dict(counts)
+    for node in nodes:
+        options = [c for c in node_groups[node] if remaining[c] > 0]
+        if options:
+            remaining[max(options, key=remaining.get)] -= 1
+    return remaining
+
+
+def plan_category_itineraries(store, groups, current, previous=None, slots=(), ordered=False, k=1,
+                              beam_width=BEAM_WIDTH, branching=BRANCHING, fallback_pool=None):
+    """
+    Up to `k` itineraries whose i-th stop belongs to category `slots[i]` (ordered)
+    or that meet the category counts of `slots` in any order, best first.
+    `groups` maps each category to the store positions it may use. Slots whose
+    category has no positions take any place from `fallback_pool` instead
+    (and are dropped without one).
+    """
+    slots = [c if len(groups.get(c, ())) > 0 else None for c in slots]
+    if fallback_pool is None or len(fallback_pool) == 0:
+        slots = [c for c in slots if c is not None]
+    named = set(c for c in slots if c is not None)
+    if not named:
+        return plan_itineraries(store, fallback_pool if slots else (), current, previous, limit=len(slots), k=k,
+                                beam_width=beam_width, branching=branching)
+    open_slots = len(slots) - sum(1 for c in slots if c is not None)
+    pools = [groups[c] for c in named] + ([np.asarray(fallback_pool, dtype=np.int64)] if open_slots else [])
+    pool = np.unique(np.concatenate(pools))
+    graph = CandidateGraph(store, pool, current, previous)
+    masks = {c: np.concatenate([[False], np.isin(graph.pool, groups[c])]) for c in named}
+    masks[None] = np.concatenate([[False], np.ones(len(graph), dtype=bool)])
+
+    if ordered:
+        def allowed_for_step(step, route):
+            return masks[slots[step]]
+    else:
+        counts = Counter(c for c in slots if c is not None)
+        node_groups = [frozenset(c for c in named if masks[c][n]) for n in range(len(graph) + 1)]
+
+        def allowed_for_step(step, route):
+            remaining = _remaining(counts, node_groups, route.nodes)
+            filled = sum(counts.values()) - sum(remaining.values())
+            # Stops that filled no category took an open slot
+            if open_slots - (len(route.nodes) - filled) > 0:
+                return masks[None]
+            allowed = np.zeros(len(graph) + 1, dtype=bool)
+            for category, left in remaining.items():
+                if left > 0:
+                    allowed |= masks[category]
+            return allowed
+
+    routes = beam_search(graph, len(slots), k=k, beam_width=beam_width, branching=branching,
+                         allowed_for_step=allowed_for_step)
+    return [[int(graph.pool[n - 1]) for n in nodes] for nodes in routes]
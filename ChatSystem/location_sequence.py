@@ -1,13 +1,27 @@
-import sqlite3 
 import os 
 import random
-import math
-import re
+import sys
+from collections import Counter
+
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.db_pool import get_pool
+from ChatSystem.fts_index import fts_search
+from ChatSystem.itinerary_planner import category_slots, plan_category_itineraries, plan_itineraries
+from ChatSystem.place_lookup import get_place_lookup
+from ChatSystem.place_store import normalize_text, parse_category_tags
+from ChatSystem.route_optimizer import distance_matrix, optimize_order, path_length
+from ChatSystem.spatial_index import get_spatial_index
+from ChatSystem.title_index import get_title_index
 
 try:
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
 except Exception:
     fuzz = None
+    process = None
 
 class LocationSequence:
     # Define the path to the database at class level
@@ -52,30 +66,19 @@ class LocationSequence:
         if not self.sequence:
             return "LocationSequence: []"
         
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
         place_names = []
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            for place_id in self.sequence:
-                cursor.execute("SELECT title FROM places WHERE rowid = ?", (place_id,))
-                result = cursor.fetchone()
-                if result:
-                    place_names.append(f"{place_id}: {result[0]}")
-                else:
-                    place_names.append(f"{place_id}: [Not Found]")
-        
+        for place_id, place in zip(self.sequence, self.ids_to_places(self.sequence, fields=("title",))):
+            if place:
+                place_names.append(f"{place_id}: {place['title']}")
+            else:
+                place_names.append(f"{place_id}: [Not Found]")
+
         return f"LocationSequence: [{', '.join(place_names)}]"
 
     # --- shared helpers ---
     @staticmethod
     def _normalize_text(s) -> str:
-        if s is None:
-            return ""
-        s = str(s).lower()
-        s = re.sub(r"[^0-9a-z]+", " ", s)
-        parts = [p for p in s.split() if p and not p.isdigit()]
-        return " ".join(parts)
+        return normalize_text(s)
 
     @staticmethod
     def _title_similarity(query, title) -> float:
@@ -89,15 +92,26 @@ class LocationSequence:
             return difflib.SequenceMatcher(None, q, t).ratio()
         return fuzz.token_set_ratio(q, t) / 100.0
 
+    @staticmethod
+    def _title_similarities(query, norm_titles):
+        """Vector of `_title_similarity(query, t)` for already-normalized titles."""
+        q = LocationSequence._normalize_text(query)
+        if not q or not norm_titles:
+            return np.zeros(len(norm_titles))
+        if process is None:
+            import difflib
+            return np.array([difflib.SequenceMatcher(None, q, t).ratio() if t else 0.0 for t in norm_titles])
+        sims = process.cdist([q], norm_titles, scorer=fuzz.token_set_ratio, dtype=np.float64)[0] / 100.0
+        # Match the scalar helper: empty titles never count as similar.
+        sims[np.array([not t for t in norm_titles])] = 0.0
+        return sims
+
     def _allowed_category_set(self):
         return {c.strip().lower() for c in getattr(self, "categories", []) if c}
 
     @staticmethod
     def _parse_category_tags(cat_value):
-        if not cat_value:
-            return []
-        parts = [p.strip().lower() for p in str(cat_value).split(",")]
-        return [p for p in parts if p]
+        return parse_category_tags(cat_value)
 
     @staticmethod
     def _has_any_allowed_tag(cat_value, allowed_set) -> bool:
@@ -108,6 +122,19 @@ class LocationSequence:
             return True
         return any(t in allowed_set for t in tags)
     
+    def _db_path(self):
+        return os.path.join(self.RESULT_DIR, 'places.db')
+
+    def _db(self):
+        """Shared read-only connection pool for places.db."""
+        return get_pool(self._db_path())
+
+    def _spatial_index(self):
+        return get_spatial_index(self._db_path())
+
+    def _title_index(self):
+        return get_title_index(self._db_path())
+
     def clear_sequence(self):
         self.sequence = []
 
@@ -117,72 +144,82 @@ class LocationSequence:
     # --- direct DB helpers (no external import) ---
     def id_to_name(self, place_id):
         """Return the name for a given rowid, or None if not found."""
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT title FROM places WHERE rowid = ?", (place_id,))
-            row = cursor.fetchone()
-            return row[0] if row else None
-
-    def search_by_name(self, name, exact=True, limit=10):
+        place = self.ids_to_places([place_id], fields=("title",))[0]
+        return place["title"] if place else None
+
+    def ids_to_places(self, ids, fields=None):
+        """Return a dict per ID (same order) with `id` and the requested `places` columns.
+
+        Unknown IDs map to None. All IDs are fetched with one `WHERE rowid IN (...)` query,
+        and rows are kept in an LRU cache shared by the process (see `place_lookup.py`).
+        """
+        return get_place_lookup(self._db_path()).get(ids, fields)
+
+    SEARCH_BACKENDS = ("fuzzy", "fts")
+
+    def search_by_name(self, name, exact=True, limit=10, backend="fuzzy"):
         """Return IDs matching a place title.
 
         Behavior:
         - If `exact=True`, return exact-title hits first.
-        - Fill remaining slots with best fuzzy matches using RapidFuzz (if available).
+        - With `backend="fts"`, next take BM25-ranked full-text hits over title, address,
+          category name and cuisine tags (see `fts_index.py`; skipped if the index is missing or stale).
+        - Fill remaining slots with best fuzzy matches using RapidFuzz (if available),
+          scoring only titles that share trigrams with the query (see `title_index.py`).
         - Always excludes IDs already present in the current sequence.
         """
 
+        if backend not in self.SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend: {backend}")
         if limit <= 0:
             return []
         if not name or not str(name).strip():
             return []
 
         query_text = str(name).strip()
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
+        index = self._title_index()
+        store = index.store
         exclude_ids = set(self.sequence)
         results = []
         seen = set()
 
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            if exact:
-                cursor.execute("SELECT rowid FROM places WHERE title = ?", (query_text,))
-                for row in cursor.fetchall():
-                    rid = row[0]
-                    if rid in exclude_ids or rid in seen:
-                        continue
-                    seen.add(rid)
-                    results.append(rid)
-                if len(results) >= limit:
-                    return results[:limit]
-
-            remaining = max(0, limit - len(results))
-            if remaining <= 0:
-                return results[:limit]
-
-            # DB is small in this project, so scoring all titles is safe and gives best matches.
-            cursor.execute("SELECT rowid, title FROM places")
-            scored = []
-            for row in cursor.fetchall():
-                rid = row["rowid"]
+        if exact:
+            for pos in index.exact_positions(query_text):
+                rid = int(store.rowids[pos])
                 if rid in exclude_ids or rid in seen:
                     continue
-                title = row["title"]
-                sim = self._title_similarity(query_text, title)
-                scored.append((sim, len(title) if title else 10**9, rid))
-
-            # Highest similarity first; tie-break by shorter title.
-            scored.sort(key=lambda x: (-x[0], x[1], x[2]))
-            for sim, _, rid in scored:
-                if len(results) >= limit:
-                    break
-                # Optional guard: if query is very specific, you can raise this threshold.
-                # For now we accept any similarity and just return the best-ranked.
+                seen.add(rid)
                 results.append(rid)
+            if len(results) >= limit:
+                return results[:limit]
+
+        if backend == "fts":
+            hits = fts_search(self._db_path(), query_text, limit - len(results), exclude=exclude_ids | seen)
+            for rid in hits or []:
                 seen.add(rid)
+                results.append(rid)
+
+        remaining = max(0, limit - len(results))
+        if remaining <= 0:
+            return results[:limit]
+
+        def _unseen(positions):
+            skip = list(exclude_ids | seen)
+            if skip and positions.size:
+                positions = positions[~np.isin(store.rowids[positions], skip)]
+            return positions
+
+        # Only score titles sharing trigrams with the query; if that leaves too few,
+        # score every title so the result still fills `limit` like before.
+        positions = _unseen(index.candidates(query_text, max_candidates=max(2000, remaining * 50)))
+        if positions.size < remaining:
+            positions = _unseen(np.arange(len(store)))
+
+        sims = self._title_similarities(query_text, [store.norm_titles[p] for p in positions])
+        # Highest similarity first; tie-break by shorter title, then rowid.
+        order = np.lexsort((store.rowids[positions], index.title_len[positions], -sims))
+        for rid in store.rowids[positions[order[:remaining]]]:
+            results.append(int(rid))
 
         return results[:limit]
     def get_suggest_category(self) :
@@ -205,99 +242,56 @@ class LocationSequence:
             pos = len(self.sequence) - 1
 
         exclude_ids = set(self.sequence)
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
+        index = self._spatial_index()
+        store = index.store
 
         allowed_set = self._allowed_category_set()
-
-        def _dist(lat1, lon1, lat2, lon2):
-            return 6371000 * (math.acos(math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-                                        math.cos(math.radians(lon2 - lon1)) +
-                                        math.sin(math.radians(lat1)) * math.sin(math.radians(lat2))))
-
-        def _coords_rating(place_id):
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT location_lat, location_lng, rating FROM places WHERE rowid = ?", (place_id,))
-                row = cursor.fetchone()
-                return (row[0], row[1], row[2]) if row else None
+        allowed_mask = store.allowed_mask(allowed_set)
 
         def _fetch_candidates(anchor_lat, anchor_lon, base_limit, filter_mode=None):
-            exclude_clause = "1=1"
-            params = [anchor_lat, anchor_lon, anchor_lat]
-            if exclude_ids:
-                placeholders = ",".join(["?"] * len(exclude_ids))
-                exclude_clause = f"rowid NOT IN ({placeholders})"
-                params.extend(list(exclude_ids))
-            filter_clause = ""
+            # (dist_prev, positions) of the nearest places to the anchor, nearest first.
+            # Title fuzzy search is handled in Python using similarity scoring.
+            mask = None
             if category and filter_mode == "category":
-                filter_clause = "AND categories LIKE ?"
-                params.append(f"%{category}%")
-            elif category and filter_mode == "title":
-                # Title fuzzy search is handled in Python using similarity scoring.
-                filter_clause = ""
-            params.append(base_limit)
-
-            query = f"""
-                SELECT rowid, rating, title, categories,
-                (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                cos(radians(location_lng) - radians(?)) +
-                sin(radians(?)) * sin(radians(location_lat)))) AS dist_prev
-                FROM places
-                WHERE {exclude_clause}
-                {filter_clause}
-                ORDER BY dist_prev
-                LIMIT ?
-            """
-            with sqlite3.connect(db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                return cursor.fetchall()
+                mask = store.category_like_mask(category)
+            return index.nearest(anchor_lat, anchor_lon, base_limit, exclude=exclude_ids, mask=mask)
+
+        def _unseen(costs, positions, seen):
+            keep = ~np.isin(store.rowids[positions], list(seen))
+            # Only apply allow-list filtering when no explicit category/query is provided.
+            # When `category` is specified, we already prefilter by category (categories LIKE)
+            # or by title-fuzzy, so rejecting by allow-list parsing can incorrectly drop matches.
+            if category is None:
+                keep &= allowed_mask[positions]
+            return costs[keep], positions[keep]
+
+        def _ranked(costs, positions):
+            # Stable sort keeps nearest-first order among equal costs.
+            order = np.argsort(costs, kind="stable")
+            return [int(rid) for rid in store.rowids[positions[order]]]
+
+        def _rank_by_rating(rows, seen):
+            """Rank by distance (or detour) divided by rating."""
+            dist, positions = _unseen(*rows, seen)
+            return _ranked(dist / store.rating_or_one[positions], positions)
+
+        def _rank_by_title(rows, seen, sim_threshold=0.45, sim_lambda_m=2000.0):
+            """Rank by (distance/rating + penalty based on (1-similarity))."""
+            dist, positions = _unseen(*rows, seen)
+            sims = self._title_similarities(category, [store.norm_titles[p] for p in positions])
+            keep = sims >= sim_threshold
+            dist, positions, sims = dist[keep], positions[keep], sims[keep]
+            cost = dist / store.rating_or_one[positions] + sim_lambda_m * (1.0 - sims)
+            return _ranked(cost, positions)
 
         def _near_coords(anchor_lat, anchor_lon):
             results = []
             seen = set(exclude_ids)
 
-            def _score_rows(rows):
-                scored = []
-                for row in rows:
-                    rid = row["rowid"]
-                    if rid in seen:
-                        continue
-                    # Only apply allow-list filtering when no explicit category/query is provided.
-                    # When `category` is specified, we already prefilter by SQL (categories LIKE)
-                    # or by title-fuzzy, so rejecting by allow-list parsing can incorrectly drop matches.
-                    if category is None and (not self._has_any_allowed_tag(row["categories"], allowed_set)):
-                        continue
-                    rating = row["rating"] if row["rating"] not in (None, 0) else 1
-                    score = row["dist_prev"] / rating
-                    scored.append((score, rid))
-                scored.sort(key=lambda x: x[0])
-                return scored
-
-            def _score_rows_title_fuzzy(rows, sim_threshold=0.45, sim_lambda_m=2000.0):
-                """Rank by (distance/rating + penalty based on (1-similarity))."""
-                scored = []
-                for row in rows:
-                    rid = row["rowid"]
-                    if rid in seen:
-                        continue
-                    if category is None and (not self._has_any_allowed_tag(row["categories"], allowed_set)):
-                        continue
-                    sim = self._title_similarity(category, row["title"])
-                    if sim < sim_threshold:
-                        continue
-                    rating = row["rating"] if row["rating"] not in (None, 0) else 1
-                    base_cost = row["dist_prev"] / rating
-                    cost = base_cost + sim_lambda_m * (1.0 - sim)
-                    scored.append((cost, rid))
-                scored.sort(key=lambda x: x[0])
-                return scored
-
             # 1) Try category match first (if provided)
             if category:
                 rows = _fetch_candidates(anchor_lat, anchor_lon, limit + len(exclude_ids), filter_mode="category")
-                for _, rid in _score_rows(rows):
+                for rid in _rank_by_rating(rows, seen):
                     results.append(rid)
                     seen.add(rid)
                     if len(results) >= limit:
@@ -309,7 +303,7 @@ class LocationSequence:
                     # Pull a nearby pool, then filter+rank by fuzzy title similarity
                     pool = max(200, remaining * 20, remaining + len(exclude_ids))
                     rows2 = _fetch_candidates(anchor_lat, anchor_lon, pool, filter_mode="title")
-                    for _, rid in _score_rows_title_fuzzy(rows2):
+                    for rid in _rank_by_title(rows2, seen):
                         results.append(rid)
                         seen.add(rid)
                         if len(results) >= limit:
@@ -320,7 +314,7 @@ class LocationSequence:
 
             # No category provided: original behavior
             rows = _fetch_candidates(anchor_lat, anchor_lon, limit + len(exclude_ids), filter_mode=None)
-            for _, rid in _score_rows(rows):
+            for rid in _rank_by_rating(rows, seen):
                 results.append(rid)
                 if len(results) >= limit:
                     break
@@ -330,52 +324,23 @@ class LocationSequence:
             results = []
             seen = set(exclude_ids)
 
-            def _score_rows(rows):
-                scored = []
-                for row in rows:
-                    rid = row["rowid"]
-                    if rid in seen:
-                        continue
-                    if category is None and (not self._has_any_allowed_tag(row["categories"], allowed_set)):
-                        continue
-                    coords = _coords_rating(rid)
-                    if not coords:
-                        continue
-                    p_lat, p_lon, rating = coords
-                    rating = rating if rating not in (None, 0) else 1
-                    cost = (_dist(a_lat, a_lon, p_lat, p_lon) + _dist(p_lat, p_lon, b_lat, b_lon)) / rating
-                    scored.append((cost, rid))
-                scored.sort(key=lambda x: x[0])
-                return scored
-
-            def _score_rows_title_fuzzy(rows, sim_threshold=0.45, sim_lambda_m=2000.0):
-                scored = []
-                for row in rows:
-                    rid = row["rowid"]
-                    if rid in seen:
-                        continue
-                    if category is None and (not self._has_any_allowed_tag(row["categories"], allowed_set)):
-                        continue
-                    sim = self._title_similarity(category, row["title"])
-                    if sim < sim_threshold:
-                        continue
-                    coords = _coords_rating(rid)
-                    if not coords:
-                        continue
-                    p_lat, p_lon, rating = coords
-                    rating = rating if rating not in (None, 0) else 1
-                    base_cost = (_dist(a_lat, a_lon, p_lat, p_lon) + _dist(p_lat, p_lon, b_lat, b_lon)) / rating
-                    cost = base_cost + sim_lambda_m * (1.0 - sim)
-                    scored.append((cost, rid))
-                scored.sort(key=lambda x: x[0])
-                return scored
+            def _detour_candidates(min_count, filter_mode=None):
+                # One batched fetch of (dist(a,p) + dist(p,b), positions) for every place inside
+                # an ellipse with both anchors as foci, grown until it holds `min_count` places.
+                if category and filter_mode == "category":
+                    mask = store.category_like_mask(category)
+                elif category is None:
+                    mask = allowed_mask
+                else:
+                    mask = None
+                return index.within_ellipse(a_lat, a_lon, b_lat, b_lon, min_count, exclude=seen, mask=mask)
 
             base = (limit + len(exclude_ids)) * 3
 
             # 1) Try category match first (if provided)
             if category:
-                rows = _fetch_candidates(a_lat, a_lon, base, filter_mode="category")
-                for _, rid in _score_rows(rows):
+                rows = _detour_candidates(base, filter_mode="category")
+                for rid in _rank_by_rating(rows, seen):
                     results.append(rid)
                     seen.add(rid)
                     if len(results) >= limit:
@@ -385,8 +350,8 @@ class LocationSequence:
                 remaining = max(0, limit - len(results))
                 if remaining > 0:
                     pool = max(300, base, remaining * 30, remaining + len(exclude_ids))
-                    rows2 = _fetch_candidates(a_lat, a_lon, pool, filter_mode="title")
-                    for _, rid in _score_rows_title_fuzzy(rows2):
+                    rows2 = _detour_candidates(pool, filter_mode="title")
+                    for rid in _rank_by_title(rows2, seen):
                         results.append(rid)
                         seen.add(rid)
                         if len(results) >= limit:
@@ -396,8 +361,8 @@ class LocationSequence:
                 return results[:limit]
 
             # No category provided: original behavior
-            rows = _fetch_candidates(a_lat, a_lon, base, filter_mode=None)
-            for _, rid in _score_rows(rows):
+            rows = _detour_candidates(base)
+            for rid in _rank_by_rating(rows, seen):
                 results.append(rid)
                 if len(results) >= limit:
                     break
@@ -409,220 +374,165 @@ class LocationSequence:
             return _near_coords(s_lat, s_lon)
 
         if pos <= 0:
-            first_coords = _coords_rating(self.sequence[0])
+            first_coords = store.coords(self.sequence[0])
             if not first_coords:
                 return []
             s_lat, s_lon = self.start_coordinate
-            f_lat, f_lon, _ = first_coords
+            f_lat, f_lon = first_coords
             return _between_coords(s_lat, s_lon, f_lat, f_lon)
 
         if pos >= len(self.sequence):
-            last_coords = _coords_rating(self.sequence[-1])
+            last_coords = store.coords(self.sequence[-1])
             if not last_coords:
                 return []
-            l_lat, l_lon, _ = last_coords
+            l_lat, l_lon = last_coords
             return _near_coords(l_lat, l_lon)
 
-        prev_coords = _coords_rating(self.sequence[pos - 1])
-        next_coords = _coords_rating(self.sequence[pos])
+        prev_coords = store.coords(self.sequence[pos - 1])
+        next_coords = store.coords(self.sequence[pos])
         if not prev_coords or not next_coords:
             return []
-        a_lat, a_lon, _ = prev_coords
-        b_lat, b_lon, _ = next_coords
+        a_lat, a_lon = prev_coords
+        b_lat, b_lon = next_coords
         return _between_coords(a_lat, a_lon, b_lat, b_lon)
     def suggest_around(self, lat, lon, limit=5, category=None):
-        # Connect to the database
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
-
-        allowed_set = self._allowed_category_set()
-        with sqlite3.connect(db_path) as conn:  
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Query to find places within a certain radius (e.g., 5km)
-            radius_meters = 15000
-            pool = max(200, limit * 50)
+        index = self._spatial_index()
+        store = index.store
+
+        # Places within a certain radius (e.g., 15km), nearest first
+        radius_meters = 15000
+        pool = max(200, limit * 50)
+
+        if category is None:
+            # No category requested: just return best nearby places that pass allow-list.
+            mask = store.allowed_mask(self._allowed_category_set())
+        else:
+            # Category requested: prefilter by substring match only.
+            mask = store.category_like_mask(category)
+        distance, positions = index.within_radius(lat, lon, radius_meters, mask=mask)
+        distance, positions = distance[:pool], positions[:pool]
+
+        score = distance / store.rating_or_one[positions]
+        order = np.argsort(score, kind="stable")[:limit]
+        return [int(rid) for rid in store.rowids[positions[order]]]
+    # Candidate pool per itinerary call: the nearest places to the route's current end.
+    ITINERARY_POOL_MIN = 60
+    ITINERARY_POOL_PER_STOP = 15
+
+    def _itinerary_anchor(self, store):
+        """(current, previous) coordinates the itinerary continues from; previous gives the direction."""
+        if not self.sequence:
+            return tuple(self.start_coordinate), None
+        current = store.coords(self.sequence[-1])
+        if len(self.sequence) >= 2:
+            previous = store.coords(self.sequence[-2])
+        else:
+            previous = tuple(self.start_coordinate)
+        return current, previous
 
-            if category is None:
-                # No category requested: just return best nearby places that pass allow-list.
-                query = """
-                SELECT rowid, rating, categories,
-                (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                cos(radians(location_lng) - radians(?)) +
-                sin(radians(?)) * sin(radians(location_lat)))) AS distance
-                FROM places
-                WHERE (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                    cos(radians(location_lng) - radians(?)) +
-                    sin(radians(?)) * sin(radians(location_lat)))) < ?
-                ORDER BY distance
-                LIMIT ?
-                """
-                cursor.execute(query, (lat, lon, lat, lat, lon, lat, radius_meters, pool))
-            else:
-                # Category requested: prefilter by substring match, then apply allow-list.
-                query = """
-                SELECT rowid, rating, categories,
-                (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                cos(radians(location_lng) - radians(?)) +
-                sin(radians(?)) * sin(radians(location_lat)))) AS distance
-                FROM places
-                WHERE categories LIKE ?
-                AND (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                    cos(radians(location_lng) - radians(?)) +
-                    sin(radians(?)) * sin(radians(location_lat)))) < ?
-                ORDER BY distance
-                LIMIT ?
-                """
-                cursor.execute(query, (lat, lon, lat, f"%{category}%", lat, lon, lat, radius_meters, pool))
-
-            results = cursor.fetchall()
-            scored = []
-            for row in results:
-                # Only apply allow-list when no category is specified.
-                if category is None and (not self._has_any_allowed_tag(row["categories"], allowed_set)):
-                    continue
-                rating = row["rating"] if row["rating"] not in (None, 0) else 1
-                score = row["distance"] / rating
-                scored.append((score, row["rowid"]))
-            scored.sort(key=lambda x: x[0])
-            return [rid for _, rid in scored[:limit]]
-    def suggest_itinerary_to_sequence(self, limit=5):
+    @staticmethod
+    def _normalize_category_mix(categories):
+        """A category name, list of names or {name: count} mapping, lowercased; None if empty."""
+        if not categories:
+            return None
+        if isinstance(categories, str):
+            categories = [categories]
+        if isinstance(categories, dict):
+            mix = {}
+            for name, count in categories.items():
+                name = str(name).strip().lower()
+                if name:
+                    mix[name] = mix.get(name, 0) + int(count)
+            return mix or None
+        names = [str(c).strip().lower() for c in categories if c and str(c).strip()]
+        return list(dict.fromkeys(names)) or None
+
+    def suggest_itineraries(self, limit=5, k=3, categories=None, ordered=False):
         """
-        Recommend a sequence of `limit` new place IDs to append at the end of the trip,
-        forming a continuous journey (A -> B -> C...) using Directional/Momentum scoring.
+        Up to `k` alternative itineraries of `limit` new place IDs to append at the
+        end of the trip, best first. The nearest allow-listed places form one
+        in-memory candidate pool, and a beam search scores whole routes by
+        distance, rating, direction and category variety (see `itinerary_planner.py`).
+
+        With `categories` every stop must come from the requested mix: a list is
+        spread round-robin over `limit` stops, and a {category: count} mapping gives
+        exact counts; both are cut at `limit`. With `ordered=True` the stops follow
+        the mix's order; otherwise only the counts must be met. Categories match like
+        `suggest_for_position`'s (`categories LIKE '%category%'`, via the category
+        index). Stops of a category with no places are planned without the
+        category constraint instead.
         """
-        if limit <= 0:
+        if k <= 0 or limit <= 0:
             return []
+        categories = self._normalize_category_mix(categories)
 
-        db_path = os.path.join(self.RESULT_DIR, 'places.db')
-        visited_ids = set(self.sequence)
-        journey = []
-
-        def _get_coords_db(cursor, pid):
-            cursor.execute("SELECT location_lat, location_lng FROM places WHERE rowid = ?", (pid,))
-            row = cursor.fetchone()
-            return (row["location_lat"], row["location_lng"]) if row else None
-
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-
-            allowed_set = self._allowed_category_set()
-
-            # --- INITIALIZATION ---
-            current_coords = None
-            prev_coords = None
-
-            if self.sequence:
-                # Current is the last item
-                current_coords = _get_coords_db(cur, self.sequence[-1])
-                
-                if len(self.sequence) >= 2:
-                    # Momentum from second-to-last -> last
-                    prev_coords = _get_coords_db(cur, self.sequence[-2])
-                else:
-                    # Momentum from start -> last
-                    prev_coords = tuple(self.start_coordinate)
+        index = self._spatial_index()
+        store = index.store
+        current, previous = self._itinerary_anchor(store)
+        if not current:
+            return []
+        exclude = set(self.sequence)
+
+        def unconstrained_pool(stops):
+            allowed_mask = store.allowed_mask(self._allowed_category_set())
+            pool_size = max(self.ITINERARY_POOL_MIN, stops * self.ITINERARY_POOL_PER_STOP)
+            return index.nearest(current[0], current[1], pool_size, exclude=exclude, mask=allowed_mask)[1]
+
+        if categories:
+            slots = category_slots(categories, limit)
+            groups = {}
+            for category, count in Counter(slots).items():
+                pool_size = max(self.ITINERARY_POOL_MIN // 2, count * self.ITINERARY_POOL_PER_STOP)
+                _, groups[category] = index.nearest(current[0], current[1], pool_size, exclude=exclude,
+                                                    mask=store.category_like_mask(category))
+            empty = sum(1 for c in slots if not len(groups[c]))
+            fallback = unconstrained_pool(empty) if empty else None
+            routes = plan_category_itineraries(store, groups, current, previous, slots=slots, ordered=ordered, k=k,
+                                               fallback_pool=fallback)
+        else:
+            routes = plan_itineraries(store, unconstrained_pool(limit), current, previous, limit=limit, k=k)
+        return [[int(store.rowids[p]) for p in route] for route in routes]
+
+    def suggest_itinerary_to_sequence(self, limit=5, categories=None, ordered=False):
+        """
+        Recommend a sequence of `limit` new place IDs to append at the end of the trip,
+        forming a continuous journey (A -> B -> C...): the best of `suggest_itineraries`,
+        optionally restricted to a category mix.
+        """
+        routes = self.suggest_itineraries(limit, k=1, categories=categories, ordered=ordered)
+        return routes[0] if routes else []
+
+    def _route_points(self, sequence):
+        """(located IDs, unlocated IDs, distance matrix over start + located stops)."""
+        store = self._spatial_index().store
+        located, missing, points = [], [], [tuple(self.start_coordinate)]
+        for place_id in sequence:
+            coords = store.coords(place_id)
+            if coords:
+                located.append(place_id)
+                points.append(coords)
             else:
-                # Starting fresh from start_coordinate
-                current_coords = tuple(self.start_coordinate)
-                prev_coords = None # No direction yet
+                missing.append(place_id)
+        return located, missing, distance_matrix(points)
 
-            # --- GENERATION LOOP ---
-            for _ in range(limit):
-                if not current_coords:
-                    break
-                
-                c_lat, c_lon = current_coords
-                
-                # 1. Build Exclusion Clause
-                if visited_ids:
-                    placeholders = ",".join(["?"] * len(visited_ids))
-                    where_clause = f"rowid NOT IN ({placeholders})"
-                    params = [c_lat, c_lon, c_lat] + list(visited_ids)
-                else:
-                    where_clause = "1=1"
-                    params = [c_lat, c_lon, c_lat]
-
-                # 2. Fetch Candidates (Top 30 nearest)
-                query = f"""
-                    SELECT rowid, rating, location_lat, location_lng, categories,
-                    (6371000 * acos(cos(radians(?)) * cos(radians(location_lat)) *
-                    cos(radians(location_lng) - radians(?)) +
-                    sin(radians(?)) * sin(radians(location_lat)))) AS distance
-                    FROM places
-                    WHERE {where_clause}
-                    ORDER BY distance ASC
-                    LIMIT 30
-                """
-                
-                cur.execute(query, params)
-                candidates = cur.fetchall()
-                
-                best_step = None
-                min_cost = float('inf')
-                
-                # Pre-calculate previous vector if it exists
-                vec_prev = None
-                if prev_coords:
-                    p_lat, p_lon = prev_coords
-                    # Vector: (dLat, dLon)
-                    vec_prev = (c_lat - p_lat, c_lon - p_lon)
-                    # Normalize
-                    mag = math.sqrt(vec_prev[0]**2 + vec_prev[1]**2)
-                    if mag > 0:
-                        vec_prev = (vec_prev[0]/mag, vec_prev[1]/mag)
-                    else:
-                        vec_prev = None
-
-                for row in candidates:
-                    if not self._has_any_allowed_tag(row["categories"], allowed_set):
-                        continue
-                    # --- SCORING FORMULA ---
-                    # Cost = Distance * RatingPenalty * DirectionPenalty
-                    
-                    dist = row["distance"]
-                    rating = row["rating"] if row["rating"] not in (None, 0) else 1
-                    
-                    # A. Rating Penalty (Higher rating = lower cost)
-                    # 5 stars -> x1, 1 star -> x5
-                    rating_penalty = max(1, 6 - rating)
-                    
-                    # B. Direction Penalty
-                    dir_penalty = 1.0
-                    if vec_prev:
-                        n_lat, n_lon = row["location_lat"], row["location_lng"]
-                        vec_next = (n_lat - c_lat, n_lon - c_lon)
-                        mag_next = math.sqrt(vec_next[0]**2 + vec_next[1]**2)
-                        
-                        if mag_next > 0:
-                            vec_next = (vec_next[0]/mag_next, vec_next[1]/mag_next)
-                            # Dot product for cos(theta)
-                            cos_theta = vec_prev[0]*vec_next[0] + vec_prev[1]*vec_next[1]
-                            # Clamp for safety
-                            cos_theta = max(-1.0, min(1.0, cos_theta))
-                            
-                            # Penalty: 0 deg -> 1.0, 90 deg -> 2.0, 180 deg -> 3.0
-                            dir_penalty = 1.0 + (1.0 - cos_theta)
-
-                    cost = dist * rating_penalty * dir_penalty
-                    
-                    if cost < min_cost:
-                        min_cost = cost
-                        best_step = row
-                
-                if best_step:
-                    rid = best_step["rowid"]
-                    journey.append(rid)
-                    visited_ids.add(rid) # Prevent overlap
-                    
-                    # Update state for next iteration
-                    prev_coords = current_coords
-                    current_coords = (best_step["location_lat"], best_step["location_lng"])
-                else:
-                    break
-                    
-        return journey
+    def route_length(self, sequence=None):
+        """Meters from `start_coordinate` through the located stops of `sequence` (default: current)."""
+        sequence = self.sequence if sequence is None else sequence
+        located, _, dist = self._route_points(sequence)
+        return path_length(dist, range(1, len(located) + 1))
+
+    def optimize_order(self, apply=False):
+        """
+        Shortest visiting order of the current sequence from `start_coordinate`:
+        exact (Held–Karp) for small sequences, 2-opt/Or-opt local search beyond
+        that (see `route_optimizer.py`). Stops without coordinates keep their
+        relative order at the end. With `apply=True` the sequence is reordered in place.
+        """
+        located, missing, dist = self._route_points(self.sequence)
+        order = [located[i - 1] for i in optimize_order(dist)] + missing
+        if apply:
+            self.sequence = order
+        return order
 
 
         
@@ -630,15 +540,12 @@ if __name__ == "__main__":
     def run_tests():
         print("\n=== LocationSequence smoke tests ===")
         loc_seq = LocationSequence()
-        db_path = os.path.join(loc_seq.RESULT_DIR, 'places.db')
+        db_path = loc_seq._db_path()
         if not os.path.exists(db_path):
             print("No places.db found; skipping DB-dependent tests.")
             return
 
-        with sqlite3.connect(db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT rowid FROM places LIMIT 5")
-            seed_ids = [row[0] for row in cur.fetchall()]
+        seed_ids = [row[0] for row in loc_seq._db().fetchall("SELECT rowid FROM places LIMIT 5")]
 
         def show(msg):
             print(f"- {msg}")
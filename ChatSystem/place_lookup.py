@@ -0,0 +1,112 @@
+"""
+Batched place-detail lookups with an LRU cache.
+
+`ids_to_places(ids, fields)` answers a whole list of rowids with one
+`WHERE rowid IN (...)` query and caches every fetched row. Callers that
+loop over suggestion IDs (names for a reply, hydrating `database_results`)
+therefore cost at most one query. Rows are cached with every column, so
+requests for different field subsets share entries. The cache is cleared
+when the `places.db` modification time changes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from ChatSystem.db_pool import get_pool
+
+MAX_CACHED_PLACES = 4096
+# Stay below SQLite's default limit on bound parameters per statement.
+MAX_IDS_PER_QUERY = 900
+
+
+class PlaceLookup:
+    """Row cache for `places`, keyed by rowid."""
+
+    def __init__(self, db_path, max_entries=MAX_CACHED_PLACES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.columns = ()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_fresh(self):
+        mtime = os.path.getmtime(self.db_path)
+        if mtime != self._mtime:
+            pool = get_pool(self.db_path)
+            columns = tuple(row[1] for row in pool.fetchall("PRAGMA table_info(places)"))
+            with self._lock:
+                self._rows.clear()
+                self.columns = columns
+                self._mtime = mtime
+
+    def _fetch(self, missing):
+        pool = get_pool(self.db_path)
+        select = ", ".join(f'"{c}"' for c in self.columns)
+        fetched = {}
+        for start in range(0, len(missing), MAX_IDS_PER_QUERY):
+            chunk = missing[start:start + MAX_IDS_PER_QUERY]
+            marks = ", ".join("?" for _ in chunk)
+            for row in pool.fetchall(f"SELECT rowid, {select} FROM places WHERE rowid IN ({marks})", chunk):
+                fetched[row[0]] = dict(zip(self.columns, tuple(row)[1:]))
+        return fetched
+
+    def get(self, ids, fields=None):
+        """Return one dict per ID (in order) with `id` plus `fields`, or None for unknown IDs.
+
+        `fields=None` returns every column of `places`; unknown field names raise ValueError.
+        """
+        self._check_fresh()
+        if fields is not None:
+            fields = tuple(fields)
+            unknown = [f for f in fields if f not in self.columns]
+            if unknown:
+                raise ValueError(f"Unknown place fields: {', '.join(unknown)}")
+
+        ids = [int(i) for i in ids]
+        found = {}
+        with self._lock:
+            for rid in ids:
+                row = self._rows.get(rid)
+                if row is not None:
+                    self._rows.move_to_end(rid)
+                    found[rid] = row
+            missing = list(dict.fromkeys(rid for rid in ids if rid not in found))
+            self.hits += len(ids) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fetched = self._fetch(missing)
+            found.update(fetched)
+            with self._lock:
+                self._rows.update(fetched)
+                while len(self._rows) > self.max_entries:
+                    self._rows.popitem(last=False)
+
+        results = []
+        for rid in ids:
+            row = found.get(rid)
+            if row is None:
+                results.append(None)
+                continue
+            keys = self.columns if fields is None else fields
+            place = {"id": rid}
+            place.update((k, row[k]) for k in keys)
+            results.append(place)
+        return results
+
+
+_LOOKUPS = {}
+_LOOKUP_LOCK = threading.Lock()
+
+
+def get_place_lookup(db_path):
+    """Return the shared PlaceLookup for `db_path`."""
+    key = os.path.abspath(db_path)
+    lookup = _LOOKUPS.get(key)
+    if lookup is None:
+        with _LOOKUP_LOCK:
+            lookup = _LOOKUPS.setdefault(key, PlaceLookup(key))
+    return lookup
@@ -0,0 +1,153 @@
+"""
+Columnar in-memory copy of the `places` table.
+
+`rowid`, coordinates and rating are held in contiguous NumPy arrays, and titles
+and parsed category tags in position-aligned lists, so suggestion scorers can
+work on whole candidate sets at once instead of looping row by row.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ChatSystem.category_index import CategoryIndex, load_vocabulary
+from ChatSystem.db_pool import get_pool
+
+EARTH_RADIUS_M = 6371000
+MAX_CACHED_MASKS = 256
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters; accepts scalars or NumPy arrays."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def normalize_text(s) -> str:
+    """Lowercase, keep ASCII letters/digits, drop pure-number tokens."""
+    if s is None:
+        return ""
+    s = str(s).lower()
+    s = re.sub(r"[^0-9a-z]+", " ", s)
+    parts = [p for p in s.split() if p and not p.isdigit()]
+    return " ".join(parts)
+
+
+def parse_category_tags(cat_value):
+    """Split a comma-separated `categories` value into lowercase tags."""
+    if not cat_value:
+        return []
+    parts = [p.strip().lower() for p in str(cat_value).split(",")]
+    return [p for p in parts if p]
+
+
+class PlaceStore:
+    """Position-aligned columns for every row of `places`."""
+
+    def __init__(self, rowids, lats, lngs, ratings, titles, categories):
+        self.rowids = np.asarray(rowids, dtype=np.int64)
+        self.lat = np.asarray([np.nan if v is None else v for v in lats], dtype=np.float64)
+        self.lng = np.asarray([np.nan if v is None else v for v in lngs], dtype=np.float64)
+        self.rating = np.asarray([np.nan if v is None else v for v in ratings], dtype=np.float64)
+        # Scorers treat a missing or zero rating as 1.
+        self.rating_or_one = np.where(np.isnan(self.rating) | (self.rating == 0), 1.0, self.rating)
+        self.titles = list(titles)
+        self.norm_titles = [normalize_text(t) for t in self.titles]
+        self.categories = [c or "" for c in categories]
+        self._categories_lower = [c.lower() for c in self.categories]
+        self.category_tags = [parse_category_tags(c) for c in self.categories]
+        self.category_index = CategoryIndex(self.category_tags, load_vocabulary())
+        self._pos = {int(rid): i for i, rid in enumerate(self.rowids)}
+        self._masks = OrderedDict()
+        self._mask_lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db_path):
+        rows = get_pool(db_path).fetchall(
+            "SELECT rowid, location_lat, location_lng, rating, title, categories FROM places"
+        )
+        columns = list(zip(*rows)) if rows else [[]] * 6
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.rowids)
+
+    def position(self, rowid):
+        """Return the array position of `rowid`, or None if unknown."""
+        return self._pos.get(rowid)
+
+    def positions(self, rowids):
+        """Array positions for the known `rowids` (unknown IDs are dropped)."""
+        found = [self._pos[r] for r in rowids if r in self._pos]
+        return np.asarray(found, dtype=np.int64)
+
+    def coords(self, rowid):
+        """Return (lat, lng) for `rowid`, or None if unknown or missing coordinates."""
+        pos = self._pos.get(rowid)
+        if pos is None or np.isnan(self.lat[pos]) or np.isnan(self.lng[pos]):
+            return None
+        return (float(self.lat[pos]), float(self.lng[pos]))
+
+    def distances_from(self, lat, lng, positions):
+        return haversine_m(lat, lng, self.lat[positions], self.lng[positions])
+
+    def _cached_mask(self, key, build):
+        with self._mask_lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = build()
+        with self._mask_lock:
+            self._masks[key] = mask
+            while len(self._masks) > MAX_CACHED_MASKS:
+                self._masks.popitem(last=False)
+        return mask
+
+    def allowed_mask(self, allowed_set):
+        """Boolean mask of places with at least one tag in `allowed_set` (any tag if empty)."""
+        allowed = frozenset(allowed_set)
+
+        def _build():
+            if not allowed:
+                return self.category_index.tagged
+            return self.category_index.to_mask(self.category_index.positions_for(allowed))
+        return self._cached_mask(("allowed", allowed), _build)
+
+    def category_like_mask(self, category):
+        """Boolean mask equivalent to `categories LIKE '%category%'`."""
+        needle = str(category).lower()
+
+        def _build():
+            # Needles spanning a tag separator (or padded with spaces) can only be
+            # answered against the raw string; everything else uses the posting lists.
+            if not needle.strip() or "," in needle or needle != needle.strip():
+                return np.fromiter((needle in c for c in self._categories_lower), dtype=bool, count=len(self))
+            return self.category_index.to_mask(self.category_index.like_positions(needle))
+        return self._cached_mask(("like", needle), _build)
+
+
+_STORES = {}
+_STORE_LOCK = threading.Lock()
+
+
+def get_place_store(db_path):
+    """Return the process-wide PlaceStore for `db_path`, reloading it if the file changed."""
+    mtime = os.path.getmtime(db_path)
+    cached = _STORES.get(db_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _STORE_LOCK:
+        cached = _STORES.get(db_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        store = PlaceStore.from_db(db_path)
+        _STORES[db_path] = (mtime, store)
+        return store
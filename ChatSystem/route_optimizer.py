@@ -0,0 +1,169 @@
+"""
+Visiting-order optimization for a trip.
+
+A route is an open path that starts at a fixed origin (node 0, the trip's
+start coordinate) and visits every stop once. `optimize_order` returns the
+stop order with the shortest total great-circle length:
+
+- up to HELD_KARP_MAX stops, exactly, with the Held–Karp dynamic program
+  (O(2^n · n^2) work, vectorized over the predecessor with NumPy);
+- beyond that, a nearest-neighbour tour improved by 2-opt (segment
+  reversal) and Or-opt (moving runs of 1–3 stops) until no move helps.
+
+Pairwise distances come from `distance_matrix`, which keeps recently used
+matrices in a small LRU keyed by the coordinates, so re-optimizing or
+re-measuring the same stops does not recompute them.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ChatSystem.place_store import haversine_m
+
+HELD_KARP_MAX = 12
+MAX_CACHED_MATRICES = 128
+# Improvements smaller than this (meters) are treated as no improvement.
+EPSILON_M = 1e-6
+
+_matrices = OrderedDict()
+_matrices_lock = threading.Lock()
+
+
+def distance_matrix(points):
+    """Pairwise haversine distances (meters) between (lat, lng) points, LRU-cached."""
+    key = tuple((float(lat), float(lng)) for lat, lng in points)
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is not None:
+            _matrices.move_to_end(key)
+            return matrix
+    coords = np.asarray(key, dtype=np.float64).reshape(-1, 2)
+    matrix = haversine_m(coords[:, None, 0], coords[:, None, 1], coords[None, :, 0], coords[None, :, 1])
+    matrix.setflags(write=False)
+    with _matrices_lock:
+        _matrices[key] = matrix
+        while len(_matrices) > MAX_CACHED_MATRICES:
+            _matrices.popitem(last=False)
+    return matrix
+
+
+def path_length(dist, order):
+    """Length of the open path 0 -> order[0] -> order[1] -> ..."""
+    path = [0] + list(order)
+    return float(sum(dist[a, b] for a, b in zip(path, path[1:])))
+
+
+def held_karp(dist):
+    """Exact shortest open path from node 0 through nodes 1..n-1."""
+    n = dist.shape[0] - 1
+    if n <= 1:
+        return list(range(1, n + 1))
+    stops = dist[1:, 1:]
+    full = 1 << n
+    # cost[mask, j]: shortest path from the origin through `mask`, ending at stop j
+    cost = np.full((full, n), np.inf)
+    parent = np.full((full, n), -1, dtype=np.int64)
+    bits = 1 << np.arange(n)
+    cost[bits, np.arange(n)] = dist[0, 1:]
+    for mask in range(1, full):
+        ends = np.nonzero(mask & bits)[0]
+        if ends.size < 2:
+            continue
+        prev = mask ^ bits[ends]
+        # candidates[e, i]: reach stop i covering mask minus ends[e], then go i -> ends[e]
+        candidates = cost[prev] + stops[:, ends].T
+        best = np.argmin(candidates, axis=1)
+        cost[mask, ends] = candidates[np.arange(ends.size), best]
+        parent[mask, ends] = best
+
+    mask, last = full - 1, int(np.argmin(cost[full - 1]))
+    order = []
+    while last >= 0:
+        order.append(last + 1)
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    return order[::-1]
+
+
+def nearest_neighbour(dist):
+    n = dist.shape[0]
+    order, current = [], 0
+    remaining = set(range(1, n))
+    while remaining:
+        current = min(remaining, key=lambda j: (dist[current, j], j))
+        order.append(current)
+        remaining.remove(current)
+    return order
+
+
+def two_opt(dist, order):
+    """Reverse segments while that shortens the path. Returns (order, improved)."""
+    path = [0] + list(order)
+    improved_any = False
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(path) - 1):
+            for k in range(i + 1, len(path)):
+                a, b, c = path[i - 1], path[i], path[k]
+                old_tail = dist[c, path[k + 1]] if k + 1 < len(path) else 0.0
+                new_tail = dist[b, path[k + 1]] if k + 1 < len(path) else 0.0
+                delta = dist[a, c] + new_tail - dist[a, b] - old_tail
+                if delta < -EPSILON_M:
+                    path[i:k + 1] = path[i:k + 1][::-1]
+                    improved = improved_any = True
+    return path[1:], improved_any
+
+
+def or_opt(dist, order, max_run=3):
+    """Move runs of up to `max_run` consecutive stops elsewhere while that shortens the path."""
+    path = [0] + list(order)
+    improved_any = False
+    improved = True
+    while improved:
+        improved = False
+        for run in range(1, max_run + 1):
+            for i in range(1, len(path) - run + 1):
+                j = i + run - 1
+                prev_node = path[i - 1]
+                next_node = path[j + 1] if j + 1 < len(path) else None
+                removed_gain = dist[prev_node, path[i]] - (dist[prev_node, next_node] if next_node is not None else 0.0)
+                if next_node is not None:
+                    removed_gain += dist[path[j], next_node]
+                segment = path[i:j + 1]
+                rest = path[:i] + path[j + 1:]
+                best_delta, best_at = -EPSILON_M, None
+                for at in range(1, len(rest) + 1):
+                    if at == i:
+                        continue
+                    left = rest[at - 1]
+                    right = rest[at] if at < len(rest) else None
+                    added = dist[left, segment[0]] + (dist[segment[-1], right] - dist[left, right] if right is not None else 0.0)
+                    delta = added - removed_gain
+                    if delta < best_delta:
+                        best_delta, best_at = delta, at
+                if best_at is not None:
+                    path = rest[:best_at] + segment + rest[best_at:]
+                    improved = improved_any = True
+                    break
+            if improved:
+                break
+    return path[1:], improved_any
+
+
+def local_search(dist, order=None):
+    """2-opt and Or-opt from `order` (nearest neighbour by default) until neither improves it."""
+    order = nearest_neighbour(dist) if order is None else list(order)
+    while True:
+        order, reversed_any = two_opt(dist, order)
+        order, moved_any = or_opt(dist, order)
+        if not (reversed_any or moved_any):
+            return order
+
+
+def optimize_order(dist):
+    """Shortest open path from node 0 through every other node, as a list of node indices."""
+    if dist.shape[0] - 1 <= HELD_KARP_MAX:
+        return held_karp(dist)
+    return local_search(dist)
@@ -0,0 +1,335 @@
+"""
+Server-side chat sessions.
+
+Clients used to send the whole chat history with every request, and each
+request rebuilt a `TOOL` from it. Sessions keep the live `TOOL` in an
+in-memory LRU keyed by session ID, so a request only carries the ID plus
+whatever changed (start coordinate, sequence, new input).
+
+Sessions expire after SESSION_TTL idle seconds. With a persistent backend
+configured, each session's snapshot (`TOOL.snapshot()`) is also written there
+after every use. A session evicted from memory, or created by another worker
+process, is then rebuilt from that snapshot on its next request. The backend
+is anything with Redis' `get` / `set(ex=...)` / `delete`. Use SESSION_REDIS_URL
+for Redis (requires the `redis` package), or SESSION_DB for the local SQLite
+stand-in `SQLiteKV`.
+
+`request_tool` / `request_tool_async` resolve the `TOOL` for one API request
+(from `session_id`, or rebuilt from `history` without one) and are shared by
+the Flask app and the ASGI app.
+
+Configuration:
+    SESSION_MAX        sessions kept in memory (default 1000)
+    SESSION_TTL        idle seconds before a session expires (default 21600)
+    SESSION_DB         SQLite file for the persistent tier
+    SESSION_REDIS_URL  Redis URL for the persistent tier
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from ChatSystem.TOOL import TOOL
+
+KEY_PREFIX = "session:"
+
+
+class SessionNotFound(KeyError):
+    """Unknown or expired session ID."""
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class SQLiteKV:
+    """Local stand-in for the subset of the Redis API the session store uses."""
+
+    def __init__(self, path, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= self.clock():
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        expires_at = self.clock() + ex if ex else None
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                               (key, value, expires_at))
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class _Session:
+    __slots__ = ("tool", "expires_at", "lock")
+
+    def __init__(self, tool, expires_at):
+        self.tool = tool
+        self.expires_at = expires_at
+        # Held for the whole request: two turns of one session never interleave.
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """LRU of live `TOOL` objects with idle expiry and an optional persistent backend."""
+
+    def __init__(self, max_sessions=1000, ttl_seconds=6 * 3600, backend=None,
+                 clock=time.time, tool_factory=TOOL):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.clock = clock
+        self.tool_factory = tool_factory
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.restores = 0
+        self.evictions = 0
+
+    def _build(self, snapshot=None):
+        tool = self.tool_factory()
+        if snapshot:
+            tool.load(snapshot)
+        return tool
+
+    def _persist(self, session_id, tool):
+        if self.backend is not None:
+            self.backend.set(KEY_PREFIX + session_id, json.dumps(tool.snapshot(), ensure_ascii=False),
+                             ex=int(self.ttl_seconds))
+
+    def _load_persisted(self, session_id):
+        if self.backend is None:
+            return None
+        raw = self.backend.get(KEY_PREFIX + session_id)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    def _insert(self, session_id, tool):
+        """
+        Add a session under the store lock, evicting expired and least recently used ones.
+        Sessions whose lock is held are mid-turn and never evicted; if every session is
+        busy the store briefly grows past `max_sessions` instead.
+        """
+        now = self.clock()
+        idle = [k for k, s in self._sessions.items() if not s.lock.locked()]
+        for key in [k for k in idle if self._sessions[k].expires_at <= now]:
+            del self._sessions[key]
+        excess = len(self._sessions) - self.max_sessions + 1
+        for key in [k for k in idle if k in self._sessions][:max(excess, 0)]:
+            del self._sessions[key]
+            self.evictions += 1
+        session = _Session(tool, now + self.ttl_seconds)
+        self._sessions[session_id] = session
+        return session
+
+    def create(self, snapshot=None):
+        """New session, optionally seeded from a `TOOL.snapshot()`-shaped dict. Returns its ID."""
+        session_id = new_session_id()
+        tool = self._build(snapshot)
+        with self._lock:
+            self._insert(session_id, tool)
+        self._persist(session_id, tool)
+        return session_id
+
+    def _get_session(self, session_id, snapshot=None):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.expires_at > self.clock():
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+                return session
+            self._sessions.pop(session_id, None)
+
+        # Rebuild outside the store lock: loading a long history touches SQLite.
+        persisted = self._load_persisted(session_id)
+        if persisted is None and snapshot is None:
+            raise SessionNotFound(f"Unknown or expired session: {session_id}")
+        tool = self._build(persisted if persisted is not None else snapshot)
+        with self._lock:
+            # Another request may have restored it meanwhile; keep the first one.
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._insert(session_id, tool)
+                self.restores += 1
+            return session
+
+    def _discard(self, session_id, session):
+        """
+        Drop a session whose turn failed part-way, so the next request reloads the last
+        persisted state instead of the half-updated `TOOL`. Without a backend the live
+        object is the only copy and is kept.
+        """
+        if self.backend is None:
+            return
+        with self._lock:
+            if self._sessions.get(session_id) is session:
+                del self._sessions[session_id]
+
+    @contextmanager
+    def session(self, session_id, snapshot=None):
+        """
+        Lock a session and yield its `TOOL`. State changes are persisted when the
+        block exits without an error; on an error they are discarded. If the session
+        is unknown and `snapshot` is given, the session is recreated from it;
+        otherwise SessionNotFound is raised.
+        """
+        session = self._get_session(session_id, snapshot)
+        with session.lock:
+            try:
+                yield session.tool
+            except BaseException:
+                self._discard(session_id, session)
+                raise
+            session.expires_at = self.clock() + self.ttl_seconds
+            self._persist(session_id, session.tool)
+
+    @asynccontextmanager
+    async def session_async(self, session_id, snapshot=None):
+        """`session` for coroutines: restoring, locking and persisting run in worker threads."""
+        session = await asyncio.to_thread(self._get_session, session_id, snapshot)
+        acquire = asyncio.ensure_future(asyncio.to_thread(session.lock.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread still takes the lock; hand it back as soon as it does.
+            acquire.add_done_callback(lambda _: session.lock.release())
+            raise
+        try:
+            try:
+                yield session.tool
+            except BaseException:
+                self._discard(session_id, session)
+                raise
+            session.expires_at = self.clock() + self.ttl_seconds
+            await asyncio.to_thread(self._persist, session_id, session.tool)
+        finally:
+            session.lock.release()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend is not None:
+            self.backend.delete(KEY_PREFIX + session_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "hits": self.hits,
+                "restores": self.restores,
+                "evictions": self.evictions,
+                "backend": type(self.backend).__name__ if self.backend is not None else None,
+            }
+
+
+def _backend_from_env():
+    redis_url = os.getenv('SESSION_REDIS_URL')
+    if redis_url:
+        if redis is None:
+            raise RuntimeError("SESSION_REDIS_URL is set but the redis package is not installed")
+        return redis.Redis.from_url(redis_url)
+    db_path = os.getenv('SESSION_DB')
+    if db_path:
+        return SQLiteKV(db_path)
+    return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide SessionStore configured from the SESSION_* environment variables."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore(
+                    max_sessions=int(os.getenv('SESSION_MAX', 1000)),
+                    ttl_seconds=float(os.getenv('SESSION_TTL', 6 * 3600)),
+                    backend=_backend_from_env(),
+                )
+    return _store
+
+
+def json_param(value):
+    """A request field that may arrive JSON-encoded (query strings, form posts)."""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def apply_deltas(tool, data):
+    """Apply the `start_coordinate` / `sequence` sent with a session request, if any."""
+    if 'start_coordinate' not in data and 'sequence' not in data:
+        return
+    start_coordinate = json_param(data.get('start_coordinate', tool.get_start_coordinate()))
+    sequence = json_param(data.get('sequence', tool.get_sequence()))
+    tool.sequence.load_sequence(start_coordinate, sequence)
+
+
+def _history_tool(history):
+    tool = TOOL()
+    tool.load(history)
+    return tool
+
+
+@contextmanager
+def request_tool(data):
+    """
+    TOOL for a request. With `session_id` the stored session is used (plus any
+    `start_coordinate` / `sequence` deltas); `history`, if also sent, only
+    recreates an expired session. Without `session_id` the TOOL is rebuilt from
+    `history` as before.
+    """
+    history = json_param(data.get('history', {}))
+    session_id = data.get('session_id')
+    if session_id:
+        with get_session_store().session(session_id, snapshot=history or None) as tool:
+            apply_deltas(tool, data)
+            yield tool
+    else:
+        yield _history_tool(history)
+
+
+@asynccontextmanager
+async def request_tool_async(data):
+    """`request_tool` for coroutines; SQLite work (restoring, replaying history) runs in worker threads."""
+    history = json_param(data.get('history', {}))
+    session_id = data.get('session_id')
+    if session_id:
+        async with get_session_store().session_async(session_id, snapshot=history or None) as tool:
+            await asyncio.to_thread(apply_deltas, tool, data)
+            yield tool
+    else:
+        yield await asyncio.to_thread(_history_tool, history)
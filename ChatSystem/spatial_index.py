@@ -0,0 +1,215 @@
+"""
+In-memory spatial index over `places` coordinates.
+
+Places are bucketed into a fixed lat/lng grid once per process so that
+k-nearest and radius queries only touch the cells around the anchor instead of
+evaluating the great-circle expression for every row in SQLite. The grid stores
+positions into a PlaceStore, and distances are computed per batch of cells with
+NumPy.
+"""
+
+import math
+import os
+import threading
+
+import numpy as np
+
+from ChatSystem.place_store import EARTH_RADIUS_M, get_place_store, haversine_m
+
+METERS_PER_DEG_LAT = math.pi * EARTH_RADIUS_M / 180.0
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class SpatialIndex:
+    """Uniform grid of PlaceStore positions keyed by (lat cell, lng cell)."""
+
+    def __init__(self, store, cell_deg=0.01):
+        self.store = store
+        self.cell_deg = cell_deg
+        self.cells = {}
+        self.bbox = None
+        valid = np.nonzero(~(np.isnan(store.lat) | np.isnan(store.lng)))[0]
+        if valid.size:
+            lats, lngs = store.lat[valid], store.lng[valid]
+            self.bbox = (float(lats.min()), float(lngs.min()), float(lats.max()), float(lngs.max()))
+            ci = np.floor(store.lat[valid] / cell_deg).astype(np.int64)
+            cj = np.floor(store.lng[valid] / cell_deg).astype(np.int64)
+            keys, inverse = np.unique(np.stack([ci, cj], axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind="stable")
+            groups = np.split(valid[order], np.cumsum(np.bincount(inverse))[:-1])
+            self.cells = {(int(i), int(j)): g for (i, j), g in zip(keys, groups)}
+
+    def __len__(self):
+        return len(self.store)
+
+    def _cell_of(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _ring_bound_m(self, lat, ring):
+        """Lower bound (meters) on the distance from (lat, ·) to any cell outside `ring`."""
+        if ring <= 0:
+            return 0.0
+        span_deg = ring * self.cell_deg
+        # Longitude degrees shrink toward the poles; use the widest latitude the ring can reach.
+        far_lat = min(90.0, abs(lat) + span_deg + self.cell_deg)
+        return span_deg * METERS_PER_DEG_LAT * max(0.0, math.cos(math.radians(far_lat)))
+
+    def _ring_cells(self, ci, cj, ring):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for di in range(-ring, ring + 1):
+            yield (ci + di, cj - ring)
+            yield (ci + di, cj + ring)
+        for dj in range(-ring + 1, ring):
+            yield (ci - ring, cj + dj)
+            yield (ci + ring, cj + dj)
+
+    def _rings(self, ci, cj):
+        """Yield (ring, occupied cells) outward from cell (ci, cj)."""
+        max_ring = max(max(abs(i - ci), abs(j - cj)) for i, j in self.cells)
+        ring = 0
+        # Walk the grid while rings are small; sparse outer rings are cheaper
+        # to enumerate from the occupied cells directly.
+        while ring <= max_ring and (2 * ring + 1) ** 2 <= len(self.cells):
+            yield ring, [c for c in self._ring_cells(ci, cj, ring) if c in self.cells]
+            ring += 1
+        if ring > max_ring:
+            return
+        by_ring = {}
+        for cell in self.cells:
+            r = max(abs(cell[0] - ci), abs(cell[1] - cj))
+            if r >= ring:
+                by_ring.setdefault(r, []).append(cell)
+        for r in sorted(by_ring):
+            yield r, by_ring[r]
+
+    def _filter(self, positions, exclude_pos, mask):
+        if mask is not None:
+            positions = positions[mask[positions]]
+        if exclude_pos.size and positions.size:
+            positions = positions[~np.isin(positions, exclude_pos)]
+        return positions
+
+    def _ordered(self, dists, positions, k=None):
+        order = np.lexsort((self.store.rowids[positions], dists))
+        if k is not None:
+            order = order[:k]
+        return dists[order], positions[order]
+
+    def nearest(self, lat, lng, k, exclude=(), mask=None):
+        """Return (distances_m, positions) of up to `k` places closest to (lat, lng), nearest first.
+
+        `exclude` is a collection of rowids to skip; `mask` is an optional boolean
+        array over store positions that candidates must satisfy.
+        """
+        if k <= 0 or not self.cells:
+            return np.empty(0), _EMPTY
+        exclude_pos = self.store.positions(exclude) if exclude else _EMPTY
+
+        dist_parts, pos_parts = [], []
+        found = 0
+        ci, cj = self._cell_of(lat, lng)
+        for ring, cells in self._rings(ci, cj):
+            if found >= k:
+                kth = np.partition(np.concatenate(dist_parts), k - 1)[k - 1]
+                if kth <= self._ring_bound_m(lat, ring - 1):
+                    break
+            if not cells:
+                continue
+            cand = self._filter(np.concatenate([self.cells[c] for c in cells]), exclude_pos, mask)
+            if cand.size:
+                dist_parts.append(self.store.distances_from(lat, lng, cand))
+                pos_parts.append(cand)
+                found += cand.size
+
+        if not found:
+            return np.empty(0), _EMPTY
+        return self._ordered(np.concatenate(dist_parts), np.concatenate(pos_parts), k)
+
+    def within_radius(self, lat, lng, radius_m, mask=None):
+        """Return (distances_m, positions) of all places within `radius_m` of (lat, lng), nearest first."""
+        if radius_m < 0 or not self.cells:
+            return np.empty(0), _EMPTY
+        dlat = radius_m / METERS_PER_DEG_LAT
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlng = radius_m / (METERS_PER_DEG_LAT * cos_lat) if cos_lat > 0 else 360.0
+        return self.within_box(lat - dlat, lng - dlng, lat + dlat, lng + dlng,
+                               origin=(lat, lng), radius_m=radius_m, mask=mask)
+
+    def within_box(self, lat0, lng0, lat1, lng1, origin, radius_m=None, mask=None):
+        """Places inside a lat/lng box, ordered by distance from `origin` (optionally capped)."""
+        i0, j0 = self._cell_of(lat0, lng0)
+        i1, j1 = self._cell_of(lat1, lng1)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            cells = [c for c in self.cells if i0 <= c[0] <= i1 and j0 <= c[1] <= j1]
+        else:
+            cells = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.cells]
+        if not cells:
+            return np.empty(0), _EMPTY
+
+        cand = self._filter(np.concatenate([self.cells[c] for c in cells]), _EMPTY, mask)
+        dists = self.store.distances_from(origin[0], origin[1], cand)
+        if radius_m is not None:
+            keep = dists < radius_m
+            cand, dists = cand[keep], dists[keep]
+        return self._ordered(dists, cand)
+
+    def _max_distance_from(self, lat, lng):
+        """Upper bound (meters) on the distance from (lat, lng) to any indexed place."""
+        lat0, lng0, lat1, lng1 = self.bbox
+        corners = haversine_m(lat, lng, np.array([lat0, lat0, lat1, lat1]), np.array([lng0, lng1, lng0, lng1]))
+        # Corner distances can undercut edge midpoints on a sphere; pad by one cell.
+        return float(corners.max()) + self.cell_deg * METERS_PER_DEG_LAT
+
+    def within_ellipse(self, a_lat, a_lng, b_lat, b_lng, min_count, exclude=(), mask=None):
+        """Return (detour_m, positions) of places p with small d(a, p) + d(p, b), smallest first.
+
+        Candidates lie inside an ellipse with foci a and b. The allowed slack over
+        d(a, b) starts at max(500 m, d(a, b) / 4) and doubles until at least
+        `min_count` places qualify or the search circle covers every indexed place.
+        """
+        if min_count <= 0 or not self.cells:
+            return np.empty(0), _EMPTY
+        exclude_pos = self.store.positions(exclude) if exclude else _EMPTY
+        d_ab = float(haversine_m(a_lat, a_lng, b_lat, b_lng))
+        mid_lat, mid_lng = (a_lat + b_lat) / 2.0, (a_lng + b_lng) / 2.0
+        d_mid = float(haversine_m(mid_lat, mid_lng, a_lat, a_lng) + haversine_m(mid_lat, mid_lng, b_lat, b_lng))
+        extent = self._max_distance_from(mid_lat, mid_lng)
+
+        slack = max(500.0, 0.25 * d_ab)
+        while True:
+            budget = d_ab + slack
+            # Triangle inequality: d(mid, p) <= (d(mid, a) + d(mid, b) + budget) / 2 inside the ellipse.
+            radius = (d_mid + budget) / 2.0
+            _, cand = self.within_radius(mid_lat, mid_lng, radius + 1.0, mask=mask)
+            cand = self._filter(cand, exclude_pos, None)
+            detour = self.store.distances_from(a_lat, a_lng, cand) + self.store.distances_from(b_lat, b_lng, cand)
+            if radius >= extent:
+                # Every place is in range; rank them all rather than growing further.
+                return self._ordered(detour, cand)
+            keep = detour <= budget
+            if keep.sum() >= min_count:
+                return self._ordered(detour[keep], cand[keep])
+            slack *= 2.0
+
+
+_INDEXES = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def get_spatial_index(db_path):
+    """Return the process-wide SpatialIndex for `db_path`, rebuilding it if the file changed."""
+    store = get_place_store(db_path)
+    cached = _INDEXES.get(db_path)
+    if cached and cached.store is store:
+        return cached
+    with _INDEX_LOCK:
+        cached = _INDEXES.get(db_path)
+        if cached and cached.store is store:
+            return cached
+        index = SpatialIndex(store)
+        _INDEXES[db_path] = index
+        return index
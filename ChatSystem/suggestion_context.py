@@ -0,0 +1,160 @@
+"""
+Per-request memoizing view of a LocationSequence.
+
+Building one bot response used to run the same geo queries several times:
+`BotResponse.enhance_suggestions` asks for the "next" suggestions and one per
+collected category, and subclasses such as `Bot_suggest_attractions` or
+`Bot_ask_destination` then ask again. A `SuggestionContext` is created once
+per `ChatBox.process_input` and passed to the responses in place of the
+LocationSequence. Each distinct query runs once, and IDs, names and coordinates
+are shared by every response built in that request.
+
+Suggestion queries are computed at least `width` results wide (normally the
+collected `limit`), and smaller requests take the head of that ranking, so a
+`limit=1` follow-up and the main `limit=5` answer share one query.
+
+`start_prefetch` runs the queries a response is likely to need (next stops,
+one per collected category, the itinerary for the current limit and categories) on a worker
+thread while the LLM extraction is in flight. A response that asks for a key
+being prefetched waits for it instead of running it twice.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Set SPECULATIVE_PREFETCH=0 to disable prefetching.
+PREFETCH_ENABLED = os.getenv('SPECULATIVE_PREFETCH', '1') != '0'
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=int(os.getenv('PREFETCH_WORKERS', 4)),
+                                    thread_name_prefix='prefetch')
+
+
+def _mix_key(categories):
+    """Hashable form of an itinerary category mix."""
+    if not categories:
+        return None
+    if isinstance(categories, dict):
+        return tuple(categories.items())
+    if isinstance(categories, str):
+        return (categories,)
+    return tuple(categories)
+
+
+class SuggestionContext:
+    """Memoizing proxy for the read-only LocationSequence queries used by responses."""
+
+    def __init__(self, location_sequence, width=5):
+        self.location_sequence = location_sequence
+        try:
+            self.width = max(1, int(width))
+        except (TypeError, ValueError):
+            self.width = 5
+        self._suggestions = {}
+        self._searches = {}
+        self._itineraries = {}
+        self._names = {}
+        self.queries = 0
+        self.prefetched = set()
+        self.prefetch_hits = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __getattr__(self, name):
+        # Anything not memoized here (sequence edits, start coordinate, ...) goes straight through.
+        if name == "location_sequence":
+            raise AttributeError(name)
+        return getattr(self.location_sequence, name)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, key, speculative):
+        with self._lock:
+            self.queries += 1
+            if speculative:
+                self.prefetched.add(key)
+
+    def _reused(self, key, speculative):
+        if not speculative and key in self.prefetched:
+            with self._lock:
+                self.prefetch_hits += 1
+
+    def suggest_for_position(self, pos=-1, category=None, limit=5, _speculative=False):
+        key = ("position", pos, category)
+        with self._key_lock(key):
+            cached = self._suggestions.get(key)
+            if cached is None or (cached[0] < limit and len(cached[1]) >= cached[0]):
+                width = max(limit, self.width)
+                self._count(key, _speculative)
+                cached = (width, self.location_sequence.suggest_for_position(pos=pos, category=category, limit=width))
+                self._suggestions[key] = cached
+            else:
+                self._reused(key, _speculative)
+        return list(cached[1][:limit])
+
+    def search_by_name(self, name, exact=True, limit=10):
+        key = ("search", name, exact, limit)
+        with self._key_lock(key):
+            if key not in self._searches:
+                self._count(key, False)
+                self._searches[key] = self.location_sequence.search_by_name(name, exact, limit)
+        return list(self._searches[key])
+
+    def suggest_itinerary_to_sequence(self, limit=10, categories=None, ordered=False, _speculative=False):
+        key = ("itinerary", limit, _mix_key(categories), ordered)
+        with self._key_lock(key):
+            if key not in self._itineraries:
+                self._count(key, _speculative)
+                self._itineraries[key] = self.location_sequence.suggest_itinerary_to_sequence(
+                    limit, categories=categories, ordered=ordered)
+            else:
+                self._reused(key, _speculative)
+        return list(self._itineraries[key])
+
+    def prefetch(self, collected_information):
+        """Run the queries a response to `collected_information` will probably make. Errors are ignored."""
+        collected_information = dict(collected_information or {})
+        categories = collected_information.get('categories') or []
+        if not isinstance(categories, list):
+            categories = [categories]
+        limit = collected_information.get('limit') or 5
+        jobs = [lambda: self.suggest_for_position(_speculative=True)]
+        jobs += [lambda c=c: self.suggest_for_position(category=c, limit=1, _speculative=True) for c in categories]
+        jobs.append(lambda: self.suggest_itinerary_to_sequence(limit, categories=categories or None, _speculative=True))
+        for job in jobs:
+            try:
+                # Warm the names too; the responses quote them in suggestions.
+                self.names(job())
+            except Exception:
+                # Speculative: the real query reports the error if the response needs it.
+                pass
+
+    def start_prefetch(self, collected_information):
+        """Start `prefetch` on the shared worker pool; returns its Future (None if disabled)."""
+        if not PREFETCH_ENABLED:
+            return None
+        return _PREFETCH_POOL.submit(self.prefetch, collected_information)
+
+    def id_to_name(self, place_id):
+        return self.names([place_id])[0]
+
+    def names(self, place_ids):
+        """Names for `place_ids` in order (None for unknown IDs); unseen IDs are fetched in one batch."""
+        missing = [pid for pid in dict.fromkeys(place_ids) if pid not in self._names]
+        if missing:
+            places = self.location_sequence.ids_to_places(missing, fields=("title",))
+            for pid, place in zip(missing, places):
+                self._names[pid] = place["title"] if place else None
+        return [self._names[pid] for pid in place_ids]
+
+    def ids_to_places(self, ids, fields=None):
+        places = self.location_sequence.ids_to_places(ids, fields=fields)
+        if fields is None or "title" in fields:
+            for pid, place in zip(ids, places):
+                self._names[pid] = place["title"] if place else None
+        return places
+
+    def coords(self, place_id):
+        """(lat, lng) for `place_id` from the in-memory place store, or None."""
+        return self.location_sequence._spatial_index().store.coords(place_id)
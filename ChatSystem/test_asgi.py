@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem import asgi, session_store
+from ChatSystem.session_store import SessionStore
+
+
+class FakeTool:
+    """Stands in for TOOL; tracks how many turns are in flight at once."""
+    in_flight = 0
+    peak = 0
+
+    def __init__(self):
+        self.inputs = []
+
+    def load(self, history):
+        self.history = history
+
+    async def process_input_async(self, user_input):
+        self.inputs.append(user_input)
+        FakeTool.in_flight += 1
+        FakeTool.peak = max(FakeTool.peak, FakeTool.in_flight)
+        await asyncio.sleep(0.01)
+        FakeTool.in_flight -= 1
+        return {"message": f"echo {user_input}", "suggestions": [], "database_results": []}
+
+
+async def _call(method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    messages = [{'type': 'http.request', 'body': body[:5], 'more_body': True},
+                {'type': 'http.request', 'body': body[5:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app({'type': 'http', 'method': method, 'path': path}, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+class TestASGIApp(unittest.TestCase):
+    @patch.object(session_store, "TOOL", FakeTool)
+    def test_process_input_turns_run_concurrently(self):
+        FakeTool.peak = 0
+
+        async def many():
+            return await asyncio.gather(*(
+                _call('POST', '/api/process-input', {'input': f"hi {i}", 'history': {}}) for i in range(10)
+            ))
+
+        results = asyncio.run(many())
+        self.assertEqual([status for status, _ in results], [200] * 10)
+        self.assertEqual(results[3][1], {"success": True, "message": "Input processed successfully",
+                                         "data": {"message": "echo hi 3", "suggestions": [], "database_results": []}})
+        self.assertGreater(FakeTool.peak, 1)
+
+    def test_errors_use_the_response_template(self):
+        status, payload = asyncio.run(_call('GET', '/nope'))
+        self.assertEqual((status, payload['success'], payload['message']), (404, False, "Endpoint not found"))
+        status, payload = asyncio.run(_call('GET', '/health'))
+        self.assertEqual((status, payload['data']), (200, {"status": "healthy"}))
+        with patch.object(session_store, "TOOL", side_effect=RuntimeError("no data")):
+            status, payload = asyncio.run(_call('POST', '/api/process-input', {'input': 'x', 'history': {}}))
+        self.assertEqual((status, payload['success'], payload['message']), (200, False, "no data"))
+
+    def test_process_input_uses_the_session(self):
+        FakeTool.peak = 0
+        store = SessionStore(tool_factory=FakeTool)
+        session_id = store.create()
+
+        async def turns():
+            return await asyncio.gather(*(
+                _call('POST', '/api/process-input', {'input': f"hi {i}", 'session_id': session_id}) for i in range(3)
+            ))
+
+        with patch.object(session_store, "get_session_store", return_value=store), \
+             patch.object(session_store, "TOOL", side_effect=AssertionError("history rebuild")):
+            results = asyncio.run(turns())
+            status, unknown = asyncio.run(_call('POST', '/api/process-input', {'input': 'x', 'session_id': 'nope'}))
+        self.assertTrue(all(payload['success'] for _, payload in results))
+        self.assertEqual(results[0][1]['data']['session_id'], session_id)
+        with store.session(session_id) as tool:
+            self.assertEqual(sorted(tool.inputs), ["hi 0", "hi 1", "hi 2"])
+        # Turns of one session run one at a time
+        self.assertEqual(FakeTool.peak, 1)
+        self.assertFalse(unknown['success'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.category_index import CategoryIndex, load_vocabulary
+from ChatSystem.place_store import PlaceStore, parse_category_tags
+
+CATEGORIES = [
+    "Cafe, Coffee shop",
+    "museum, history",
+    "",
+    None,
+    "restaurant, vietnamese, pho",
+    "coffee roasters",
+    "Park",
+    "bar, cocktail bar",
+]
+
+
+def _store():
+    n = len(CATEGORIES)
+    return PlaceStore(range(1, n + 1), [10.7] * n, [106.6] * n, [4.0] * n, [f"P{i}" for i in range(n)], CATEGORIES)
+
+
+class TestCategoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.store = _store()
+
+    def test_like_mask_matches_substring_scan(self):
+        for needle in ["cafe", "COFFEE", "bar", "viet", "his", "zoo", ", pho", "e, c", " bar"]:
+            expected = [needle.lower() in (c or "").lower() for c in CATEGORIES]
+            got = self.store.category_like_mask(needle)
+            self.assertEqual(got.tolist(), expected, needle)
+
+    def test_allowed_mask_matches_tag_check(self):
+        for allowed in [set(), {"park"}, {"coffee shop", "pho"}, {"missing"}]:
+            expected = [
+                bool(tags) and (not allowed or any(t in allowed for t in tags))
+                for tags in map(parse_category_tags, CATEGORIES)
+            ]
+            self.assertEqual(self.store.allowed_mask(allowed).tolist(), expected, allowed)
+
+    def test_posting_union_is_sorted_and_unique(self):
+        index = CategoryIndex([["a", "b"], ["b"], [], ["a"]])
+        np.testing.assert_array_equal(index.positions_for(["a", "b", "zzz"]), [0, 1, 3])
+        np.testing.assert_array_equal(index.like_positions("a"), [0, 3])
+
+    def test_vocabulary_covers_location_sequence_categories(self):
+        from ChatSystem.location_sequence import LocationSequence
+        self.assertTrue(set(LocationSequence.categories) <= set(load_vocabulary()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import category_variants, orchestrator
+from ChatSystem.util.category_variants import (
+    VARIANTS_PATH, add_typo_variants, build_variant_index, load_categories, load_matcher, write_variant_index,
+)
+
+
+class TestCategoryVariants(unittest.TestCase):
+    def test_shipped_index_matches_categories_txt(self):
+        with open(VARIANTS_PATH, encoding='utf-8') as f:
+            data = json.load(f)
+        categories, digest = load_categories()
+        self.assertEqual(data['categories_sha256'], digest)
+        self.assertEqual(data['variants'], build_variant_index(categories))
+        # Typos are generated at load time rather than shipped
+        self.assertNotIn("musuem", data['variants'])
+        self.assertEqual(category_variants.get_matcher().variants["musuem"], "museum")
+
+    def test_variants_map_to_canonical_categories(self):
+        match = category_variants.match_category
+        cases = {
+            "Museums": "museum", "galleries": "gallery", "bảo tàng": "museum", "bao tang": "museum",
+            "coffee shops": "cafe", "quán cà phê đẹp": "cafe", "restaurent": "restaurant",
+            "musuem": "museum", "seafood restaurant": "restaurant", "Pagodas": "temple", "café": "cafe",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(match(text), expected, text)
+        self.assertIsNone(match("xyz"))
+
+    def test_typos_never_shadow_other_categories(self):
+        variants = add_typo_variants(build_variant_index(["bar", "bark", "park"]), ["bar", "bark", "park"])
+        self.assertEqual(variants["bark"], "bark")
+        self.assertEqual(variants["park"], "park")
+
+    def test_stale_index_is_rebuilt_in_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            categories_path = os.path.join(tmp, 'categories.txt')
+            variants_path = os.path.join(tmp, 'variants.json')
+            with open(categories_path, 'w', encoding='utf-8') as f:
+                f.write("museum,park")
+            write_variant_index(variants_path, categories_path)
+            with open(categories_path, 'w', encoding='utf-8') as f:
+                f.write("museum,park,zoo")
+            self.assertEqual(load_matcher(variants_path, categories_path).match("sở thú"), "zoo")
+
+    @patch.object(orchestrator, "translate", side_effect=AssertionError("network call"))
+    def test_orchestrator_matching_is_offline(self, _):
+        self.assertEqual(orchestrator._find_best_category_match("Art Galleries", ["art", "gallery"]), "gallery")
+        self.assertIsNone(orchestrator._find_best_category_match("museums", ["park"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
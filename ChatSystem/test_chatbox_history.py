@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem import suggestion_context
+from ChatSystem.ChatBox import ChatBox
+from ChatSystem.history_manager import HistoryManager
+from ChatSystem.test_suggestion_context import _make_sequence_mock
+
+
+def _saved_history(turns):
+    responses = []
+    for i in range(turns):
+        responses.append({"whom": "user", "message": f"question {i}", "suggestions": [],
+                          "database_results": [], "message_en": f"question {i}"})
+        responses.append({"whom": "bot", "message": f"answer {i}", "suggestions": [f"follow-up {i}"],
+                          "database_results": [i, i + 1], "message_en": f"answer {i}"})
+    return {"responses": responses,
+            "collected_information": {"destination": None, "categories": ["museum"], "limit": 3}}
+
+
+class TestHistoryHydration(unittest.TestCase):
+    def test_load_runs_no_queries(self):
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        chat.load_chatbox(_saved_history(30))
+        self.assertEqual(seq.method_calls, [])
+        self.assertEqual(len(chat.message_history) + chat.history.summarized_messages, 60)
+
+    def test_save_round_trips_loaded_history(self):
+        saved = _saved_history(3)
+        chat = ChatBox(_make_sequence_mock())
+        chat.load_chatbox(saved)
+        self.assertEqual(chat.save_chatbox(), saved)
+        self.assertEqual(chat.response_history[-1].get_json_serializable(),
+                         {"message": "answer 2", "suggestions": ["follow-up 2"], "database_results": [2, 3]})
+        # Bot entries carry the chips they offered, for the next turn's fast path
+        self.assertEqual(chat.message_history[-1]["suggestions"], ["follow-up 2"])
+
+    def test_greeting_queries_categories_on_first_read(self):
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        seq.get_suggest_category.assert_not_called()
+        self.assertEqual(chat.response_history[0].get_database_results(), ["cafe"])
+
+
+class TestHistoryWindow(unittest.TestCase):
+    def make_chat(self, max_messages=6):
+        seq = _make_sequence_mock()
+        seq.get_sequence = lambda: [1]
+        chat = ChatBox(seq)
+        chat.history = HistoryManager(seq, max_messages=max_messages)
+        return chat
+
+    def test_old_messages_fold_into_summary(self):
+        chat = self.make_chat()
+        chat.load_chatbox(_saved_history(5))
+        self.assertEqual([m["message"] for m in chat.message_history][:2], ["question 2", "answer 2"])
+        self.assertEqual(len(chat.response_history), 6)
+        saved = chat.save_chatbox()
+        self.assertEqual(len(saved["responses"]), 6)
+        self.assertEqual(saved["summary"], {"summarized_messages": 4,
+                                            "confirmed_places": [1], "rejected_places": [0, 2],
+                                            "offered_places": [0, 1, 2]})
+
+    def test_summary_survives_save_and_load(self):
+        chat = self.make_chat()
+        chat.load_chatbox(_saved_history(5))
+        saved = chat.save_chatbox()
+        other = self.make_chat()
+        other.load_chatbox(saved)
+        self.assertEqual(other.save_chatbox(), saved)
+        self.assertEqual(other.history._offered_places, [0, 1, 2])
+
+    @patch.object(suggestion_context, "PREFETCH_ENABLED", False)
+    def test_only_the_window_is_passed_on(self):
+        chat = self.make_chat(max_messages=20)
+        chat.load_chatbox(_saved_history(8))
+        output = {"function": "ask_clarify", "text": "Where to?"}
+        with patch("ChatSystem.ChatBox.process_user_input", return_value=output) as process:
+            chat.process_input("and then?")
+        history = process.call_args[0][2]
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history[-1]["message"], "and then?")
+        self.assertIsNone(process.call_args.kwargs["history_summary"])
+
+    @patch.object(suggestion_context, "PREFETCH_ENABLED", False)
+    def test_summary_is_passed_on_with_place_names(self):
+        chat = self.make_chat()
+        chat.load_chatbox(_saved_history(3))
+        output = {"function": "ask_clarify", "text": "Where to?"}
+        with patch("ChatSystem.ChatBox.process_user_input", return_value=output) as process:
+            chat.process_input("and then?")
+        self.assertEqual(process.call_args.kwargs["history_summary"],
+                         {"summarized_messages": 1, "confirmed_places": [], "rejected_places": []})
+        with patch("ChatSystem.ChatBox.process_user_input", return_value=output) as process:
+            chat.process_input("and after that?")
+        self.assertEqual(process.call_args.kwargs["history_summary"],
+                         {"summarized_messages": 3, "confirmed_places": ["Place 1"], "rejected_places": ["Place 0"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
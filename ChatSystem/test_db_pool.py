@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.db_pool import ConnectionPool
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'places.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE places (title TEXT)")
+            conn.executemany("INSERT INTO places (title) VALUES (?)", [("a",), ("b",)])
+        self.pool = ConnectionPool(self.db_path)
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmp.cleanup()
+
+    def test_connection_reused_within_thread(self):
+        first = self.pool.acquire()
+        for _ in range(5):
+            self.assertIs(self.pool.acquire(), first)
+        stats = self.pool.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 5)
+        self.assertEqual(stats["open_connections"], 1)
+
+    def test_each_thread_gets_its_own_connection(self):
+        seen = []
+        main_conn = self.pool.acquire()
+        worker = threading.Thread(target=lambda: seen.append(self.pool.acquire()))
+        worker.start()
+        worker.join()
+        self.assertIsNot(seen[0], main_conn)
+        self.assertEqual(self.pool.stats()["open_connections"], 2)
+
+    def test_connections_are_read_only(self):
+        self.assertEqual(self.pool.fetchone("SELECT COUNT(*) FROM places")[0], 2)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.pool.execute("INSERT INTO places (title) VALUES ('c')")
+
+    def test_rows_support_name_and_index_access(self):
+        row = self.pool.fetchone("SELECT rowid, title FROM places ORDER BY rowid")
+        self.assertEqual(row[1], row["title"])
+
+    def test_counters_add_up_across_threads(self):
+        def work():
+            for _ in range(200):
+                self.pool.fetchone("SELECT COUNT(*) FROM places")
+
+        workers = [threading.Thread(target=work) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stats = self.pool.stats()
+        self.assertEqual(stats["queries"], 1600)
+        self.assertEqual((stats["misses"], stats["hits"]), (8, 1592))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import orchestrator
+from ChatSystem.util.fast_path import FAST_PATH_THRESHOLD, classify
+from ChatSystem.util.UserInputProcessing import _format_llm_response
+
+
+def _top(result):
+    intent = result['intents'][0]
+    return intent['suggested_function'], intent['slots']
+
+
+COUNT_QUESTION = [{'role': 'user', 'message': 'I want to explore District 1'},
+                  {'role': 'bot', 'message': 'Please tell me how many places you would like to visit.'}]
+
+
+class TestFastPath(unittest.TestCase):
+    def test_bare_number_is_limit_update(self):
+        for text in ("5", " 5 ", "just 5 places is enough"):
+            result = classify(text, {}, COUNT_QUESTION)
+            self.assertGreaterEqual(result['confidence'], FAST_PATH_THRESHOLD)
+            self.assertEqual(_top(result), ('itinerary_planning', {'destination': None, 'categories': [], 'limit': 5}))
+
+    def test_number_updates_the_request_it_answers(self):
+        history = [{'role': 'bot', 'message': 'How many cafes should I show?'}]
+        result = classify("3", {'categories': ['cafe']}, history)
+        self.assertEqual(_top(result), ('suggest_attractions', {'destination': None, 'categories': ['cafe'], 'limit': 3}))
+
+    def test_number_without_count_question_escalates(self):
+        for history in (None, [{'role': 'bot', 'message': 'Here are some museums near you.'}]):
+            self.assertLess(classify("5", {}, history)['confidence'], FAST_PATH_THRESHOLD)
+
+    def test_tell_me_about_needs_an_offered_suggestion(self):
+        function, slots = _top(classify("tell me about cafes near here"))
+        self.assertEqual((function, slots['categories']), ('suggest_attractions', ['cafe']))
+        history = [{'role': 'bot', 'message': 'Here you go', 'suggestions': ['Tell me about Nhà Thờ Đức Bà']}]
+        function, slots = _top(classify("Tell me about Nhà Thờ Đức Bà", {}, history))
+        self.assertEqual((function, slots['destination']), ('search_by_name', 'Nhà Thờ Đức Bà'))
+
+    def test_compound_categories(self):
+        for text, category in (("hot pot near me", 'hot pot'), ("any ice cream around here", 'ice cream')):
+            result = classify(text)
+            self.assertGreaterEqual(result['confidence'], FAST_PATH_THRESHOLD)
+            self.assertEqual(_top(result), ('suggest_attractions', {'destination': None, 'categories': [category], 'limit': None}))
+
+    def test_chips_and_place_templates(self):
+        self.assertEqual(_top(classify("Help me plan my trip"))[0], 'itinerary_planning')
+        function, slots = _top(classify("Looks like Chợ Bến Thành is on my route. What's worth knowing about it?"))
+        self.assertEqual((function, slots['destination']), ('search_by_name', 'Chợ Bến Thành'))
+        function, slots = _top(classify("Show me other locations in categories: cafe, park"))
+        self.assertEqual((function, slots['categories']), ('suggest_attractions', ['cafe', 'park']))
+
+    def test_category_near_me(self):
+        result = classify("any good cafes near me?")
+        self.assertGreaterEqual(result['confidence'], FAST_PATH_THRESHOLD)
+        self.assertEqual(_top(result), ('suggest_attractions', {'destination': None, 'categories': ['cafe'], 'limit': None}))
+
+    def test_named_places_escalate(self):
+        for text in ("I want to visit the War Remnants Museum", "Find Starbucks Coffee near Ben Thanh",
+                     "show me Saigon Zoo and Botanical Garden", "find starbucks coffee near ben thanh"):
+            self.assertLess(classify(text)['confidence'], FAST_PATH_THRESHOLD, text)
+
+    def test_ambiguous_turns_escalate(self):
+        for text in ("Plan a 2 day trip with museums and temples", "actually change that to parks",
+                     "book a hotel room", "tell me more about the history of saigon", "I love it"):
+            self.assertLess(classify(text)['confidence'], FAST_PATH_THRESHOLD, text)
+
+    def test_output_formats_like_llm_result(self):
+        formatted = _format_llm_response(classify("Show me museums"))
+        self.assertEqual(formatted['function'], 'suggest_attractions')
+        self.assertEqual(formatted['all_slots']['categories'], ['museum'])
+
+    @patch.object(orchestrator, "extract_information_single_pass")
+    def test_orchestrator_skips_llm_for_confident_turns(self, llm_mock):
+        result = orchestrator.extract_info_with_orchestrator("3", {'limit': 5}, COUNT_QUESTION)
+        llm_mock.assert_not_called()
+        self.assertEqual(result['intents'][0]['slots']['limit'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.fts_index import build_fts_index, fts_search, sidecar_path
+from ChatSystem.location_sequence import LocationSequence
+
+ROWS = [
+    (1, "Chợ Bến Thành", "Lê Lợi, Quận 1", "Market", "", 10.772, 106.698, 4.3),
+    (2, "Phở Hòa Pasteur", "260C Pasteur, Quận 3", "Vietnamese restaurant", "pho, noodle", 10.789, 106.689, 4.4),
+    (3, "Bảo tàng Chứng tích Chiến tranh", "28 Võ Văn Tần", "Museum", "", 10.779, 106.692, 4.6),
+    (4, "Ben Thanh Street Food", "26 Thủ Khoa Huân", "Food court", "street food", 10.773, 106.697, 4.1),
+    (5, "Highlands Coffee", "Nguyễn Huệ", "Cafe", "coffee", 10.774, 106.703, 4.0),
+]
+
+
+class TestFtsIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'places.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE places (title TEXT, address TEXT, categories TEXT, categoryname TEXT, "
+                "cuisine_tags TEXT, location_lat REAL, location_lng REAL, rating REAL)"
+            )
+            conn.executemany(
+                "INSERT INTO places (rowid, title, address, categoryname, cuisine_tags, "
+                "location_lat, location_lng, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ROWS,
+            )
+        self.patcher = patch.object(LocationSequence, "RESULT_DIR", self.tmp.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_missing_index_returns_none(self):
+        self.assertIsNone(fts_search(self.db_path, "ben thanh"))
+
+    def test_diacritics_are_folded_and_title_ranks_first(self):
+        build_fts_index(self.db_path)
+        self.assertEqual(fts_search(self.db_path, "Ben Thanh", limit=5), [1, 4])
+        self.assertEqual(fts_search(self.db_path, "pho"), [2])
+        self.assertEqual(fts_search(self.db_path, "Bến Thành", limit=5, exclude={1}), [4])
+
+    def test_any_term_matches_follow_all_term_matches(self):
+        build_fts_index(self.db_path)
+        hits = fts_search(self.db_path, "coffee pasteur", limit=5)
+        self.assertEqual(sorted(hits), [2, 5])
+
+    def test_stale_index_is_ignored(self):
+        build_fts_index(self.db_path)
+        later = time.time() + 10
+        os.utime(self.db_path, (later, later))
+        self.assertIsNone(fts_search(self.db_path, "ben thanh"))
+        self.assertTrue(os.path.exists(sidecar_path(self.db_path)))
+
+    def test_search_by_name_fts_backend(self):
+        build_fts_index(self.db_path)
+        seq = LocationSequence()
+        seq.load_sequence([], [4])
+        ids = seq.search_by_name("ben thanh", exact=False, limit=3, backend="fts")
+        self.assertEqual(ids[0], 1)
+        self.assertEqual(len(ids), 3)
+        self.assertNotIn(4, ids)
+        with self.assertRaises(ValueError):
+            seq.search_by_name("ben thanh", backend="bogus")
+
+
+if __name__ == "__main__":
+    unittest.main()
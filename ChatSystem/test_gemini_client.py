@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import orchestrator
+from ChatSystem.util.orchestrator import GeminiClient, GeminiError
+
+EXTRACTION = {'intents': [{'intent': 'suggest_attractions', 'slots': {'categories': ['museum']}}], 'followup': False}
+
+
+def _gemini_body(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    """Serves queued (status, body) replies and records each request."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append((self.path, self.client_address[1], payload))
+        status, body = self.server.replies.pop(0) if self.server.replies else (200, _gemini_body('[]'))
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGeminiClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGemini)
+        self.server.requests, self.server.replies = [], []
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.sleeps = []
+        self.client = GeminiClient(api_key='test-key', base_url=f"http://127.0.0.1:{self.server.server_port}/v1beta",
+                                   max_retries=2, sleep=self.sleeps.append)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_reuse_one_connection(self):
+        for _ in range(3):
+            self.client.generate({'contents': []})
+        paths = {path for path, _, _ in self.server.requests}
+        self.assertEqual(paths, {'/v1beta/models/gemini-2.5-flash:generateContent?key=test-key'})
+        self.assertEqual(len({port for _, port, _ in self.server.requests}), 1)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        self.server.replies = [(503, {}), (429, {}), (200, _gemini_body('ok'))]
+        self.assertEqual(self.client.generate({})['candidates'][0]['content']['parts'][0]['text'], 'ok')
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(all(0 <= s <= self.client.backoff_max for s in self.sleeps))
+
+    def test_client_errors_and_exhausted_retries_raise(self):
+        self.server.replies = [(400, {})]
+        with self.assertRaises(GeminiError) as ctx:
+            self.client.generate({})
+        self.assertEqual(ctx.exception.response.status_code, 400)
+        self.server.replies = [(500, {})]
+        with self.assertRaises(GeminiError):
+            self.client.generate({}, max_retries=0)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retries_stop_at_the_deadline(self):
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        def clock():
+            now[0] += 1.0  # every attempt takes a second
+            return now[0]
+
+        self.client.sleep, self.client.clock = sleep, clock
+        self.server.replies = [(503, {})] * 3
+        with self.assertRaises(GeminiError):
+            self.client.generate({}, deadline=1.5)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_negative_retries_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.client.generate({}, max_retries=-1)
+        with self.assertRaises(ValueError):
+            GeminiClient(api_key='test-key', max_retries=-1)
+        self.assertEqual(self.server.requests, [])
+
+    def test_async_calls_retry_and_run_concurrently(self):
+        self.server.replies = [(503, {})]
+
+        async def many():
+            try:
+                return await asyncio.gather(*(self.client.generate_async({'n': i}) for i in range(5)))
+            finally:
+                await self.client.aclose()
+
+        results = asyncio.run(many())
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_one_async_client_per_event_loop(self):
+        async def client_of_loop(close=False):
+            first = self.client._get_async_client()
+            await self.client.generate_async({})
+            self.assertIs(self.client._get_async_client(), first)
+            if close:
+                await self.client.aclose()
+            return first
+
+        async def on_other_loop():
+            # A second loop running in another thread must not replace this loop's client
+            mine = await client_of_loop()
+            other = await asyncio.to_thread(asyncio.run, client_of_loop(close=True))
+            self.assertIsNot(other, mine)
+            self.assertIs(self.client._get_async_client(), mine)
+            await self.client.aclose()
+            self.assertNotIn(asyncio.get_running_loop(), self.client._async_clients)
+
+        asyncio.run(on_other_loop())
+
+    def test_extraction_against_stub(self):
+        self.server.replies = [(200, _gemini_body(json.dumps(EXTRACTION)))]
+        with patch.object(orchestrator, "get_gemini_client", return_value=self.client):
+            result = orchestrator.extract_information_single_pass("show me museums")
+        self.assertEqual(result['intents'][0]['slots']['categories'], ['museum'])
+        self.assertIn('USER QUERY: "show me museums"', self.server.requests[0][2]['contents'][0]['parts'][0]['text'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.itinerary_planner import (
+    CandidateGraph, _Route, _extend, beam_search, category_slots, plan_category_itineraries, plan_itineraries,
+)
+from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.test_spatial_index import _random_places, _store_of, _write_places_db
+from ChatSystem.util.Response import Bot_create_itinerary
+
+
+def _route_cost(graph, nodes):
+    """Total cost of a route under the planner's own hop costs."""
+    route = _Route(0.0, [], frozenset([0]), {})
+    for node in nodes:
+        cost = graph.hop_costs(route, np.array([node]))[0]
+        route = _extend(graph, route, node, float(cost))
+    return route.cost
+
+
+class TestBeamSearch(unittest.TestCase):
+    def setUp(self):
+        self.store = _store_of(_random_places(400, seed=11))
+        self.graph = CandidateGraph(self.store, np.arange(120), (10.77, 106.67))
+
+    def test_routes_are_distinct_and_never_revisit(self):
+        routes = beam_search(self.graph, 6, k=3)
+        self.assertEqual(len(routes), 3)
+        self.assertEqual(len({frozenset(r) for r in routes}), 3)
+        for route in routes:
+            self.assertEqual(len(route), 6)
+            self.assertEqual(len(set(route)), 6)
+            self.assertNotIn(0, route)
+
+    def test_alternatives_are_ordered_by_cost(self):
+        costs = [_route_cost(self.graph, r) for r in beam_search(self.graph, 6, k=3)]
+        self.assertEqual(costs, sorted(costs))
+
+    def test_wider_beam_is_no_worse_than_greedy(self):
+        greedy = beam_search(self.graph, 8, beam_width=1, branching=1)[0]
+        beam = beam_search(self.graph, 8)[0]
+        self.assertLessEqual(_route_cost(self.graph, beam), _route_cost(self.graph, greedy) + 1e-6)
+
+    def test_small_pool_returns_what_fits(self):
+        routes = plan_itineraries(self.store, np.arange(3), (10.77, 106.67), limit=5)
+        self.assertEqual(sorted(len(r) for r in routes), [3])
+
+
+class TestCategoryItineraries(unittest.TestCase):
+    def setUp(self):
+        self.places = _random_places(400, seed=5)
+        self.store = _store_of(self.places)
+        self.groups = {c: np.nonzero(self.store.category_like_mask(c))[0][:40] for c in ("museum", "cafe", "park")}
+
+    def _categories(self, route):
+        return [self.store.categories[p] for p in route]
+
+    def test_category_slots(self):
+        self.assertEqual(category_slots(["museum", "cafe", "park"], 5), ["museum", "cafe", "park", "museum", "cafe"])
+        self.assertEqual(category_slots(["museum", "cafe"], 1), ["museum"])
+        self.assertEqual(category_slots({"museum": 2, "cafe": 1}, 9), ["museum", "museum", "cafe"])
+        self.assertEqual(category_slots({"museum": 2, "cafe": 1}, 2), ["museum", "museum"])
+
+    def test_ordered_mix_follows_slots(self):
+        slots = ["museum", "cafe", "park", "cafe"]
+        for route in plan_category_itineraries(self.store, self.groups, (10.77, 106.67), slots=slots, ordered=True, k=3):
+            for slot, categories in zip(slots, self._categories(route)):
+                self.assertIn(slot, categories)
+
+    def test_unordered_mix_meets_counts(self):
+        slots = ["museum", "museum", "cafe", "park"]
+        routes = plan_category_itineraries(self.store, self.groups, (10.77, 106.67), slots=slots, k=3)
+        self.assertTrue(routes)
+        for route in routes:
+            self.assertEqual(len(set(route)), 4)
+            matched = Counter(next(c for c in ("museum", "cafe", "park") if c in cats) for cats in self._categories(route))
+            self.assertEqual(matched, Counter(slots))
+
+    def test_categories_without_places_are_skipped(self):
+        groups = dict(self.groups, zoo=np.empty(0, dtype=np.int64))
+        route = plan_category_itineraries(self.store, groups, (10.77, 106.67), slots=["zoo", "cafe"])[0]
+        self.assertEqual(len(route), 1)
+
+    def test_empty_categories_fall_back_to_any_place(self):
+        groups = dict(self.groups, zoo=np.empty(0, dtype=np.int64))
+        fallback = np.arange(60)
+        for ordered in (False, True):
+            route = plan_category_itineraries(self.store, groups, (10.77, 106.67), slots=["zoo", "cafe", "zoo"],
+                                              ordered=ordered, fallback_pool=fallback)[0]
+            self.assertEqual(len(set(route)), 3)
+            self.assertTrue(any("cafe" in cats for cats in self._categories(route)))
+        route = plan_category_itineraries(self.store, groups, (10.77, 106.67), slots=["zoo", "zoo"],
+                                          fallback_pool=fallback)[0]
+        self.assertEqual(len(route), 2)
+        self.assertTrue(set(route) <= set(fallback))
+
+    def test_bot_create_itinerary_passes_categories(self):
+        seq = MagicMock()
+        seq.suggest_itinerary_to_sequence.return_value = [1, 2]
+        response = Bot_create_itinerary(["museum", "cafe"], seq, 4)
+        seq.suggest_itinerary_to_sequence.assert_called_once_with(4, categories=["museum", "cafe"])
+        self.assertEqual(response.get_database_results(), [1, 2])
+        seq.reset_mock()
+        Bot_create_itinerary(None, seq, 3)
+        seq.suggest_itinerary_to_sequence.assert_called_once_with(3, categories=None)
+
+
+class TestLocationSequenceItineraries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        _write_places_db(self.tmp.name, _random_places(300))
+        self.patcher = patch.object(LocationSequence, "RESULT_DIR", self.tmp.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_alternatives_exclude_sequence(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [5, 9])
+        itineraries = seq.suggest_itineraries(limit=4, k=3)
+        self.assertEqual(len(itineraries), 3)
+        for itinerary in itineraries:
+            self.assertEqual(len(itinerary), 4)
+            self.assertFalse({5, 9} & set(itinerary))
+        self.assertEqual(seq.suggest_itinerary_to_sequence(limit=4), itineraries[0])
+
+    def test_category_mix_restricts_every_stop(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [])
+        store = seq._spatial_index().store
+        itinerary = seq.suggest_itinerary_to_sequence(limit=5, categories=["Museum", "park"])
+        self.assertEqual(len(itinerary), 5)
+        for place_id in itinerary:
+            categories = store.categories[store.position(place_id)]
+            self.assertTrue("museum" in categories or "park" in categories)
+
+    def test_category_mix_never_exceeds_limit(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [])
+        self.assertEqual(len(seq.suggest_itinerary_to_sequence(limit=2, categories=["cafe", "museum", "park", "bank"])), 2)
+        self.assertEqual(len(seq.suggest_itinerary_to_sequence(limit=2, categories={"cafe": 3, "park": 2})), 2)
+
+    def test_missing_categories_still_fill_the_route(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [])
+        self.assertEqual(len(seq.suggest_itinerary_to_sequence(limit=4, categories=["zoo"])), 4)
+        itinerary = seq.suggest_itinerary_to_sequence(limit=4, categories=["zoo", "museum"], ordered=True)
+        self.assertEqual(len(itinerary), 4)
+        store = seq._spatial_index().store
+        self.assertIn("museum", store.categories[store.position(itinerary[1])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import orchestrator
+from ChatSystem.util.llm_cache import LLMResultCache, make_key
+
+RESULT = {'intents': [{'intent': 'itinerary_planning', 'slots': {'categories': ['museum']}}], 'followup': False}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLLMResultCache(unittest.TestCase):
+    def test_key_normalizes_input_and_trims_history(self):
+        history = [{'role': 'user', 'message': str(i)} for i in range(8)]
+        self.assertEqual(make_key("Help me  plan my trip", {'limit': 5}, history),
+                         make_key("help me plan my trip ", {'limit': 5}, history[2:]))
+        self.assertNotEqual(make_key("help me plan my trip", {'limit': 5}, history),
+                            make_key("help me plan my trip", {'limit': 3}, history))
+        self.assertNotEqual(make_key("help me plan my trip", {'limit': 5}, history),
+                            make_key("help me plan my trip", {'limit': 5}, history,
+                                     history_summary={'summarized_messages': 4, 'confirmed_places': ['A']}))
+
+    def test_ttl_and_lru_eviction(self):
+        clock = FakeClock()
+        cache = LLMResultCache(max_entries=2, ttl_seconds=60, clock=clock)
+        cache.set("a", RESULT)
+        cache.set("b", RESULT)
+        cache.get("a")
+        cache.set("c", RESULT)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), RESULT)
+        clock.now += 61
+        self.assertIsNone(cache.get("a"))
+
+    def test_returned_values_are_copies(self):
+        cache = LLMResultCache()
+        cache.set("k", RESULT)
+        cache.get("k")['intents'].clear()
+        self.assertEqual(cache.get("k"), RESULT)
+
+    def test_sqlite_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'llm_cache.db')
+            LLMResultCache(db_path=db_path).set("k", RESULT)
+            self.assertEqual(LLMResultCache(db_path=db_path).get("k"), RESULT)
+
+
+class TestOrchestratorUsesCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LLMResultCache()
+        self.patcher = patch.object(orchestrator, "get_llm_cache", return_value=self.cache)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    @patch.object(orchestrator, "extract_information_single_pass", return_value=RESULT)
+    def test_repeat_turn_skips_llm(self, llm_mock):
+        for _ in range(3):
+            orchestrator.extract_info_with_orchestrator("Plan a 2 day trip with museums", {'limit': 5}, [])
+        self.assertEqual(llm_mock.call_count, 1)
+
+    @patch.object(orchestrator, "extract_information_single_pass",
+                  return_value={'intents': [], 'followup': True, 'error': 'timeout'})
+    def test_errors_are_not_cached(self, llm_mock):
+        for _ in range(2):
+            orchestrator.extract_info_with_orchestrator("Plan a 2 day trip with museums", {'limit': 5}, [])
+        self.assertEqual(llm_mock.call_count, 2)
+
+    @patch.object(orchestrator, "extract_information_single_pass", return_value=RESULT)
+    def test_sync_and_async_share_cache_entries(self, llm_mock):
+        turn = ("Plan a 2 day trip with museums", {'limit': 5}, [])
+        with patch.object(orchestrator, "extract_information_single_pass_async") as async_mock:
+            orchestrator.extract_info_with_orchestrator(*turn)
+            result = asyncio.run(orchestrator.extract_info_with_orchestrator_async(*turn))
+        async_mock.assert_not_called()
+        self.assertEqual(result, orchestrator.extract_info_with_orchestrator(*turn))
+        self.assertEqual(llm_mock.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
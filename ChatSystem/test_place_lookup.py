@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.db_pool import get_pool
+from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.place_lookup import PlaceLookup
+from ChatSystem.test_spatial_index import _random_places, _write_places_db
+
+
+class TestPlaceLookup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.places = _random_places(50)
+        self.db_path = _write_places_db(self.tmp.name, self.places)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batch_preserves_order_and_marks_unknown_ids(self):
+        lookup = PlaceLookup(self.db_path)
+        got = lookup.get([7, 999, 3, 7], fields=["title", "rating"])
+        self.assertEqual([p["title"] if p else None for p in got], ["Place 7", None, "Place 3", "Place 7"])
+        self.assertEqual(set(got[0]), {"id", "title", "rating"})
+        self.assertIn("location_lat", lookup.get([1])[0])
+
+    def test_one_query_per_batch_and_cache_hits(self):
+        lookup = PlaceLookup(self.db_path)
+        pool = get_pool(self.db_path)
+        lookup.get([1])
+        before = pool.queries
+        lookup.get(list(range(1, 40)))
+        self.assertEqual(pool.queries - before, 1)
+        before = pool.queries
+        lookup.get([5, 10], fields=["title"])
+        self.assertEqual(pool.queries, before)
+        self.assertEqual(lookup.hits, 2 + 1)
+
+    def test_lru_bound_and_unknown_fields(self):
+        lookup = PlaceLookup(self.db_path, max_entries=10)
+        lookup.get(list(range(1, 30)))
+        self.assertEqual(len(lookup._rows), 10)
+        with self.assertRaises(ValueError):
+            lookup.get([1], fields=["nope"])
+
+    def test_counters_add_up_across_threads(self):
+        lookup = PlaceLookup(self.db_path)
+        lookup.get(list(range(1, 11)))
+
+        def work():
+            for _ in range(200):
+                lookup.get(list(range(1, 11)))
+
+        workers = [threading.Thread(target=work) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual((lookup.misses, lookup.hits), (10, 16000))
+
+    def test_location_sequence_uses_lookup(self):
+        with patch.object(LocationSequence, "RESULT_DIR", self.tmp.name):
+            seq = LocationSequence()
+            self.assertEqual(seq.id_to_name(4), "Place 4")
+            self.assertIsNone(seq.id_to_name(1000))
+            seq.load_sequence([], [2, 1000])
+            self.assertEqual(str(seq), "LocationSequence: [2: Place 2, 1000: [Not Found]]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem import suggestion_context
+from ChatSystem.ChatBox import ChatBox
+from ChatSystem.test_suggestion_context import _make_sequence_mock
+from ChatSystem.util.Response import Bot_ask_clarify
+
+OUTPUT = {
+    "function": "suggest_attractions",
+    "params": {"category": "museum", "location": "District 1", "limit": 3},
+    "all_slots": {"categories": ["museum"], "limit": 3},
+}
+
+
+class TestLazySuggestions(unittest.TestCase):
+    def test_suggestions_use_collected_info_at_construction(self):
+        seq = _make_sequence_mock()
+        collected = {"destination": None, "categories": ["park"], "limit": 5}
+        response = Bot_ask_clarify("Which one?", location_sequence=seq, collected_information=collected)
+        seq.suggest_for_position.assert_not_called()
+        collected["categories"] = ["zoo"]
+        response.get_suggestions()
+        seq.suggest_for_position.assert_any_call(category="park", limit=1)
+        calls = seq.suggest_for_position.call_count
+        response.get_suggestions()
+        self.assertEqual(seq.suggest_for_position.call_count, calls)
+
+    def test_assigned_suggestions_replace_pending_ones(self):
+        seq = _make_sequence_mock()
+        response = Bot_ask_clarify("?", location_sequence=seq, collected_information={"categories": ["park"]})
+        response.suggestions = ["saved"]
+        self.assertEqual(response.get_suggestions(), ["saved"])
+        seq.suggest_for_position.assert_not_called()
+
+
+@patch.object(suggestion_context, "PREFETCH_ENABLED", False)
+class TestSuggestionsResolvedPerTurn(unittest.TestCase):
+    @patch("ChatSystem.ChatBox.process_user_input", return_value=OUTPUT)
+    def test_saved_suggestions_ignore_later_sequence_changes(self, _):
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        chat.response_history[0].get_suggestions()  # the greeting, as shown to the user
+        chat.process_input("show me museums")  # suggestions not read by the caller
+        calls = seq.suggest_for_position.call_count
+
+        seq.sequence = [100, 101]
+        seq.suggest_for_position.side_effect = lambda pos=-1, category=None, limit=5: list(range(500, 500 + limit))
+        saved = chat.save_chatbox()["responses"][-1]
+        self.assertEqual(seq.suggest_for_position.call_count, calls)
+        self.assertFalse(any("Place 5" in suggestion for suggestion in saved["suggestions"]))
+
+    @patch("ChatSystem.ChatBox.process_user_input_async")
+    def test_async_turn_serializes_without_queries(self, process):
+        async def extract(*args, **kwargs):
+            return OUTPUT
+        process.side_effect = extract
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        bot_response = asyncio.run(chat.process_input_async("show me museums"))
+        calls = (seq.suggest_for_position.call_count, seq.ids_to_places.call_count)
+        bot_response.get_json_serializable()
+        self.assertEqual((seq.suggest_for_position.call_count, seq.ids_to_places.call_count), calls)
+
+
+@patch.object(suggestion_context, "PREFETCH_ENABLED", False)
+class TestProcessInputStream(unittest.TestCase):
+    @patch("ChatSystem.ChatBox.process_user_input", return_value=OUTPUT)
+    def test_events_arrive_in_stages(self, _):
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        seq.suggest_for_position.reset_mock()
+
+        stream = chat.process_input_stream("show me museums")
+        self.assertEqual(next(stream), ("acknowledged", {"input": "show me museums"}))
+        self.assertEqual(next(stream)[0], "intent")
+        event, data = next(stream)
+        self.assertEqual((event, data["database_results"]), ("database_results", [100, 101, 102]))
+        # Only the attraction query has run; suggestion queries wait for the next stage
+        self.assertEqual(seq.suggest_for_position.call_count, 1)
+        event, data = next(stream)
+        self.assertEqual(event, "suggestions")
+        self.assertEqual(seq.suggest_for_position.call_count, 2)
+        event, data = next(stream)
+        self.assertEqual(event, "done")
+        self.assertEqual(set(data), {"message", "suggestions", "database_results"})
+        self.assertEqual(chat.collected_information["categories"], ["museum"])
+        self.assertEqual(chat.message_history[-1]["role"], "bot")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import category_variants, prompt_builder, prompt_config
+from ChatSystem.util.prompt_builder import ExtractionPrompt
+
+NEW_EXAMPLES = {'general': [{'input': 'brand new example', 'output': {'intents': []}}]}
+
+
+class TestExtractionPrompt(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmp.name, 'prompt_config.py')
+        with open(self.config_path, 'w') as f:
+            f.write("# stand-in\n")
+        os.utime(self.config_path, (1000, 1000))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_is_prefix_plus_dynamic_tail(self):
+        prompt = ExtractionPrompt(self.config_path)
+        history = [{'role': 'user', 'message': f"msg {i}"} for i in range(8)]
+        text = prompt.render("show me parks", {'limit': 3}, history)
+        self.assertTrue(text.startswith(prompt.prefix))
+        self.assertIn('COLLECTED INFO:\n{"limit": 3}', text)
+        self.assertIn("RECENT CONVERSATION (last 5 messages):\nuser: msg 3\n", text)
+        self.assertNotIn("msg 2", text)
+        self.assertTrue(text.endswith('USER QUERY: "show me parks"\n'))
+
+    def test_render_includes_earlier_conversation_summary(self):
+        prompt = ExtractionPrompt(self.config_path)
+        summary = {'summarized_messages': 12, 'confirmed_places': ['Ben Thanh Market'], 'rejected_places': []}
+        text = prompt.render("what next?", {'limit': 3}, [], history_summary=summary)
+        self.assertIn("EARLIER IN CONVERSATION (12 older messages):\nPlaces added to the trip: Ben Thanh Market\n", text)
+        self.assertNotIn("Places offered but not added", text)
+        self.assertNotIn("EARLIER IN CONVERSATION", prompt.render("what next?", {'limit': 3}, []))
+
+    def test_prefix_rebuilt_when_config_changes(self):
+        prompt = ExtractionPrompt(self.config_path)
+        with patch.object(prompt_builder.importlib, "reload") as reload_mock, \
+                patch.object(prompt_config, "FEW_SHOT_EXAMPLES", NEW_EXAMPLES):
+            self.assertNotIn("brand new example", prompt.prefix)
+            reload_mock.assert_not_called()
+            os.utime(self.config_path, (2000, 2000))
+            self.assertIn("brand new example", prompt.prefix)
+            reload_mock.assert_called_once_with(prompt_config)
+
+    def test_category_vocabulary_reloads_on_change(self):
+        categories_path = os.path.join(self.tmp.name, 'categories.txt')
+        with open(categories_path, 'w', encoding='utf-8') as f:
+            f.write("museum,park")
+        with patch.object(category_variants, "CATEGORIES_PATH", categories_path), \
+                patch.object(category_variants, "MATCHER", category_variants.MATCHER), \
+                patch.object(category_variants, "_matcher_mtime", None):
+            self.assertEqual(category_variants.valid_categories(), ["museum", "park"])
+            with open(categories_path, 'w', encoding='utf-8') as f:
+                f.write("museum,park,zoo")
+            os.utime(categories_path, (3000, 3000))
+            self.assertEqual(category_variants.match_category("zoos"), "zoo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import itertools
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem import route_optimizer
+from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.route_optimizer import distance_matrix, held_karp, local_search, optimize_order, path_length
+from ChatSystem.test_spatial_index import _random_places, _write_places_db
+
+
+def _points(n, seed=3):
+    rng = random.Random(seed)
+    return [(10.70 + rng.random() * 0.15, 106.60 + rng.random() * 0.15) for _ in range(n + 1)]
+
+
+def _brute_force(dist):
+    n = dist.shape[0] - 1
+    return min(path_length(dist, order) for order in itertools.permutations(range(1, n + 1)))
+
+
+class TestRouteOptimizer(unittest.TestCase):
+    def test_held_karp_is_optimal(self):
+        for n in range(1, 8):
+            dist = distance_matrix(_points(n, seed=n))
+            order = held_karp(dist)
+            self.assertEqual(sorted(order), list(range(1, n + 1)))
+            self.assertAlmostEqual(path_length(dist, order), _brute_force(dist), places=6)
+
+    def test_local_search_visits_every_stop_and_beats_input_order(self):
+        dist = distance_matrix(_points(30))
+        order = local_search(dist)
+        self.assertEqual(sorted(order), list(range(1, 31)))
+        self.assertLess(path_length(dist, order), path_length(dist, range(1, 31)))
+
+    def test_large_inputs_use_local_search(self):
+        dist = distance_matrix(_points(route_optimizer.HELD_KARP_MAX + 1))
+        with patch.object(route_optimizer, "held_karp") as exact:
+            optimize_order(dist)
+        exact.assert_not_called()
+
+    def test_distance_matrix_is_cached(self):
+        points = _points(5)
+        self.assertIs(distance_matrix(points), distance_matrix(list(points)))
+
+
+class TestLocationSequenceOptimizeOrder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        _write_places_db(self.tmp.name, _random_places(50))
+        self.patcher = patch.object(LocationSequence, "RESULT_DIR", self.tmp.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_optimize_order_shortens_route(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [3, 17, 8, 42, 25, 11, 30, 9999])
+        before = seq.route_length()
+        order = seq.optimize_order()
+        self.assertEqual(order[-1], 9999)  # unknown place stays at the end
+        self.assertEqual(sorted(order), sorted(seq.get_sequence()))
+        self.assertLessEqual(seq.route_length(order), before)
+        seq.optimize_order(apply=True)
+        self.assertEqual(seq.get_sequence(), order)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.session_store import SessionNotFound, SessionStore, SQLiteKV
+
+SNAPSHOT = {
+    "history": {"responses": [{"whom": "user", "message": "hello", "suggestions": [], "database_results": []}]},
+    "start_coordinate": [10.77, 106.69],
+    "sequence": [1, 2],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTool:
+    """Stands in for TOOL: just the load/snapshot contract, no database."""
+    built = 0
+
+    def __init__(self):
+        FakeTool.built += 1
+        self.state = {"history": {"responses": None}, "start_coordinate": [], "sequence": []}
+
+    def load(self, snapshot):
+        self.state = {k: snapshot[k] for k in ("history", "start_coordinate", "sequence")}
+
+    def snapshot(self):
+        return dict(self.state)
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        FakeTool.built = 0
+        self.clock = FakeClock()
+
+    def make_store(self, **kwargs):
+        kwargs.setdefault("max_sessions", 10)
+        kwargs.setdefault("ttl_seconds", 60)
+        return SessionStore(clock=self.clock, tool_factory=FakeTool, **kwargs)
+
+    def test_session_reuses_live_tool(self):
+        store = self.make_store()
+        session_id = store.create(SNAPSHOT)
+        with store.session(session_id) as first:
+            first.state["sequence"] = [1, 2, 3]
+        with store.session(session_id) as second:
+            self.assertIs(second, first)
+            self.assertEqual(second.snapshot()["sequence"], [1, 2, 3])
+        self.assertEqual(FakeTool.built, 1)
+        self.assertEqual(store.stats()["hits"], 2)
+
+    def test_idle_sessions_expire(self):
+        store = self.make_store()
+        session_id = store.create()
+        self.clock.now += 61
+        with self.assertRaises(SessionNotFound):
+            with store.session(session_id):
+                pass
+
+    def test_expired_session_recreated_from_snapshot(self):
+        store = self.make_store()
+        session_id = store.create()
+        self.clock.now += 61
+        with store.session(session_id, snapshot=SNAPSHOT) as tool:
+            self.assertEqual(tool.snapshot()["sequence"], [1, 2])
+
+    def test_lru_eviction(self):
+        store = self.make_store(max_sessions=2)
+        a, b = store.create(), store.create()
+        with store.session(a):
+            pass
+        store.create()
+        with self.assertRaises(SessionNotFound):
+            with store.session(b):
+                pass
+        with store.session(a):
+            pass
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_eviction_skips_sessions_mid_turn(self):
+        store = self.make_store(max_sessions=2)
+        a, b = store.create(), store.create()
+        with store.session(a) as tool:
+            with store.session(b):
+                pass
+            store.create()  # `a` is least recently used but busy, so `b` goes
+        with store.session(a) as again:
+            self.assertIs(again, tool)
+        with self.assertRaises(SessionNotFound):
+            with store.session(b):
+                pass
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_backend_restores_evicted_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteKV(os.path.join(tmp, "sessions.db"), clock=self.clock)
+            session_id = self.make_store(backend=backend).create(SNAPSHOT)
+
+            # A fresh store (another worker, or after a restart) sees the same session.
+            other = self.make_store(backend=SQLiteKV(os.path.join(tmp, "sessions.db"), clock=self.clock))
+            with other.session(session_id) as tool:
+                self.assertEqual(tool.snapshot(), SNAPSHOT)
+                tool.state["sequence"] = [7]
+            self.assertEqual(other.stats()["restores"], 1)
+            self.assertIn('"sequence": [7]', backend.get("session:" + session_id))
+
+            other.delete(session_id)
+            self.assertIsNone(backend.get("session:" + session_id))
+
+    def test_failed_turn_reloads_persisted_state(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = self.make_store(backend=SQLiteKV(os.path.join(tmp, "sessions.db"), clock=self.clock))
+            session_id = store.create(SNAPSHOT)
+            with self.assertRaises(RuntimeError):
+                with store.session(session_id) as tool:
+                    tool.state["sequence"] = [9]
+                    raise RuntimeError("turn failed")
+            with store.session(session_id) as tool:
+                self.assertEqual(tool.snapshot()["sequence"], [1, 2])
+            self.assertEqual(store.stats()["restores"], 1)
+
+    def test_sqlite_kv_expiry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            kv = SQLiteKV(os.path.join(tmp, "kv.db"), clock=self.clock)
+            kv.set("a", "1", ex=10)
+            kv.set("b", "2")
+            self.clock.now += 11
+            self.assertIsNone(kv.get("a"))
+            self.assertEqual(kv.get("b"), "2")
+
+    def test_turns_of_one_session_do_not_interleave(self):
+        store = self.make_store()
+        session_id = store.create()
+        inside, overlaps = [0], []
+        lock = threading.Lock()
+
+        def turn():
+            with store.session(session_id):
+                with lock:
+                    inside[0] += 1
+                    overlaps.append(inside[0])
+                threading.Event().wait(0.01)
+                with lock:
+                    inside[0] -= 1
+
+        threads = [threading.Thread(target=turn) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(max(overlaps), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
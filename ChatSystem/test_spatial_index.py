@@ -0,0 +1,147 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.place_store import PlaceStore, haversine_m
+from ChatSystem.spatial_index import SpatialIndex
+
+Place = namedtuple('Place', ['rowid', 'lat', 'lng', 'rating', 'title', 'categories'])
+
+
+def _store_of(places):
+    return PlaceStore(*zip(*places))
+
+
+def _random_places(n, seed=7):
+    rng = random.Random(seed)
+    places = []
+    for rowid in range(1, n + 1):
+        places.append(Place(
+            rowid,
+            10.70 + rng.random() * 0.15,
+            106.60 + rng.random() * 0.15,
+            round(1 + rng.random() * 4, 1),
+            f"Place {rowid}",
+            rng.choice(["cafe", "museum, history", "park", "restaurant, vietnamese", "bank"]),
+        ))
+    return places
+
+
+def _write_places_db(result_dir, places):
+    db_path = os.path.join(result_dir, 'places.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE places (title TEXT, address TEXT, categories TEXT, categoryname TEXT, "
+            "cuisine_tags TEXT, location_lat REAL, location_lng REAL, rating REAL)"
+        )
+        conn.executemany(
+            "INSERT INTO places (rowid, title, categories, location_lat, location_lng, rating) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(p.rowid, p.title, p.categories, p.lat, p.lng, p.rating) for p in places],
+        )
+    return db_path
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.places = _random_places(400)
+        self.index = SpatialIndex(_store_of(self.places), cell_deg=0.01)
+
+    def _rowids(self, result):
+        return [int(r) for r in self.index.store.rowids[result[1]]]
+
+    def _brute_nearest(self, lat, lng, k, exclude=()):
+        pairs = [(haversine_m(lat, lng, p.lat, p.lng), p.rowid) for p in self.places if p.rowid not in exclude]
+        return [rid for _, rid in sorted(pairs)[:k]]
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lng in [(10.76, 106.68), (10.70, 106.60), (10.9, 106.9), (11.5, 107.5)]:
+            got = self._rowids(self.index.nearest(lat, lng, 15))
+            self.assertEqual(got, self._brute_nearest(lat, lng, 15))
+
+    def test_nearest_respects_exclude_and_mask(self):
+        exclude = {p.rowid for p in self.places[:50]}
+        mask = self.index.store.category_like_mask("cafe")
+        got = self._rowids(self.index.nearest(10.76, 106.68, 10, exclude=exclude, mask=mask))
+        by_id = {p.rowid: p for p in self.places}
+        self.assertEqual(len(got), 10)
+        for rowid in got:
+            self.assertNotIn(rowid, exclude)
+            self.assertIn("cafe", by_id[rowid].categories)
+
+    def test_within_radius_matches_brute_force(self):
+        got = set(self._rowids(self.index.within_radius(10.76, 106.68, 3000)))
+        expected = {p.rowid for p in self.places if haversine_m(10.76, 106.68, p.lat, p.lng) < 3000}
+        self.assertEqual(got, expected)
+
+    def test_within_ellipse_matches_brute_force_detour(self):
+        a, b = (10.74, 106.65), (10.78, 106.70)
+        exclude = {p.rowid for p in self.places[:20]}
+        detours, positions = self.index.within_ellipse(*a, *b, 25, exclude=exclude)
+        got = [int(r) for r in self.index.store.rowids[positions]]
+        self.assertGreaterEqual(len(got), 25)
+        pairs = sorted(
+            (haversine_m(*a, p.lat, p.lng) + haversine_m(p.lat, p.lng, *b), p.rowid)
+            for p in self.places if p.rowid not in exclude
+        )
+        self.assertEqual(got, [rid for _, rid in pairs[:len(got)]])
+        self.assertTrue(all(d <= detours[-1] for d, _ in pairs[:len(got)]))
+
+    def test_within_ellipse_falls_back_to_all_places(self):
+        _, positions = self.index.within_ellipse(10.76, 106.68, 10.761, 106.681, 10_000)
+        self.assertEqual(len(positions), len(self.places))
+
+
+class TestLocationSequenceUsesIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.places = _random_places(300)
+        _write_places_db(self.tmp.name, self.places)
+        self.patcher = patch.object(LocationSequence, "RESULT_DIR", self.tmp.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_suggestions_exclude_sequence_and_respect_limit(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [1, 2])
+        for ids in (seq.suggest_for_position(limit=4),
+                    seq.suggest_for_position(pos=1, limit=4),
+                    seq.suggest_for_position(category="museum", limit=4)):
+            self.assertEqual(len(ids), 4)
+            self.assertFalse({1, 2} & set(ids))
+
+    def test_suggest_around_filters_category(self):
+        seq = LocationSequence()
+        ids = seq.suggest_around(10.76, 106.68, limit=5, category="park")
+        by_id = {p.rowid: p for p in self.places}
+        self.assertEqual(len(ids), 5)
+        self.assertTrue(all("park" in by_id[i].categories for i in ids))
+
+    def test_batch_title_similarity_matches_scalar(self):
+        titles = ["Ben Thanh Market", "Saigon Opera House", "", "Cafe 123"]
+        norm = [LocationSequence._normalize_text(t) for t in titles]
+        batch = LocationSequence._title_similarities("ben thanh", norm)
+        for title, sim in zip(titles, batch):
+            self.assertAlmostEqual(sim, LocationSequence._title_similarity("ben thanh", title))
+
+    def test_itinerary_has_no_duplicates(self):
+        seq = LocationSequence()
+        seq.load_sequence([10.76, 106.68], [5])
+        journey = seq.suggest_itinerary_to_sequence(limit=8)
+        self.assertEqual(len(journey), 8)
+        self.assertEqual(len(set(journey) | {5}), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.ChatBox import ChatBox
+from ChatSystem.suggestion_context import SuggestionContext
+
+
+def _make_sequence_mock():
+    seq = MagicMock(spec=[
+        "sequence",
+        "id_to_name",
+        "ids_to_places",
+        "search_by_name",
+        "get_suggest_category",
+        "suggest_for_position",
+        "suggest_itinerary_to_sequence",
+    ])
+    seq.sequence = []
+    seq.suggest_for_position.side_effect = lambda pos=-1, category=None, limit=5: list(range(100, 100 + limit))
+    seq.id_to_name.side_effect = lambda pid: f"Place {pid}"
+    seq.ids_to_places.side_effect = lambda ids, fields=None: [{"id": i, "title": f"Place {i}"} for i in ids]
+    seq.get_suggest_category.return_value = "cafe"
+    return seq
+
+
+class TestSuggestionContext(unittest.TestCase):
+    def test_smaller_limits_reuse_wider_query(self):
+        seq = _make_sequence_mock()
+        ctx = SuggestionContext(seq, width=5)
+        self.assertEqual(ctx.suggest_for_position(category="museum", limit=1), [100])
+        self.assertEqual(ctx.suggest_for_position(category="museum", limit=5), [100, 101, 102, 103, 104])
+        self.assertEqual(ctx.suggest_for_position(category="museum", limit=7), list(range(100, 107)))
+        self.assertEqual(seq.suggest_for_position.call_count, 2)
+
+    def test_names_are_memoized_and_other_attributes_pass_through(self):
+        seq = _make_sequence_mock()
+        ctx = SuggestionContext(seq)
+        self.assertEqual(ctx.names([1, 2, 1]), ["Place 1", "Place 2", "Place 1"])
+        self.assertEqual(ctx.id_to_name(2), "Place 2")
+        seq.ids_to_places.assert_called_once_with([1, 2], fields=("title",))
+        self.assertEqual(ctx.get_suggest_category(), "cafe")
+        self.assertIs(ctx.sequence, seq.sequence)
+
+    @patch("ChatSystem.ChatBox.process_user_input")
+    def test_process_input_shares_geo_queries(self, process_mock):
+        process_mock.return_value = {
+            "function": "suggest_attractions",
+            "params": {"category": "museum", "location": "District 1", "limit": 5},
+            "all_slots": {"categories": ["museum"], "limit": 5},
+        }
+        seq = _make_sequence_mock()
+        chat = ChatBox(seq)
+        chat.collected_information["categories"] = ["museum"]
+        seq.suggest_for_position.reset_mock()
+
+        response = chat.process_input("show me museums")
+
+        self.assertEqual(response.get_database_results(), [100, 101, 102, 103, 104])
+        # One query for the "next" suggestions and one for the category.
+        self.assertEqual(seq.suggest_for_position.call_count, 2)
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_prefetched_queries_are_reused(self):
+        seq = _make_sequence_mock()
+        seq.suggest_itinerary_to_sequence.side_effect = \
+            lambda limit, categories=None, ordered=False: list(range(200, 200 + limit))
+        ctx = SuggestionContext(seq, width=3)
+        ctx.prefetch({"categories": ["museum", "park"], "limit": 3})
+        self.assertEqual(seq.suggest_for_position.call_count, 3)
+
+        self.assertEqual(ctx.suggest_for_position(category="park", limit=3), [100, 101, 102])
+        # The itinerary is prefetched for the collected categories, as Bot_create_itinerary asks for it
+        self.assertEqual(ctx.suggest_itinerary_to_sequence(3, categories=["museum", "park"]), [200, 201, 202])
+        seq.suggest_itinerary_to_sequence.assert_called_once_with(3, categories=["museum", "park"], ordered=False)
+        self.assertEqual(ctx.suggest_for_position(), [100, 101, 102, 103, 104])
+        self.assertEqual(seq.suggest_for_position.call_count, 3)
+        self.assertEqual(ctx.prefetch_hits, 3)
+        # Names were warmed in batches by the prefetch
+        self.assertEqual(ctx.names([100, 200]), ["Place 100", "Place 200"])
+
+    def test_request_waits_for_in_flight_prefetch(self):
+        seq = _make_sequence_mock()
+        started, release = threading.Event(), threading.Event()
+
+        def slow(pos=-1, category=None, limit=5):
+            started.set()
+            release.wait(5)
+            return list(range(100, 100 + limit))
+
+        seq.suggest_for_position.side_effect = slow
+        ctx = SuggestionContext(seq)
+        future = ctx.start_prefetch({"limit": 5})
+        self.assertTrue(started.wait(5))
+        threading.Timer(0.05, release.set).start()
+        self.assertEqual(ctx.suggest_for_position(limit=2), [100, 101])
+        future.result(5)
+        self.assertEqual(seq.suggest_for_position.call_count, 1)
+
+    def test_prefetch_errors_are_swallowed(self):
+        seq = _make_sequence_mock()
+        seq.suggest_for_position.side_effect = RuntimeError("db down")
+        ctx = SuggestionContext(seq)
+        ctx.prefetch({"categories": ["museum"]})
+        with self.assertRaises(RuntimeError):
+            ctx.suggest_for_position()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.location_sequence import LocationSequence
+from ChatSystem.place_store import PlaceStore
+from ChatSystem.test_spatial_index import Place, _write_places_db
+from ChatSystem.title_index import TitleIndex, trigrams
+
+TITLES = [
+    "Ben Thanh Market", "Ben Thanh Street Food", "Saigon Opera House", "Cafe Saigon",
+    "The Coffee House", "Highlands Coffee", "War Remnants Museum", "Museum of Fine Arts",
+    "Pho 2000", "Pho Hoa Pasteur", "Independence Palace", "Notre Dame Cathedral",
+]
+
+
+class TestTitleIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.places = [
+            Place(i + 1, 10.76 + i * 0.001, 106.68, 4.0, title, "cafe")
+            for i, title in enumerate(TITLES)
+        ]
+        _write_places_db(self.tmp.name, self.places)
+        self.patcher = patch.object(LocationSequence, "RESULT_DIR", self.tmp.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def _brute_force(self, query, limit):
+        # Titles without a shared trigram are pruned unless too few candidates remain.
+        grams = trigrams(LocationSequence._normalize_text(query))
+        pool = [p for p in self.places if grams & trigrams(LocationSequence._normalize_text(p.title))]
+        if len(pool) < limit:
+            pool = self.places
+        scored = sorted((-LocationSequence._title_similarity(query, p.title), len(p.title), p.rowid) for p in pool)
+        return [rid for _, _, rid in scored[:limit]]
+
+    def test_candidates_share_a_trigram(self):
+        store = PlaceStore(*zip(*self.places))
+        index = TitleIndex(store)
+        grams = trigrams("coffee")
+        for pos in index.candidates("coffee"):
+            self.assertTrue(grams & trigrams(store.norm_titles[pos]))
+
+    def test_search_matches_brute_force_ranking(self):
+        seq = LocationSequence()
+        for query in ["ben thanh", "coffee house", "museum", "saigon"]:
+            self.assertEqual(seq.search_by_name(query, exact=False, limit=3), self._brute_force(query, 3))
+
+    def test_exact_hit_first_and_sequence_excluded(self):
+        seq = LocationSequence()
+        seq.load_sequence([], [4])
+        ids = seq.search_by_name("Saigon Opera House", limit=3)
+        self.assertEqual(ids[0], 3)
+        self.assertNotIn(4, ids)
+        self.assertEqual(len(ids), 3)
+
+    def test_fills_limit_when_few_titles_share_trigrams(self):
+        seq = LocationSequence()
+        self.assertEqual(len(seq.search_by_name("xyz", exact=False, limit=5)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
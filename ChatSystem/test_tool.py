@@ -89,7 +89,7 @@ class TestTOOL(unittest.TestCase):
         seq_mock.search_by_name.return_value = [5, 6]
         result = tool.search_by_name("park", exact=False, limit=2)
         self.assertEqual(result, [5, 6])
-        seq_mock.search_by_name.assert_called_once_with("park", False, 2)
+        seq_mock.search_by_name.assert_called_once_with("park", False, 2, backend="fuzzy")
 
     def test_get_suggest_category_passthrough(self):
         tool, seq_mock, _ = self._create_tool_with_mocks()
@@ -116,7 +116,7 @@ class TestTOOL(unittest.TestCase):
         seq_mock.suggest_itinerary_to_sequence.return_value = [11, 12]
         result = tool.suggest_itinerary_to_sequence(limit=2)
         self.assertEqual(result, [11, 12])
-        seq_mock.suggest_itinerary_to_sequence.assert_called_once_with(2)
+        seq_mock.suggest_itinerary_to_sequence.assert_called_once_with(2, categories=None, ordered=False)
 
     def test_process_input_returns_serialized_output(self):
         tool, _, chat_mock = self._create_tool_with_mocks()
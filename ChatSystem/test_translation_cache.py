@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChatSystem.util import UserInputProcessing, translator
+from ChatSystem.util.translator import TranslationMemo
+
+VI_TEXT = "Tôi muốn đi bảo tàng"
+
+
+class TestTranslationMemo(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch.object(translator, "_memo", TranslationMemo())
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    @patch.object(translator, "_smart_translate_vi_to_en", return_value="I want to go to the museum")
+    def test_repeat_translation_hits_memo(self, backend):
+        for _ in range(3):
+            self.assertEqual(translator.translate(VI_TEXT), "I want to go to the museum")
+        self.assertEqual(backend.call_count, 1)
+
+    @patch.object(translator, "_smart_translate_vi_to_en", side_effect=RuntimeError("offline"))
+    def test_errors_are_not_memoized(self, backend):
+        for _ in range(2):
+            self.assertEqual(translator.translate(VI_TEXT), VI_TEXT)
+        self.assertEqual(backend.call_count, 2)
+
+    def test_sqlite_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "translations.db")
+            key = TranslationMemo.key("translate", VI_TEXT, "en")
+            TranslationMemo(db_path=db_path).set(key, "I want to go to the museum")
+            self.assertEqual(TranslationMemo(db_path=db_path).get(key), "I want to go to the museum")
+
+    @patch.object(translator, "translate", side_effect=lambda text, target_language='en': text.upper())
+    def test_batch_dedupes_and_keeps_order(self, translate_mock):
+        self.assertEqual(translator.translate_batch(["b", "a", "", "b", "c"], max_workers=4),
+                         ["B", "A", "", "B", "C"])
+        self.assertEqual(sorted(c.args[0] for c in translate_mock.call_args_list), ["a", "b", "c"])
+
+    @patch.object(UserInputProcessing, "extract_info_with_orchestrator", return_value={'intents': []})
+    @patch.object(UserInputProcessing, "translate_batch",
+                  side_effect=lambda texts, target_language='en': ["I want to go to the museum" for _ in texts])
+    def test_history_is_translated_once(self, batch_mock, _):
+        history = [{'role': 'user', 'message': VI_TEXT}, {'role': 'bot', 'message': 'Sure!', 'message_en': 'Sure!'}]
+        UserInputProcessing.process_user_input("5", {}, history)
+        UserInputProcessing.process_user_input("6", {}, history)
+        self.assertEqual([c.args[0] for c in batch_mock.call_args_list], [[VI_TEXT], []])
+        self.assertEqual(history[0]['message_en'], "I want to go to the museum")
+
+
+if __name__ == "__main__":
+    unittest.main()
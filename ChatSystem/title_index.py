@@ -0,0 +1,79 @@
+"""
+Character-trigram inverted index over normalized place titles.
+
+`search_by_name` used to score the query against every title in `places`.
+This index maps each trigram of a normalized title (padded with spaces so
+word starts and ends count) to the PlaceStore positions containing it. A
+query only scores titles that share trigrams with it, the ones sharing the
+most first, capped at `max_candidates`. Exact title lookups come from a
+dict instead of a table scan.
+"""
+
+import threading
+
+import numpy as np
+
+from ChatSystem.place_store import get_place_store, normalize_text
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def trigrams(norm_text):
+    """Set of character trigrams of an already-normalized string."""
+    if not norm_text:
+        return set()
+    padded = f" {norm_text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Trigram posting lists and exact-title lookup for a PlaceStore."""
+
+    def __init__(self, store):
+        self.store = store
+        postings = {}
+        for pos, title in enumerate(store.norm_titles):
+            for gram in trigrams(title):
+                postings.setdefault(gram, []).append(pos)
+        self.postings = {gram: np.asarray(p, dtype=np.int64) for gram, p in postings.items()}
+        self.exact = {}
+        for pos, title in enumerate(store.titles):
+            if title is not None:
+                self.exact.setdefault(title, []).append(pos)
+        # Tie-break key used by search_by_name: shorter raw titles first.
+        self.title_len = np.asarray([len(t) if t else 10**9 for t in store.titles], dtype=np.int64)
+
+    def exact_positions(self, title):
+        """Positions whose raw title equals `title`, in table order."""
+        return self.exact.get(title, [])
+
+    def candidates(self, query, max_candidates=2000):
+        """Positions sharing at least one trigram with `query`, most shared trigrams first."""
+        grams = [g for g in trigrams(normalize_text(query)) if g in self.postings]
+        if not grams:
+            return _EMPTY
+        counts = np.bincount(np.concatenate([self.postings[g] for g in grams]), minlength=len(self.store))
+        positions = np.nonzero(counts)[0]
+        if positions.size > max_candidates:
+            top = np.argpartition(-counts[positions], max_candidates - 1)[:max_candidates]
+            positions = np.sort(positions[top])
+        return positions
+
+
+_INDEXES = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def get_title_index(db_path):
+    """Return the process-wide TitleIndex for `db_path`, rebuilding it if the file changed."""
+    store = get_place_store(db_path)
+    cached = _INDEXES.get(db_path)
+    if cached and cached.store is store:
+        return cached
+    with _INDEX_LOCK:
+        cached = _INDEXES.get(db_path)
+        if cached and cached.store is store:
+            return cached
+        index = TitleIndex(store)
+        _INDEXES[db_path] = index
+        return index
@@ -3,6 +3,7 @@ import os
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+import copy
 import random
 from ChatSystem.location_sequence import LocationSequence
 
@@ -28,18 +29,70 @@ class UserResponse(Response) :
     def __init__(self,user_message,whom='user') : 
         super().__init__(user_message,whom)
     
+class SavedResponse(Response) :
+    """
+    A message restored from saved history. Holds the saved fields as plain data and
+    answers the Response getters from them, with no database access.
+    """
+    def __init__(self, whom, message, suggestions=None, database_results=None) :
+        super().__init__(message, whom)
+        self.suggestions = list(suggestions or [])
+        self.database_results = list(database_results or [])
+
+    @classmethod
+    def from_dict(cls, response_dict) :
+        return cls(
+            response_dict['whom'],
+            response_dict['message'],
+            suggestions=response_dict.get('suggestions'),
+            database_results=response_dict.get('database_results'),
+        )
+
+    def get_suggestions(self) :
+        return self.suggestions
+
+    def get_database_results(self) :
+        return self.database_results
+
+    def get_json_serializable(self):
+        if self.whom != 'bot':
+            return {}
+        return {
+            "message" : self.get_message(),
+            "suggestions" : self.get_suggestions(),
+            "database_results" : self.get_database_results()
+        }
+
 class BotResponse(Response) :
     def __init__(self, location_sequence, bot_message, collected_information=None, num_alternatives=2, whom='bot') : 
         # if history and history[history.__len__()-1][0]['role'] != 'user':
             # raise ValueError("Last history entry must be 'user'")
         super().__init__(bot_message, whom)
         self.location_sequence = location_sequence
-        self.suggestions = []
+        self._suggestions = []
+        self._pending_enhancement = None
         
-        # Auto-enhance suggestions if collected_information is provided
+        # Auto-enhance suggestions if collected_information is provided.
+        # Deferred until the suggestions are first read, so the message and database
+        # results can be sent before the suggestion queries run. The collected info is
+        # snapshotted because ChatBox updates it right after building the response.
         if collected_information is not None:
-            self.enhance_suggestions(collected_information, num_alternatives)
+            self._pending_enhancement = (copy.deepcopy(collected_information), num_alternatives)
     
+    @property
+    def suggestions(self):
+        if self._pending_enhancement is not None:
+            collected_information, num_alternatives = self._pending_enhancement
+            self._pending_enhancement = None
+            self.enhance_suggestions(collected_information, num_alternatives)
+        return self._suggestions
+
+    @suggestions.setter
+    def suggestions(self, value):
+        # An explicit assignment (e.g. restored from saved history) replaces any pending enhancement
+        self._pending_enhancement = None
+        self._suggestions = value
+
     def get_suggestions(self):
         """Return the list of suggestions for this response"""
         return self.suggestions
@@ -96,6 +149,11 @@ class BotResponse(Response) :
         else:
             return all_suggestions[:num_suggestions]
     
+    def _names_for(self, place_ids):
+        """Place titles for `place_ids` (None for unknown IDs), fetched in one batch."""
+        places = self.location_sequence.ids_to_places(place_ids, fields=("title",))
+        return [place["title"] if place else None for place in places]
+
     def enhance_suggestions(self, collected_information, num_alternatives=1):
         """Enhance base suggestions by adding alternative topic-switching suggestions and database-driven suggestions."""
         alternatives = self._generate_suggestions(collected_information, num_alternatives)
@@ -111,8 +169,7 @@ class BotResponse(Response) :
             for category in categories:
                 db_ids = self.location_sequence.suggest_for_position(category=category, limit=1)
                 if db_ids:
-                    for id in db_ids:
-                        place_name = self.location_sequence.id_to_name(id)
+                    for place_name in self._names_for(db_ids):
                         if place_name:
                             db_suggestion = f"Tell me about {place_name}"
                             if db_suggestion not in self.suggestions:
@@ -121,8 +178,7 @@ class BotResponse(Response) :
 
         next_ids = self.location_sequence.suggest_for_position()
         if next_ids:
-            for next_id in next_ids:
-                place_name = self.location_sequence.id_to_name(next_id)
+            for place_name in self._names_for(next_ids):
                 if place_name:
                     # find if place_name is in at least one of the existing suggestions
                     if (not any(place_name in s for s in self.suggestions)):
@@ -214,7 +270,7 @@ class Bot_ask_destination(BotResponse) :
         # Add destination suggestions after parent init
         if nearby_ids:
             # Convert IDs to names
-            destination_suggestions = [location_sequence.id_to_name(pid) for pid in nearby_ids]
+            destination_suggestions = self._names_for(nearby_ids)
             # Filter out None values and prepend to auto-generated suggestions
             destination_suggestions = [s for s in destination_suggestions if s]
             self.suggestions = destination_suggestions + self.suggestions
@@ -265,7 +321,15 @@ class Bot_suggest_categories(BotResponse) :
     
     def __init__(self, location_sequence=None, collected_information=None) : 
         super().__init__(location_sequence, random.choice(self.list_of_responses), collected_information=collected_information)
-        self.suggested_category = location_sequence.get_suggest_category() if location_sequence else []
+        # Queried on first read: ChatBox builds this greeting on init, and loading a
+        # saved history discards it unread.
+        self._suggested_category = None
+
+    @property
+    def suggested_category(self):
+        if self._suggested_category is None:
+            self._suggested_category = self.location_sequence.get_suggest_category() if self.location_sequence else []
+        return self._suggested_category
     
     def get_database_results(self):
         """Return suggested categories"""
@@ -340,7 +404,11 @@ class Bot_create_itinerary(BotResponse):
         super().__init__(location_sequence, response, collected_information=collected_information)
         self.categories = categories
 
-        self.listOfItinerary = location_sequence.suggest_itinerary_to_sequence(limit) if location_sequence else []
+        if not location_sequence:
+            self.listOfItinerary = []
+        else:
+            # With categories, every stop comes from the requested categories
+            self.listOfItinerary = location_sequence.suggest_itinerary_to_sequence(limit, categories=categories)
     
     def get_database_results(self):
         """Return the complete itinerary"""
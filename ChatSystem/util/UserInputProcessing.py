@@ -3,10 +3,11 @@ End-to-end pipeline: User Input → Function Call
 Combines orchestrator, translator, and formatter for complete processing.
 """
 
+import asyncio
 import json
 from typing import Dict
-from .orchestrator import extract_info_with_orchestrator
-from .translator import translate, detectLanguage
+from .orchestrator import extract_info_with_orchestrator, extract_info_with_orchestrator_async
+from .translator import translate, translate_batch, detectLanguage
 from .Response import (
     Bot_ask_destination, Response, BotResponse, UserResponse, CompositeResponse,
     Bot_ask_clarify, Bot_ask_start_location, Bot_ask_category,
@@ -14,33 +15,18 @@ from .Response import (
     Bot_suggest_attractions, Bot_search_by_name, Bot_create_itinerary
 )
 
-def process_user_input(user_input: str, collected_information: dict, conversation_history: list) -> dict:    
+def process_user_input(user_input: str, collected_information: dict, conversation_history: list,
+                       history_summary: dict = None) -> dict:
     if not user_input or not user_input.strip():
-        return {
-            'function': 'ask_clarify',
-            'text': 'Please provide more information about your travel plans.'
-        }
+        return _empty_input_result()
     
     # Step 1: Language detection and translation
-    source_language = detectLanguage(user_input)
-    english_input = translate(user_input, target_language='en') if source_language != 'en' else user_input
-    
-    # Translate conversation history to English for context
-    english_history = []
-    for message in conversation_history:
-        msg_text = message.get('message', '')
-        if msg_text and detectLanguage(msg_text) != 'en':
-            translated_text = translate(msg_text, target_language='en')
-            english_history.append({
-                'role': message.get('role', ''),
-                'message': translated_text
-            })
-        else:
-            english_history.append(message)
+    english_input, english_history = _to_english(user_input, conversation_history)
             
     # Step 2: Extract intent using 2-pass orchestrator
     print("english input:", english_input)
-    extracted_data = extract_info_with_orchestrator(english_input, collected_information, english_history)
+    extracted_data = extract_info_with_orchestrator(english_input, collected_information, english_history,
+                                                    history_summary=history_summary)
     
     # Step 3: Format to clean structure
     # Can be removed with better orchestrator output
@@ -53,6 +39,60 @@ def process_user_input(user_input: str, collected_information: dict, conversatio
     return result
 
 
+async def process_user_input_async(user_input: str, collected_information: dict, conversation_history: list,
+                                   history_summary: dict = None) -> dict:
+    """
+    Async process_user_input. Translation (blocking deep_translator calls) runs in a
+    worker thread and the Gemini extraction is awaited.
+    """
+    if not user_input or not user_input.strip():
+        return _empty_input_result()
+
+    english_input, english_history = await asyncio.to_thread(_to_english, user_input, conversation_history)
+    print("english input:", english_input)
+    extracted_data = await extract_info_with_orchestrator_async(english_input, collected_information, english_history,
+                                                                history_summary=history_summary)
+    return _format_llm_response(extracted_data)
+
+
+def _empty_input_result() -> dict:
+    return {
+        'function': 'ask_clarify',
+        'text': 'Please provide more information about your travel plans.'
+    }
+
+
+def _to_english(user_input: str, conversation_history: list):
+    """
+    Return (english_input, english_history).
+    The input and any history messages not yet translated go out as one batch.
+    Each message is translated once: the English form is stored on the history
+    entry as 'message_en' (and persisted by ChatBox.save_chatbox).
+    """
+    source_language = detectLanguage(user_input)
+    pending = [m for m in conversation_history if 'message_en' not in m]
+    to_translate = [user_input] if source_language != 'en' else []
+    for message in pending:
+        msg_text = message.get('message', '')
+        if msg_text and detectLanguage(msg_text) != 'en':
+            to_translate.append(msg_text)
+    translated = dict(zip(to_translate, translate_batch(to_translate, target_language='en')))
+
+    english_input = translated.get(user_input, user_input)
+    for message in pending:
+        msg_text = message.get('message', '')
+        message['message_en'] = translated.get(msg_text, msg_text)
+
+    english_history = []
+    for message in conversation_history:
+        entry = {'role': message.get('role', ''), 'message': english_message(message)}
+        # Suggestions are generated in English
+        if message.get('suggestions'):
+            entry['suggestions'] = message['suggestions']
+        english_history.append(entry)
+    return english_input, english_history
+
+
 def _format_llm_response(extracted_data: Dict) -> Dict:
     """
     Convert LLM extraction to clean, readable format.
@@ -176,6 +216,17 @@ def _format_llm_response(extracted_data: Dict) -> Dict:
     }
 
 
+def english_message(message: dict) -> str:
+    """English form of a history entry, translating it on first use only."""
+    if 'message_en' not in message:
+        msg_text = message.get('message', '')
+        if msg_text and detectLanguage(msg_text) != 'en':
+            message['message_en'] = translate(msg_text, target_language='en')
+        else:
+            message['message_en'] = msg_text
+    return message['message_en']
+
+
 def _translate_all_text_back(params: dict, target_language: str):
     """
     Recursively find and translate all text fields that differ from source language.
@@ -0,0 +1,334 @@
+"""
+Precomputed variant index for category matching.
+
+Maps the spellings a user (or the LLM) may give to a category onto the
+canonical words in `categories.txt`: the words themselves, their plural and
+singular forms, English and Vietnamese synonyms (with and without diacritics)
+and common misspellings. Matching a category is then a dictionary lookup,
+with a bounded difflib fallback over the canonical words and synonyms. It
+makes no translation calls.
+
+The curated part of the index is stored in `category_variants.json` and
+loaded once at import; single-letter typos of each category are generated on
+top of it at load time. Rebuild the file after editing `categories.txt` or the
+synonym tables below:
+    python ChatSystem/util/category_variants.py
+
+If the JSON file is missing or was built from a different `categories.txt`,
+the index is built in memory at import instead. Editing `categories.txt`
+while the server runs reloads the index on the next match.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+
+UTIL_DIR = os.path.dirname(os.path.abspath(__file__))
+CATEGORIES_PATH = os.path.join(UTIL_DIR, 'categories.txt')
+VARIANTS_PATH = os.path.join(UTIL_DIR, 'category_variants.json')
+
+# Longest phrase (in words) tried when matching part of a multi-word category.
+MAX_NGRAM = 4
+FUZZY_CUTOFF = 0.75
+# Inputs longer than this skip the fuzzy fallback.
+MAX_FUZZY_LENGTH = 40
+
+# English synonyms -> canonical category.
+EN_SYNONYMS = {
+    'coffee shop': 'cafe', 'coffeehouse': 'cafe', 'coffee house': 'cafe', 'tea house': 'cafe',
+    'milk tea': 'drink', 'bubble tea': 'drink', 'juice': 'drink',
+    'eatery': 'restaurant', 'diner': 'restaurant', 'dining': 'restaurant', 'eating': 'food',
+    'street food': 'stall', 'food stall': 'stall', 'food court': 'food',
+    'bread': 'bakery', 'banh mi': 'sandwich', 'bbq': 'barbecue', 'hotpot': 'pot', 'hot pot': 'pot',
+    'ice cream': 'cream', 'icecream': 'cream', 'gelato': 'cream', 'desert': 'dessert',
+    'veggie': 'vegetarian', 'plant based': 'vegan',
+    'nightlife': 'bar', 'club': 'bar', 'night club': 'bar', 'beer': 'pub', 'brewery': 'pub',
+    'wine bar': 'wine',
+    'hotel': 'accommodation', 'hostel': 'accommodation', 'homestay': 'accommodation',
+    'resort': 'accommodation', 'lodging': 'accommodation',
+    'art gallery': 'gallery', 'exhibition': 'gallery', 'arts': 'art',
+    'pagoda': 'temple', 'shrine': 'temple', 'cathedral': 'church', 'chapel': 'church',
+    'monument': 'memorial', 'statue': 'memorial', 'historic': 'historical', 'culture': 'heritage',
+    'cultural': 'heritage', 'sightseeing': 'attraction', 'sights': 'attraction', 'sight': 'attraction',
+    'viewpoint': 'observation', 'view': 'observation', 'rooftop': 'observation',
+    'garden': 'park', 'nature': 'natural', 'outdoors': 'outdoor',
+    'theme park': 'amusement', 'water park': 'amusement', 'playground': 'amusement',
+    'cinema': 'entertainment', 'movie': 'entertainment', 'movies': 'entertainment',
+    'market': 'shopping', 'shopping mall': 'mall', 'shopping center': 'mall', 'boutique': 'fashion',
+    'souvenir': 'gift', 'souvenirs': 'gift', 'bookshop': 'bookstore', 'books': 'bookstore',
+    'massage': 'spa', 'fitness': 'gym', 'sport': 'sports',
+    'pharmacy': 'health', 'hospital': 'clinic', 'laundry service': 'laundry',
+    'motorbike': 'scooter', 'motorbike rental': 'rental', 'toys': 'toy',
+}
+
+# Vietnamese synonyms -> canonical category. Keys are also indexed without diacritics.
+VI_SYNONYMS = {
+    'bảo tàng': 'museum', 'phòng tranh': 'gallery', 'triển lãm': 'gallery', 'mỹ thuật': 'art',
+    'nghệ thuật': 'art', 'chùa': 'temple', 'đền': 'temple', 'miếu': 'temple', 'nhà thờ': 'church',
+    'công viên': 'park', 'vườn': 'park', 'sở thú': 'zoo', 'thảo cầm viên': 'zoo',
+    'chợ': 'shopping', 'mua sắm': 'shopping', 'trung tâm thương mại': 'mall', 'siêu thị': 'supermarket',
+    'cửa hàng': 'shop', 'tạp hóa': 'grocery', 'cửa hàng tiện lợi': 'convenience',
+    'nhà hàng': 'restaurant', 'quán ăn': 'restaurant', 'ăn uống': 'food', 'đồ ăn': 'food',
+    'món ăn': 'food', 'ẩm thực': 'food', 'ăn vặt': 'stall', 'quán cà phê': 'cafe', 'quán cafe': 'cafe',
+    'cà phê': 'coffee', 'trà sữa': 'drink', 'nước uống': 'drink', 'quán bar': 'bar', 'quán nhậu': 'pub',
+    'bia': 'pub', 'rượu vang': 'wine', 'tiệm bánh': 'bakery', 'bánh ngọt': 'cake', 'bánh mì': 'sandwich',
+    'phở': 'pho', 'bún': 'noodle', 'mì': 'noodle', 'cơm': 'rice', 'cháo': 'porridge',
+    'hải sản': 'seafood', 'lẩu': 'pot', 'nướng': 'barbecue', 'đồ nướng': 'barbecue', 'gà': 'chicken',
+    'đồ chay': 'vegetarian', 'chay': 'vegetarian', 'tráng miệng': 'dessert', 'kem': 'cream',
+    'chè': 'sweets', 'bữa sáng': 'breakfast', 'buffet': 'buffet',
+    'món việt': 'vietnamese', 'món nhật': 'japanese', 'món hàn': 'korean', 'món trung': 'chinese',
+    'món ý': 'italian', 'món ấn': 'indian', 'món âu': 'european', 'đồ tây': 'western',
+    'di tích': 'historical', 'di tích lịch sử': 'historical', 'lịch sử': 'history', 'di sản': 'heritage',
+    'văn hóa': 'heritage', 'tượng đài': 'memorial', 'đài tưởng niệm': 'memorial',
+    'điểm tham quan': 'attraction', 'địa điểm du lịch': 'attraction', 'tham quan': 'attraction',
+    'thắng cảnh': 'landmark', 'danh lam thắng cảnh': 'landmark', 'địa danh': 'landmark',
+    'ngắm cảnh': 'observation', 'thiên nhiên': 'natural', 'ngoài trời': 'outdoor',
+    'tôn giáo': 'religious', 'phật giáo': 'buddhist', 'công giáo': 'catholic', 'tin lành': 'protestant',
+    'khách sạn': 'accommodation', 'nhà nghỉ': 'accommodation', 'chỗ ở': 'accommodation',
+    'khu vui chơi': 'amusement', 'công viên giải trí': 'amusement', 'giải trí': 'entertainment',
+    'rạp phim': 'entertainment', 'rạp chiếu phim': 'entertainment',
+    'mát xa': 'spa', 'xông hơi': 'sauna', 'phòng gym': 'gym', 'thể dục': 'gym', 'thể thao': 'sports',
+    'hiệu sách': 'bookstore', 'nhà sách': 'bookstore', 'quà lưu niệm': 'gift', 'thời trang': 'fashion',
+    'quần áo': 'clothing', 'mỹ phẩm': 'cosmetics', 'hiệu thuốc': 'health', 'nhà thuốc': 'health',
+    'phòng khám': 'clinic', 'ngân hàng': 'bank', 'giặt ủi': 'laundry', 'tiệm giặt': 'laundromat',
+    'thuê xe': 'rental', 'xe máy': 'scooter', 'đồ chơi': 'toy',
+}
+
+# Misspellings that single deletions/transpositions do not produce.
+MISSPELLINGS = {
+    'restaurent': 'restaurant', 'resturant': 'restaurant', 'restaraunt': 'restaurant',
+    'restuarant': 'restaurant', 'musium': 'museum', 'meseum': 'museum', 'musem': 'museum',
+    'barbeque': 'barbecue', 'vegeterian': 'vegetarian', 'vegitarian': 'vegetarian',
+    'galary': 'gallery', 'gallary': 'gallery', 'templ': 'temple', 'caffe': 'cafe', 'caffee': 'coffee',
+    'accomodation': 'accommodation', 'acommodation': 'accommodation', 'shoping': 'shopping',
+    'historic site': 'historical', 'histroical': 'historical', 'piza': 'pizza', 'suhsi': 'sushi',
+}
+
+# Lower rank wins when two categories claim the same variant. Generated typos
+# rank below all of these and never replace a curated variant.
+_RANK_CANONICAL, _RANK_INFLECTION, _RANK_SYNONYM, _RANK_SYNONYM_INFLECTION, _RANK_ASCII, _RANK_MISSPELLING = range(6)
+# Typo variants are only generated for words at least this long.
+_MIN_TYPO_LENGTH = 5
+
+
+def normalize(text):
+    return " ".join(str(text or "").lower().replace('-', ' ').replace('_', ' ').split())
+
+
+def strip_diacritics(text):
+    decomposed = unicodedata.normalize('NFD', text.replace('đ', 'd').replace('Đ', 'D'))
+    return "".join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+
+
+def plural_singular_variants(word):
+    """
+    Generate plural and singular variants of an English word.
+
+    Parameters:
+        word (str): Input word
+
+    Returns:
+        set: Set of variants (plural and singular forms)
+    """
+    variants = set()
+    word_lower = word.lower().strip()
+
+    # Rules for plural -> singular
+    if word_lower.endswith('ies'):
+        # galleries -> gallery, bakeries -> bakery
+        variants.add(word_lower[:-3] + 'y')
+    elif word_lower.endswith('ses'):
+        # churches -> church, boxes -> box
+        variants.add(word_lower[:-2])
+    elif word_lower.endswith('shes') or word_lower.endswith('ches'):
+        # dishes -> dish, churches -> church
+        variants.add(word_lower[:-2])
+    elif word_lower.endswith('s') and not word_lower.endswith('ss'):
+        # museums -> museum, cafes -> cafe
+        variants.add(word_lower[:-1])
+
+    # Rules for singular -> plural
+    if word_lower.endswith('y') and len(word_lower) > 1 and word_lower[-2] not in 'aeiou':
+        # gallery -> galleries, bakery -> bakeries
+        variants.add(word_lower[:-1] + 'ies')
+    elif word_lower.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        # church -> churches, box -> boxes
+        variants.add(word_lower + 'es')
+    elif not word_lower.endswith('s'):
+        # museum -> museums, cafe -> cafes
+        variants.add(word_lower + 's')
+
+    return variants
+
+
+def typo_variants(word):
+    """Single-letter deletions and adjacent transpositions of `word`."""
+    if len(word) < _MIN_TYPO_LENGTH or ' ' in word:
+        return set()
+    typos = {word[:i] + word[i + 1:] for i in range(len(word))}
+    typos.update(word[:i] + word[i + 1] + word[i] + word[i + 2:] for i in range(len(word) - 1))
+    typos.discard(word)
+    return typos
+
+
+def load_categories(path=CATEGORIES_PATH):
+    """Return (canonical category list, sha256 of the file) for `categories.txt`."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return [], None
+    categories = list(dict.fromkeys(c.strip().lower() for c in content.split(',') if c.strip()))
+    return categories, hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def build_variant_index(categories):
+    """Return the curated {variant: canonical category} index for `categories`, without typos."""
+    canonical = set(categories)
+    ranked = {}
+
+    def add(variant, category, rank):
+        variant = normalize(variant)
+        if not variant or (variant in canonical and variant != category):
+            return
+        if variant not in ranked or rank < ranked[variant][0]:
+            ranked[variant] = (rank, category)
+
+    for category in categories:
+        add(category, category, _RANK_CANONICAL)
+        for form in plural_singular_variants(category):
+            add(form, category, _RANK_INFLECTION)
+
+    synonyms = {**EN_SYNONYMS, **VI_SYNONYMS}
+    for phrase, category in synonyms.items():
+        if category not in canonical:
+            continue
+        add(phrase, category, _RANK_SYNONYM)
+        if phrase in EN_SYNONYMS:
+            for form in plural_singular_variants(phrase):
+                add(form, category, _RANK_SYNONYM_INFLECTION)
+        ascii_phrase = strip_diacritics(phrase)
+        if ascii_phrase != phrase and len(ascii_phrase) >= 3:
+            add(ascii_phrase, category, _RANK_ASCII)
+
+    for typo, category in MISSPELLINGS.items():
+        if category in canonical:
+            add(typo, category, _RANK_MISSPELLING)
+
+    return {variant: category for variant, (_, category) in sorted(ranked.items())}
+
+
+def add_typo_variants(variants, categories):
+    """Return `variants` plus the `typo_variants` of each category not already indexed."""
+    variants = dict(variants)
+    for category in categories:
+        for typo in sorted(typo_variants(category)):
+            variants.setdefault(typo, category)
+    return variants
+
+
+def write_variant_index(path=VARIANTS_PATH, categories_path=CATEGORIES_PATH):
+    """Build the index from `categories_path` and write it to `path` as JSON."""
+    categories, digest = load_categories(categories_path)
+    data = {'categories_sha256': digest, 'variants': build_variant_index(categories)}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=0, sort_keys=True)
+        f.write('\n')
+    return path
+
+
+class CategoryMatcher:
+    """Dictionary lookup of category variants with a bounded fuzzy fallback."""
+
+    def __init__(self, categories, variants):
+        self.categories = list(categories)
+        self.variants = variants
+        # Fuzzy matching only considers canonical words and synonyms, not generated typos.
+        self._fuzzy_keys = sorted(set(self.categories) | {normalize(k) for k in EN_SYNONYMS}
+                                  | {strip_diacritics(normalize(k)) for k in VI_SYNONYMS})
+
+    def _lookup(self, text):
+        found = self.variants.get(text)
+        if found is None:
+            found = self.variants.get(strip_diacritics(text))
+        return found
+
+    def match(self, text):
+        """Return the canonical category for `text`, or None."""
+        norm = normalize(text)
+        if not norm:
+            return None
+        found = self._lookup(norm)
+        if found is not None:
+            return found
+
+        # Longest sub-phrase first; among equal lengths the rightmost (English head noun).
+        words = norm.split()
+        for n in range(min(len(words) - 1, MAX_NGRAM), 0, -1):
+            for start in range(len(words) - n, -1, -1):
+                found = self._lookup(" ".join(words[start:start + n]))
+                if found is not None:
+                    return found
+
+        if len(norm) > MAX_FUZZY_LENGTH:
+            return None
+        close = difflib.get_close_matches(strip_diacritics(norm), self._fuzzy_keys, n=1, cutoff=FUZZY_CUTOFF)
+        return self._lookup(close[0]) if close else None
+
+
+def load_matcher(path=VARIANTS_PATH, categories_path=CATEGORIES_PATH):
+    """CategoryMatcher from the JSON index, rebuilt in memory if it is missing or stale."""
+    categories, digest = load_categories(categories_path)
+    variants = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('categories_sha256') == digest:
+            variants = data['variants']
+    except (OSError, ValueError, KeyError):
+        pass
+    if variants is None:
+        print(f"⚠️ {os.path.basename(path)} is missing or stale, building category variants in memory")
+        variants = build_variant_index(categories)
+    return CategoryMatcher(categories, add_typo_variants(variants, categories))
+
+
+def _categories_mtime():
+    try:
+        return os.path.getmtime(CATEGORIES_PATH)
+    except OSError:
+        return None
+
+
+MATCHER = load_matcher()
+_matcher_mtime = _categories_mtime()
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """The matcher loaded at import, reloaded when `categories.txt` changes on disk."""
+    global MATCHER, _matcher_mtime
+    mtime = _categories_mtime()
+    if mtime != _matcher_mtime:
+        with _matcher_lock:
+            if mtime != _matcher_mtime:
+                MATCHER = load_matcher(VARIANTS_PATH, CATEGORIES_PATH)
+                _matcher_mtime = mtime
+    return MATCHER
+
+
+def valid_categories():
+    """Canonical categories from `categories.txt` (reloaded on change)."""
+    return get_matcher().categories
+
+
+def match_category(text):
+    """Return the canonical category for `text`, or None."""
+    return get_matcher().match(text)
+
+
+if __name__ == "__main__":
+    print(f"Wrote {write_variant_index()}")
@@ -0,0 +1,305 @@
+"""
+Rule-based fast path for intent extraction.
+
+Many turns need no LLM: a bare number answering the bot's "how many" is a
+`limit` update, the suggestion chips handed out by `BotResponse` map to a
+known function, and "<category> near me" is a `suggest_attractions` request.
+Turns that only make sense in context (a number, "tell me about X") are
+accepted only when the last bot message in `conversation_history` asked for
+them or offered them as a suggestion. Inputs that seem to name a specific
+place (capitalized names, words outside the category vocabulary) are left to
+the LLM even when they contain a category term. `classify` recognizes these with
+the keyword sets and few-shot examples in `prompt_config.py`. It returns the
+orchestrator's `{'intents': ..., 'context_action': ...}` shape plus a
+`confidence`. `extract_info_with_orchestrator` only calls Gemini when the
+confidence is below `FAST_PATH_THRESHOLD`.
+"""
+
+import copy
+import os
+import re
+from functools import lru_cache
+
+from .prompt_config import (
+    DOMAIN_KEYWORDS, FEW_SHOT_EXAMPLES, MODIFIER_KEYWORDS,
+    VAGUE_CATEGORY_KEYWORDS, VAGUE_LOCATION_KEYWORDS,
+)
+
+FAST_PATH_THRESHOLD = float(os.getenv('FAST_PATH_THRESHOLD', 0.85))
+MAX_LIMIT = 50
+
+CATEGORIES_PATH = os.path.join(os.path.dirname(__file__), 'categories.txt')
+
+# categories.txt terms that are too common in ordinary sentences to signal a category on their own.
+# Next to another categories.txt term they form a compound category ("hot pot", "ice cream").
+_AMBIGUOUS_TERMS = {
+    'care', 'center', 'company', 'complex', 'country', 'court', 'deck', 'family', 'fast', 'home',
+    'hot', 'ice', 'improvement', 'information', 'local', 'log', 'machine', 'media', 'mobile',
+    'modern', 'office', 'pot', 'products', 'real', 'service', 'services', 'shared', 'tour',
+    'tourism', 'tourist', 'trade', 'travel', 'war',
+}
+
+_NEAR_WORDS = {'near', 'nearby', 'around', 'close'}
+_REQUEST_PHRASES = ('show me', 'find', 'recommend', 'suggest', 'any ', 'looking for', 'where can i', 'i want')
+_GREETINGS = {'hi', 'hello', 'hey'}
+# Category mentions inside trip planning are itinerary requests; leave those to the LLM.
+_PLANNING_WORDS = {'plan', 'itinerary', 'trip', 'journey', 'route', 'day', 'days'}
+_PLACE_WORDS = r'(?:places?|locations?|stops?|attractions?|spots?)'
+# Words that can surround a category request without naming a particular place.
+_FILLER_WORDS = frozenset({
+    'a', 'an', 'the', 'me', 'i', "i'm", 'im', 'my', 'we', 'us', 'you', 'to', 'in', 'of', 'for', 'at', 'on',
+    'by', 'with', 'and', 'or', 'about', 'some', 'any', 'good', 'best', 'nice', 'great', 'top', 'popular',
+    'cheap', 'famous', 'nearest', 'closest', 'please', 'can', 'could', 'would', 'like', 'want', 'need',
+    'looking', 'find', 'show', 'recommend', 'suggest', 'tell', 'where', 'what', "what's", 'is', 'are',
+    'there', 'here', 'go', 'get', 'eat', 'drink', 'visit', 'see', 'this', 'that', 'other', 'more', 'few',
+    'somewhere', 'area', 'let', "let's", 'place', 'places', 'location', 'locations', 'spot', 'spots',
+    'stop', 'stops', 'attraction', 'attractions',
+}) | _NEAR_WORDS | frozenset(w for k in VAGUE_LOCATION_KEYWORDS | VAGUE_CATEGORY_KEYWORDS for w in k.split())
+
+_NUMBER_RE = re.compile(rf'^(?:just |only |about )?(\d{{1,3}})(?: {_PLACE_WORDS})?(?: (?:is|are) enough| please)?$')
+# A bot message asking for a count, and the chips BotResponse offers when the limit is missing.
+_COUNT_QUESTION_RE = re.compile(r'\bhow many\b|\bnumber of\b')
+_LIMIT_CHIPS = {"just 3 places is enough", "show me 5 attractions", "i have time for many places"}
+
+# Generic enough to be free text ("tell me about cafes near here"); only taken as a
+# place name when the last bot message offered it as a suggestion.
+_OFFERED_PLACE_TEMPLATE = re.compile(r'^tell me about (?P<name>.+)$')
+# Templates produced by BotResponse.enhance_suggestions that name a place.
+_PLACE_TEMPLATES = [
+    re.compile(r"^i noticed (?P<name>.+) is really close to where i'm going\. what's it like\?$"),
+    re.compile(r"^i'm heading to a spot right near (?P<name>.+)\. any info you can share about it\?$"),
+    re.compile(r"^since i'll be in the area near (?P<name>.+), can you tell me a bit about it\?$"),
+    re.compile(r'^(?P<name>.+) is near my destination, tell me about it$'),
+    re.compile(r"^i'll be near (?P<name>.+)\. what can you tell me about this place\?$"),
+    re.compile(r"^looks like (?P<name>.+) is on my route\. what's worth knowing about it\?$"),
+]
+_OTHER_CATEGORIES_RE = re.compile(r'^show me other locations in categories: (?P<cats>.+)$')
+
+# Chips from BotResponse._generate_suggestions: (function, categories, limit).
+_CHIPS = {
+    "show me museums and art galleries": ('suggest_attractions', ['museum', 'art', 'gallery'], None),
+    "i'm interested in food and restaurants": ('suggest_attractions', ['restaurant'], None),
+    "parks and outdoor activities": ('suggest_attractions', ['park', 'outdoor'], None),
+    "historical and cultural sites": ('suggest_attractions', ['historical', 'heritage'], None),
+    "show me 5 attractions": ('suggest_attractions', ['attraction'], 5),
+    "tell me about top attractions": ('suggest_attractions', ['attraction'], None),
+    "help me plan my trip": ('itinerary_planning', [], None),
+    "help me plan a complete trip": ('itinerary_planning', [], None),
+}
+
+
+@lru_cache(maxsize=1)
+def _all_terms():
+    try:
+        with open(CATEGORIES_PATH, 'r', encoding='utf-8') as f:
+            terms = {t.strip().lower() for t in f.read().split(',') if t.strip()}
+    except OSError:
+        terms = set()
+    return frozenset(terms)
+
+
+def _vocabulary():
+    return _all_terms() - _AMBIGUOUS_TERMS
+
+
+@lru_cache(maxsize=1)
+def _few_shot_index():
+    index = {}
+    for examples in FEW_SHOT_EXAMPLES.values():
+        for example in examples:
+            index[_normalize(example['input'])] = example['output']
+    return index
+
+
+def _normalize(text):
+    return " ".join(str(text or "").lower().replace('’', "'").split())
+
+
+def _singular_forms(token):
+    forms = [token]
+    if token.endswith('ies'):
+        forms.append(token[:-3] + 'y')
+    if token.endswith('es'):
+        forms.append(token[:-2])
+    if token.endswith('s') and not token.endswith('ss'):
+        forms.append(token[:-1])
+    return forms
+
+
+def _term(token, vocab):
+    return next((f for f in _singular_forms(token) if f in vocab), None)
+
+
+def _find_categories(tokens):
+    vocab, terms = _vocabulary(), _all_terms()
+    found = []
+    i = 0
+    while i < len(tokens):
+        # Compound categories first, so "hot pot" is not dropped as two ambiguous words
+        if i + 1 < len(tokens) and {tokens[i], tokens[i + 1]} & _AMBIGUOUS_TERMS:
+            first, second = _term(tokens[i], terms), _term(tokens[i + 1], terms)
+            if first and second:
+                match = f"{tokens[i]} {second}"
+                if match not in found:
+                    found.append(match)
+                i += 2
+                continue
+        match = _term(tokens[i], vocab)
+        if match and match not in found:
+            found.append(match)
+        i += 1
+    return found
+
+
+def _names_a_place(user_input, tokens):
+    """
+    Whether the input looks like it names a specific place ("the War Remnants Museum",
+    "Starbucks Coffee near Ben Thanh") rather than a category: a run of two or more
+    capitalized words, or a word that is neither a category term nor filler.
+    """
+    run = 0
+    for word in str(user_input).split():
+        word = word.strip('.,!?;:"()')
+        run = run + 1 if word[:1].isupper() and word != 'I' else 0
+        if run >= 2:
+            return True
+    terms = _all_terms()
+    return any(not t.isdigit() and t not in _FILLER_WORDS and not any(f in terms for f in _singular_forms(t))
+               for t in tokens)
+
+
+def _last_bot_turn(conversation_history):
+    """(message, suggestions) of the most recent bot entry, normalized."""
+    for message in reversed(conversation_history or []):
+        if message.get('role') in ('bot', 'assistant'):
+            return _normalize(message.get('message')), [_normalize(s) for s in message.get('suggestions') or []]
+    return '', []
+
+
+def _limit_update(limit, bot_message, collected_information):
+    """The count the bot asked for, applied to the request it belongs to (None if unclear)."""
+    if set(re.findall(r"[a-z]+", bot_message)) & (_PLANNING_WORDS | {'visit'}):
+        return _intent('itinerary_planning', 0.95, limit=limit)
+    if collected_information.get('categories'):
+        categories = list(collected_information['categories'])
+        return _intent('suggest_attractions', 0.9, categories=categories, limit=limit)
+    return None
+
+
+def _intent(function, confidence, destination=None, categories=None, limit=None, **extra):
+    intent = {
+        'intent': function,
+        'suggested_function': function,
+        'confidence': confidence,
+        'slots': {'destination': destination, 'categories': categories or [], 'limit': limit},
+    }
+    intent.update(extra)
+    return intent
+
+
+def _result(intent, confidence, followup=False, clarify_question=None):
+    return {
+        'intents': [intent],
+        'context_action': 'merge',
+        'followup': followup,
+        'clarify_question': clarify_question,
+        'confidence': confidence,
+        'source': 'fast_path',
+    }
+
+
+def _clarify_category():
+    example = FEW_SHOT_EXAMPLES['clarification'][1]['output']
+    return copy.deepcopy(example['intents'][0]), example['clarify_question']
+
+
+def classify(user_input, collected_information=None, conversation_history=None):
+    """Return an extraction result with a `confidence` in [0, 1] (0 = leave it to the LLM)."""
+    text = _normalize(user_input)
+    collected_information = collected_information or {}
+    if not text:
+        return {'intents': [], 'confidence': 0.0, 'source': 'fast_path'}
+
+    # 1) Verbatim few-shot examples
+    example = _few_shot_index().get(text)
+    if example is not None:
+        result = copy.deepcopy(example)
+        result.setdefault('context_action', 'merge')
+        result['confidence'] = max(i.get('confidence', 0.0) for i in result['intents'])
+        result['source'] = 'fast_path'
+        return result
+
+    bot_message, offered = _last_bot_turn(conversation_history)
+
+    # 2) Bare limit update ("5", "just 3 places is enough"), only as the answer to a count question
+    number = _NUMBER_RE.match(text)
+    if number:
+        limit = int(number.group(1))
+        asked = bool(_COUNT_QUESTION_RE.search(bot_message)) or bool(_LIMIT_CHIPS & set(offered))
+        intent = _limit_update(limit, bot_message, collected_information) if asked and 0 < limit <= MAX_LIMIT else None
+        if intent is None:
+            return _result(_intent('ask_clarify', 0.0, limit=limit), 0.0)
+        return _result(intent, intent['confidence'])
+
+    # 3) Suggestion chips and place templates generated by BotResponse
+    chip = _CHIPS.get(text)
+    if chip is not None:
+        function, categories, limit = chip
+        return _result(_intent(function, 0.95, categories=list(categories), limit=limit), 0.95)
+    others = _OTHER_CATEGORIES_RE.match(text)
+    if others:
+        categories = [c.strip() for c in others.group('cats').split(',') if c.strip()]
+        return _result(_intent('suggest_attractions', 0.95, categories=categories), 0.95)
+    templates = list(_PLACE_TEMPLATES)
+    if text in offered:
+        templates.append(_OFFERED_PLACE_TEMPLATE)
+    for template in templates:
+        named = template.match(text)
+        if named:
+            # Keep the user's casing for the place name.
+            original = " ".join(str(user_input).replace('’', "'").split())
+            start, end = named.span('name')
+            name = original[start:end] if len(original) == len(text) else named.group('name')
+            return _result(_intent('search_by_name', 0.9, destination=name), 0.9)
+
+    tokens = re.findall(r"[a-z']+|\d+", text)
+    token_set = set(tokens)
+
+    # Corrections and other domains need the LLM (context_action, unsupported slots).
+    if token_set & MODIFIER_KEYWORDS:
+        return _result(_intent('ask_clarify', 0.3), 0.3)
+    if token_set & (DOMAIN_KEYWORDS['accommodation'] | DOMAIN_KEYWORDS['transport']):
+        return _result(_intent('ask_clarify', 0.0), 0.0)
+
+    if token_set and token_set <= _GREETINGS:
+        return _result(_intent('suggest_categories', 0.9), 0.9)
+
+    categories = _find_categories(tokens)
+    padded = f" {' '.join(tokens)} "
+    near = bool(token_set & _NEAR_WORDS) or any(f" {k} " in padded for k in VAGUE_LOCATION_KEYWORDS)
+    vague_category = any(f" {k} " in padded for k in VAGUE_CATEGORY_KEYWORDS)
+
+    # 4) Vague request with no category ("what's popular around here?")
+    if not categories and near and (vague_category or len(tokens) <= 6):
+        if collected_information.get('categories'):
+            return _result(_intent('suggest_attractions', 0.85, categories=list(collected_information['categories'])), 0.85)
+        intent, question = _clarify_category()
+        intent['confidence'] = 0.85
+        return _result(intent, 0.85, followup=True, clarify_question=question)
+
+    # 5) "<category> near me", "show me cafes", "museums"
+    if categories:
+        numbers = [int(t) for t in tokens if t.isdigit() and 0 < int(t) <= MAX_LIMIT]
+        limit = numbers[0] if len(numbers) == 1 else None
+        if token_set & _PLANNING_WORDS or _names_a_place(user_input, tokens):
+            # Trip planning and named places ("the War Remnants Museum") need the LLM
+            confidence = 0.5
+        elif near:
+            confidence = 0.9
+        elif any(p in text for p in _REQUEST_PHRASES) or len(tokens) <= 3:
+            confidence = 0.85
+        else:
+            confidence = 0.5
+        return _result(_intent('suggest_attractions', confidence, categories=categories, limit=limit), confidence)
+
+    return _result(_intent('ask_clarify', 0.0), 0.0)
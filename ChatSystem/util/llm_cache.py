@@ -0,0 +1,155 @@
+"""
+Content-addressed cache for Gemini intent extraction results.
+
+The key is a SHA-256 over the normalized user input, the collected
+information, the earlier-conversation summary and the trimmed history window
+that the extraction prompt actually sees. Identical turns, such as the canned suggestion chips, skip
+the LLM round trip. Entries expire after a TTL, and the in-memory tier is
+LRU-bounded. An optional SQLite file keeps entries across restarts and
+between worker processes.
+
+Configuration (environment / .env):
+    LLM_CACHE_SIZE   max in-memory entries (default 512, 0 disables caching)
+    LLM_CACHE_TTL    seconds an entry stays valid (default 3600)
+    LLM_CACHE_DB     path of the on-disk tier (unset = memory only)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .prompt_builder import HISTORY_WINDOW
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 3600
+
+
+def normalize_input(text):
+    return " ".join(str(text or "").casefold().split())
+
+
+def make_key(user_input, collected_information=None, conversation_history=None, window=HISTORY_WINDOW,
+             history_summary=None):
+    """Stable hash of everything the extraction prompt depends on."""
+    history = [
+        [msg.get('role', 'unknown'), msg.get('message', '')]
+        for msg in (conversation_history or [])[-window:]
+    ] if window > 0 else []
+    parts = [normalize_input(user_input), collected_information or {}, history]
+    if history_summary:
+        parts.append(history_summary)
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(result):
+    """Only successful extractions are cached; errors and blocked responses are retried."""
+    return isinstance(result, dict) and 'error' not in result and bool(result.get('intents'))
+
+
+class LLMResultCache:
+    """TTL + LRU memory cache with an optional SQLite tier."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, db_path=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key):
+        """Return a fresh copy of the cached result for `key`, or None."""
+        if not self.enabled:
+            return None
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Stored as JSON so callers can mutate what they get back.
+        return json.loads(entry[1])
+
+    def set(self, key, result):
+        if not self.enabled:
+            return
+        entry = (self.clock() + self.ttl_seconds, json.dumps(result, ensure_ascii=False))
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, entry[1], entry[0]),
+                )
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (self.clock(),))
+                self._conn.commit()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "persistent": self._conn is not None,
+        }
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = LLMResultCache(
+                    max_entries=int(os.getenv('LLM_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+                    ttl_seconds=float(os.getenv('LLM_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                    db_path=os.getenv('LLM_CACHE_DB') or None,
+                )
+    return _CACHE
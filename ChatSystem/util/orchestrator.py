@@ -3,17 +3,212 @@ Single-Pass Information Extraction
 Context-aware LLM call with conversation history and collected information
 """
 
+import asyncio
 import json
+import random
 import requests
 import os
+import threading
+import time
+import weakref
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+try:
+    import httpx
+except ImportError:  # async calls then run the requests session in a worker thread
+    httpx = None
 from .translator import translate, detectLanguage
+from .category_variants import match_category, valid_categories as get_valid_categories
+from .llm_cache import get_llm_cache, is_cacheable, make_key
+from .prompt_builder import get_extraction_prompt
+from .fast_path import FAST_PATH_THRESHOLD, classify
 
 load_dotenv()
 GEMINI_KEY = os.getenv('GEMINI_KEY')
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com/v1beta')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', 2))
 
+# (connect, read) timeouts in seconds. Extraction can take a while to generate;
+# suggestions are optional and fall back to canned ones quickly.
+EXTRACTION_TIMEOUT = (5, 40)
+SUGGESTION_TIMEOUT = (3, 10)
+# Wall-clock budget in seconds for one extraction, retries and backoff included.
+# Later attempts get only what is left, so a slow first attempt is not repeated in full.
+EXTRACTION_DEADLINE = float(os.getenv('GEMINI_DEADLINE', 45))
 
-def extract_information_single_pass(user_input, collected_information=None, conversation_history=None):
+# Statuses worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(Exception):
+    """Non-retryable or exhausted Gemini API failure. `response` is the last HTTP response, if any."""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class GeminiClient:
+    """
+    Gemini generateContent client over a pooled keep-alive session.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with full-jitter
+    exponential backoff (honouring a numeric Retry-After), within an optional
+    overall `deadline` per call. The transport is
+    pluggable: pass `base_url` to target a stub server, or `session` (anything
+    with a requests-compatible `post`) to replace HTTP entirely.
+    """
+
+    def __init__(self, api_key=None, base_url=GEMINI_BASE_URL, model=GEMINI_MODEL, session=None,
+                 max_retries=GEMINI_MAX_RETRIES, backoff_base=0.5, backoff_max=8.0, pool_size=10, sleep=time.sleep,
+                 clock=time.monotonic):
+        self.api_key = api_key if api_key is not None else GEMINI_KEY
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.max_retries = self._check_retries(max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.clock = clock
+        # An injected session replaces HTTP for async calls too
+        self._custom_session = session is not None
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        # httpx clients are bound to the event loop they were created on: keep one per
+        # loop, dropped together with the loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"{self.base_url}/models/{self.model}:generateContent"
+
+    @staticmethod
+    def _check_retries(max_retries):
+        if max_retries < 0:
+            raise ValueError(f"max_retries must be >= 0, got {max_retries}")
+        return max_retries
+
+    def _timeout_left(self, timeout, deadline_at):
+        """(connect, read) for the next attempt, cut to what is left of the deadline."""
+        if deadline_at is None:
+            return timeout
+        left = deadline_at - self.clock()
+        if left <= 0:
+            raise GeminiError("Gemini deadline exceeded")
+        return tuple(min(t, left) for t in timeout)
+
+    def _may_retry(self, last_attempt, deadline_at, delay):
+        """Whether another attempt fits: retries remain and the backoff ends before the deadline."""
+        return not last_attempt and (deadline_at is None or self.clock() + delay < deadline_at)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def generate(self, payload, timeout=EXTRACTION_TIMEOUT, max_retries=None, deadline=None):
+        """
+        POST `payload` to generateContent and return the decoded JSON response.
+        With `deadline` (seconds), no attempt or backoff runs past that budget.
+        """
+        retries = self._check_retries(self.max_retries if max_retries is None else max_retries)
+        deadline_at = self.clock() + deadline if deadline is not None else None
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            try:
+                response = self.session.post(self.url, params={'key': self.api_key},
+                                             headers={'Content-Type': 'application/json'},
+                                             json=payload, timeout=self._timeout_left(timeout, deadline_at))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = self._backoff(attempt)
+                if not self._may_retry(last_attempt, deadline_at, delay):
+                    raise
+                print(f"⚠️ Gemini request failed ({type(e).__name__}), retrying")
+                self.sleep(delay)
+                continue
+
+            if response.status_code == 200:
+                return response.json()
+            delay = self._backoff(attempt, response)
+            if response.status_code not in RETRY_STATUSES or not self._may_retry(last_attempt, deadline_at, delay):
+                raise GeminiError(f"Gemini API error: {response.status_code}", response)
+            print(f"⚠️ Gemini API returned {response.status_code}, retrying")
+            self.sleep(delay)
+
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                # httpx's default pool allows 100 concurrent connections with keep-alive
+                client = self._async_clients[loop] = httpx.AsyncClient()
+            return client
+
+    async def generate_async(self, payload, timeout=EXTRACTION_TIMEOUT, max_retries=None, deadline=None):
+        """Awaitable generate(): httpx.AsyncClient when available, else the sync session in a thread."""
+        if httpx is None or self._custom_session:
+            return await asyncio.to_thread(self.generate, payload, timeout, max_retries, deadline)
+
+        client = self._get_async_client()
+        retries = self._check_retries(self.max_retries if max_retries is None else max_retries)
+        deadline_at = self.clock() + deadline if deadline is not None else None
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            connect_timeout, read_timeout = self._timeout_left(timeout, deadline_at)
+            try:
+                # (connect, read, write, pool), accepted by old and new httpx alike
+                response = await client.post(self.url, params={'key': self.api_key}, json=payload,
+                                             timeout=(connect_timeout, read_timeout, read_timeout, connect_timeout))
+            except httpx.HTTPError as e:
+                delay = self._backoff(attempt)
+                if not self._may_retry(last_attempt, deadline_at, delay):
+                    raise
+                print(f"⚠️ Gemini request failed ({type(e).__name__}), retrying")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code == 200:
+                return response.json()
+            delay = self._backoff(attempt, response)
+            if response.status_code not in RETRY_STATUSES or not self._may_retry(last_attempt, deadline_at, delay):
+                raise GeminiError(f"Gemini API error: {response.status_code}", response)
+            print(f"⚠️ Gemini API returned {response.status_code}, retrying")
+            await asyncio.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async client of the running event loop."""
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Process-wide GeminiClient, so turns reuse pooled connections."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient()
+    return _client
+
+
+def extract_information_single_pass(user_input, collected_information=None, conversation_history=None,
+                                    history_summary=None):
     """
     Single-pass information extraction from user query.
     
@@ -21,160 +216,106 @@ def extract_information_single_pass(user_input, collected_information=None, conv
         user_input (str): User's query
         collected_information (dict): Previously collected slot data
         conversation_history (list): Recent conversation messages
+        history_summary (dict): Summary of the messages before them (HistoryManager.prompt_summary)
     
     Returns:
         dict: Extracted information in JSON format
     """
-    
-    # Build collected information context (compact format)
-    collected_info_str = ""
-    if collected_information:
-        collected_info_str = "\n\nCOLLECTED INFO:\n"
-        collected_info_str += json.dumps(collected_information, ensure_ascii=False)
-    
-    # Build conversation history context (last 5 messages only to reduce prompt length)
-    context_str = ""
-    if conversation_history:
-        num_messages = min(5, len(conversation_history))  # Reduced from 10 to 5
-        context_str = f"\n\nRECENT CONVERSATION (last {num_messages} messages):\n"
-        for msg in conversation_history[-num_messages:]:
-            role = msg.get('role', 'unknown')
-            message = msg.get('message', '')
-            context_str += f"{role}: {message}\n"
-    
+    data = _extraction_payload(user_input, collected_information, conversation_history, history_summary)
+    try:
+        result = get_gemini_client().generate(data, timeout=EXTRACTION_TIMEOUT, deadline=EXTRACTION_DEADLINE)
+        return _extraction_result(result, user_input)
+    except Exception as e:
+        return _extraction_error(e)
+
+
+async def extract_information_single_pass_async(user_input, collected_information=None, conversation_history=None,
+                                                history_summary=None):
+    """Async extract_information_single_pass: the Gemini call is awaited instead of blocking."""
+    data = _extraction_payload(user_input, collected_information, conversation_history, history_summary)
+    try:
+        result = await get_gemini_client().generate_async(data, timeout=EXTRACTION_TIMEOUT,
+                                                          deadline=EXTRACTION_DEADLINE)
+        return _extraction_result(result, user_input)
+    except Exception as e:
+        return _extraction_error(e)
+
+
+def _extraction_payload(user_input, collected_information, conversation_history, history_summary=None):
+    """generateContent request body for the extraction prompt."""
     print("user input for extraction:", user_input)
-    # Simplified schema - only essential fields
-    schema = """
-    {
-        "intents": [
-            {
-                "intent": "string",
-                "suggested_function": "string",
-                "slots": {
-                    "destination": null,
-                    "categories": [],
-                    "limit": null
-                }
-            }
-        ],
-        "context_action": "merge",
-        "followup": false,
-        "clarify_question": null
+    # Static prefix is prebuilt; only the context tail is formatted per request
+    extraction_prompt = get_extraction_prompt().render(user_input, collected_information, conversation_history,
+                                                       history_summary)
+
+    data = {
+        'contents': [{
+            'parts': [{
+                'text': extraction_prompt
+            }]
+        }],
+        'generationConfig': {
+            'temperature': 0.1,
+            'topP': 0.95,
+            'topK': 40,
+            'maxOutputTokens': 2500,  # Increased to prevent truncation
+            'responseMimeType': 'application/json',
+            'candidateCount': 1
+        },
+        'systemInstruction': {
+            'parts': [{
+                'text': 'You are a JSON extraction expert. Return only valid JSON. No explanations.'
+            }]
+        },
+        'safetySettings': [
+            {'category': 'HARM_CATEGORY_HARASSMENT', 'threshold': 'BLOCK_NONE'},
+            {'category': 'HARM_CATEGORY_HATE_SPEECH', 'threshold': 'BLOCK_NONE'},
+            {'category': 'HARM_CATEGORY_SEXUALLY_EXPLICIT', 'threshold': 'BLOCK_NONE'},
+            {'category': 'HARM_CATEGORY_DANGEROUS_CONTENT', 'threshold': 'BLOCK_NONE'}
+        ]
     }
-    """
-    
-    # Build few-shot examples
-    examples = _build_relevant_examples()
-    
-    extraction_prompt = f"""Extract travel information from user query into JSON format.
-
-SCHEMA:
-{schema}
-
-FUNCTIONS:
-- itinerary_planning: Plan trip itinerary (needs limit, categories optional)
-- suggest_categories: Suggest place categories
-- suggest_attractions: Suggest specific attractions
-- search_by_name: Search place by name
-- ask_clarify: Ask for clarification
-
-FIELDS:
-- destination: City/area (e.g., "Hanoi", "Ho Chi Minh City")
-- categories: List of place types (e.g., ["museum", "cafe", "park"])
-- limit: Number of places (integer)
-- context_action: How to handle collected info
-  * "merge": Add to existing collected info (default)
-  * "reset": Clear all collected info and start fresh
-  * "replace": Replace specific fields only
-
-RULES:
-- Extract destination, categories, limit from query
-- Set followup=true if info is missing
-- Use COLLECTED INFO and HISTORY to avoid redundant questions
-- Set context_action="reset" if user changes topic completely (e.g., "actually, let's go somewhere else" or "never mind, I want to visit a different place")
-- Set context_action="merge" for adding/refining current context
-- Set context_action="replace" when user corrects previous information
-{examples}
-{collected_info_str}
-{context_str}
-
-USER QUERY: "{user_input}"
-"""
+    return data
 
-    try:
-        url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}'
-        
-        headers = {'Content-Type': 'application/json'}
-        
-        data = {
-            'contents': [{
-                'parts': [{
-                    'text': extraction_prompt
-                }]
-            }],
-            'generationConfig': {
-                'temperature': 0.1,
-                'topP': 0.95,
-                'topK': 40,
-                'maxOutputTokens': 2500,  # Increased to prevent truncation
-                'responseMimeType': 'application/json',
-                'candidateCount': 1
-            },
-            'systemInstruction': {
-                'parts': [{
-                    'text': 'You are a JSON extraction expert. Return only valid JSON. No explanations.'
-                }]
-            },
-            'safetySettings': [
-                {'category': 'HARM_CATEGORY_HARASSMENT', 'threshold': 'BLOCK_NONE'},
-                {'category': 'HARM_CATEGORY_HATE_SPEECH', 'threshold': 'BLOCK_NONE'},
-                {'category': 'HARM_CATEGORY_SEXUALLY_EXPLICIT', 'threshold': 'BLOCK_NONE'},
-                {'category': 'HARM_CATEGORY_DANGEROUS_CONTENT', 'threshold': 'BLOCK_NONE'}
-            ]
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=40)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Enhanced logging to debug JSON parsing issues
-            print(f"📡 Gemini API Response Status: 200")
-            print(f"🔍 Full API response structure: {json.dumps(result, indent=2, ensure_ascii=False)[:1000]}")
-            
-            # Check if response has expected structure
-            if 'candidates' not in result or not result['candidates']:
-                print(f"⚠️ No candidates in response - likely blocked by safety filters")
-                return {
-                    'intents': [],
-                    'followup': True,
-                    'clarify_question': 'I had trouble processing that. Could you rephrase?'
-                }
-            
-            extracted_text = result['candidates'][0]['content']['parts'][0]['text']
-            print(f"📄 Raw extracted text:\n{extracted_text}\n")
-            
-            # Clean and extract JSON from response
-            extracted_info = _parse_json_response(extracted_text, user_input)
-            return extracted_info
-        else:
-            raise Exception(f"Gemini API error: {response.status_code}")
+
+def _extraction_result(result, user_input):
+    """Extracted information from a generateContent response."""
+    # Enhanced logging to debug JSON parsing issues
+    print(f"📡 Gemini API Response Status: 200")
+    print(f"🔍 Full API response structure: {json.dumps(result, indent=2, ensure_ascii=False)[:1000]}")
     
-    except Exception as e:
-        print(f"❌ Error in information extraction: {e}")
-        print(f"Error type: {type(e).__name__}")
-        
-        # Log more details for debugging
-        if hasattr(e, 'response'):
-            print(f"Response status: {e.response.status_code if hasattr(e.response, 'status_code') else 'N/A'}")
-            print(f"Response text: {e.response.text[:500] if hasattr(e.response, 'text') else 'N/A'}")
-        
+    # Check if response has expected structure
+    if 'candidates' not in result or not result['candidates']:
+        print(f"⚠️ No candidates in response - likely blocked by safety filters")
         return {
             'intents': [],
             'followup': True,
-            'clarify_question': 'I encountered an error processing your request. Could you please rephrase?',
-            'error': str(e)
+            'clarify_question': 'I had trouble processing that. Could you rephrase?'
         }
+    
+    extracted_text = result['candidates'][0]['content']['parts'][0]['text']
+    print(f"📄 Raw extracted text:\n{extracted_text}\n")
+    
+    # Clean and extract JSON from response
+    extracted_info = _parse_json_response(extracted_text, user_input)
+    return extracted_info
+
+
+def _extraction_error(e):
+    """Fallback result for a failed extraction call (never cached)."""
+    print(f"❌ Error in information extraction: {e}")
+    print(f"Error type: {type(e).__name__}")
+    
+    # Log more details for debugging
+    if hasattr(e, 'response'):
+        print(f"Response status: {e.response.status_code if hasattr(e.response, 'status_code') else 'N/A'}")
+        print(f"Response text: {e.response.text[:500] if hasattr(e.response, 'text') else 'N/A'}")
+    
+    return {
+        'intents': [],
+        'followup': True,
+        'clarify_question': 'I encountered an error processing your request. Could you please rephrase?',
+        'error': str(e)
+    }
 
 
 def _parse_json_response(text, user_input):
@@ -249,23 +390,6 @@ def _parse_json_response(text, user_input):
     }
 
 
-def _build_relevant_examples():
-    """Build relevant few-shot examples."""
-    from .prompt_config import FEW_SHOT_EXAMPLES
-    
-    examples_text = "\n\nEXAMPLES:\n"
-    
-    # Include one example from each important category
-    example_types = ['itinerary', 'clarification', 'general']
-    
-    for ex_type in example_types:
-        if ex_type in FEW_SHOT_EXAMPLES and FEW_SHOT_EXAMPLES[ex_type]:
-            ex = FEW_SHOT_EXAMPLES[ex_type][0]
-            examples_text += f"\nInput: \"{ex['input']}\"\nOutput:\n{json.dumps(ex['output'], indent=2)}\n"
-    
-    return examples_text
-
-
 def generate_dynamic_suggestions(context, question, num_suggestions=3):
     """
     Generate dynamic suggestions using LLM based on conversation context.
@@ -278,8 +402,6 @@ def generate_dynamic_suggestions(context, question, num_suggestions=3):
     Returns:
         list: List of suggested responses
     """
-    url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}'
-    
     prompt = f"""Based on the following context and question, generate {num_suggestions} relevant, helpful, and diverse response suggestions that a user might want to choose from.
 
 Context: {context}
@@ -309,10 +431,8 @@ Example format: ["suggestion 1", "suggestion 2", "suggestion 3"]"""
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        
-        result = response.json()
+        # No retries: the canned fallback below is better than a slow turn
+        result = get_gemini_client().generate(payload, timeout=SUGGESTION_TIMEOUT, max_retries=0)
         text = result['candidates'][0]['content']['parts'][0]['text'].strip()
         
         # Extract JSON array from response
@@ -329,7 +449,8 @@ Example format: ["suggestion 1", "suggestion 2", "suggestion 3"]"""
     return ["Tell me more", "Skip this", "Continue"]
 
 
-def extract_info_with_orchestrator(user_input, collected_information, conversation_history=None):
+def extract_info_with_orchestrator(user_input, collected_information, conversation_history=None,
+                                   history_summary=None):
     """
     Main orchestrator function implementing single-pass extraction.
     
@@ -337,11 +458,41 @@ def extract_info_with_orchestrator(user_input, collected_information, conversati
         user_input (str): User's query
         collected_information (dict): Previously collected slot data
         conversation_history (list): Recent conversation messages
+        history_summary (dict): Summary of the messages before them (HistoryManager.prompt_summary)
     
     Returns:
         dict: Extracted information in JSON format
     """
     
+    result = _early_extraction(user_input, collected_information, conversation_history)
+    if result is not None:
+        return result
+
+    cache_key, result = _cached_extraction(user_input, collected_information, conversation_history, history_summary)
+    if result is None:
+        result = extract_information_single_pass(user_input, collected_information, conversation_history,
+                                                 history_summary)
+        _cache_extraction(cache_key, result)
+    return _finalize_extraction(result)
+
+
+async def extract_info_with_orchestrator_async(user_input, collected_information, conversation_history=None,
+                                               history_summary=None):
+    """Async extract_info_with_orchestrator: same fast path, cache and post-processing, awaited LLM call."""
+    result = _early_extraction(user_input, collected_information, conversation_history)
+    if result is not None:
+        return result
+
+    cache_key, result = _cached_extraction(user_input, collected_information, conversation_history, history_summary)
+    if result is None:
+        result = await extract_information_single_pass_async(user_input, collected_information, conversation_history,
+                                                             history_summary)
+        _cache_extraction(cache_key, result)
+    return _finalize_extraction(result)
+
+
+def _early_extraction(user_input, collected_information, conversation_history):
+    """Result for turns that need no LLM call (empty input, confident fast path), else None."""
     if not user_input or not user_input.strip():
         return {
             'intents': [],
@@ -349,22 +500,39 @@ def extract_info_with_orchestrator(user_input, collected_information, conversati
             'clarify_question': 'Please provide more information about your travel plans.'
         }
     
-    print("🔍 Extracting information...")
-    result = extract_information_single_pass(user_input, collected_information, conversation_history)
+    # Trivially classifiable turns (numbers, chips, "<category> near me") skip the LLM
+    fast_result = classify(user_input, collected_information, conversation_history)
+    if fast_result.get('confidence', 0.0) >= FAST_PATH_THRESHOLD:
+        print(f"⚡ Fast-path classification (confidence {fast_result['confidence']:.2f})\n")
+        return fast_result
+    return None
+
+
+def _cached_extraction(user_input, collected_information, conversation_history, history_summary=None):
+    """(cache key, cached extraction or None). Identical turns (e.g. suggestion chips) reuse the previous extraction."""
+    cache_key = make_key(user_input, collected_information, conversation_history, history_summary=history_summary)
+    result = get_llm_cache().get(cache_key)
+    if result is not None:
+        print("⚡ Extraction served from cache\n")
+    else:
+        print("🔍 Extracting information...")
+    return cache_key, result
+
+
+def _cache_extraction(cache_key, result):
+    """Store a fresh LLM extraction under `cache_key` if it succeeded."""
+    if is_cacheable(result):
+        get_llm_cache().set(cache_key, result)
     print("✅ Extraction complete\n")
-    
+
+
+def _finalize_extraction(result):
+    """Normalize field names and map categories onto categories.txt."""
     # Normalize field names from LLM output
     result = _normalize_field_names(result)
     
-    # Load valid categories from categories.txt
-    categories_file_path = os.path.join(os.path.dirname(__file__), 'categories.txt')
-    valid_categories = []
-    try:
-        with open(categories_file_path, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            valid_categories = [cat.strip() for cat in content.split(',')]
-    except Exception as e:
-        print(f"⚠️ Could not load categories.txt: {e}")
+    # Valid categories from categories.txt (loaded once, reloaded on change)
+    valid_categories = get_valid_categories()
     
     # Match and replace categories in the result
     if valid_categories and 'intents' in result:
@@ -456,7 +624,9 @@ def _normalize_field_names(result):
 def _find_best_category_match(input_category, valid_categories):
     """
     Find the best matching category from the valid categories list.
-    Enhanced with translation and plural/singular handling.
+    Uses the precomputed variant index (synonyms in English and Vietnamese,
+    plural/singular forms, misspellings) with a bounded fuzzy fallback; no
+    translation calls are made.
     
     Parameters:
         input_category (str): Category extracted from user input
@@ -468,123 +638,8 @@ def _find_best_category_match(input_category, valid_categories):
     if not input_category or not valid_categories:
         return None
     
-    input_lower = input_category.lower().strip()
-    
-    # Generate variants of the input category
-    variants = _generate_category_variants(input_lower)
-    
-    # Try exact match with all variants
-    for variant in variants:
-        if variant in valid_categories:
-            return variant
-    
-    # Partial match - check if any variant is contained in valid category or vice versa
-    for variant in variants:
-        for valid_cat in valid_categories:
-            if variant in valid_cat or valid_cat in variant:
-                return valid_cat
-    
-    # Use difflib for fuzzy matching with all variants
-    from difflib import get_close_matches
-    for variant in variants:
-        matches = get_close_matches(variant, valid_categories, n=1, cutoff=0.6)
-        if matches:
-            return matches[0]
-    
-    return None
-
-
-def _generate_category_variants(input_category):
-    """
-    Generate variants of input category including:
-    - Original
-    - Translated (Vietnamese <-> English)
-    - Plural/Singular forms
-    
-    Parameters:
-        input_category (str): Original category string
-    
-    Returns:
-        list: List of category variants
-    """
-    variants = set()
-    input_lower = input_category.lower().strip()
-    variants.add(input_lower)
-    
-    # Add plural/singular variants
-    variants.update(_get_plural_singular_variants(input_lower))
-    
-    # Try translation Vietnamese -> English
-    try:
-        translated_en = translate(input_category, target_language='en')
-        if translated_en and translated_en.lower() != input_lower:
-            translated_en_lower = translated_en.lower().strip()
-            variants.add(translated_en_lower)
-            # Add plural/singular of translated English
-            variants.update(_get_plural_singular_variants(translated_en_lower))
-    except Exception as e:
-        print(f"⚠️ Translation to English failed: {e}")
-    
-    # Try translation English -> Vietnamese
-    try:
-        translated_vi = translate(input_category, target_language='vi')
-        if translated_vi and translated_vi.lower() != input_lower:
-            translated_vi_lower = translated_vi.lower().strip()
-            variants.add(translated_vi_lower)
-            # Translate Vietnamese back to English for more variants
-            try:
-                back_translated = translate(translated_vi, target_language='en')
-                if back_translated:
-                    back_translated_lower = back_translated.lower().strip()
-                    variants.add(back_translated_lower)
-                    variants.update(_get_plural_singular_variants(back_translated_lower))
-            except:
-                pass
-    except Exception as e:
-        print(f"⚠️ Translation to Vietnamese failed: {e}")
-    
-    return list(variants)
-
-
-def _get_plural_singular_variants(word):
-    """
-    Generate plural and singular variants of an English word.
-    
-    Parameters:
-        word (str): Input word
-    
-    Returns:
-        set: Set of variants (plural and singular forms)
-    """
-    variants = set()
-    word_lower = word.lower().strip()
-    
-    # Rules for plural -> singular
-    if word_lower.endswith('ies'):
-        # galleries -> gallery, bakeries -> bakery
-        variants.add(word_lower[:-3] + 'y')
-    elif word_lower.endswith('ses'):
-        # churches -> church, boxes -> box
-        variants.add(word_lower[:-2])
-    elif word_lower.endswith('shes') or word_lower.endswith('ches'):
-        # dishes -> dish, churches -> church
-        variants.add(word_lower[:-2])
-    elif word_lower.endswith('s') and not word_lower.endswith('ss'):
-        # museums -> museum, cafes -> cafe
-        variants.add(word_lower[:-1])
-    
-    # Rules for singular -> plural
-    if word_lower.endswith('y') and len(word_lower) > 1 and word_lower[-2] not in 'aeiou':
-        # gallery -> galleries, bakery -> bakeries
-        variants.add(word_lower[:-1] + 'ies')
-    elif word_lower.endswith(('s', 'x', 'z', 'ch', 'sh')):
-        # church -> churches, box -> boxes
-        variants.add(word_lower + 'es')
-    elif not word_lower.endswith('s'):
-        # museum -> museums, cafe -> cafes
-        variants.add(word_lower + 's')
-    
-    return variants
+    best_match = match_category(input_category)
+    return best_match if best_match in valid_categories else None
 
 
 # Example usage
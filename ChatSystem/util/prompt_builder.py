@@ -0,0 +1,171 @@
+"""
+Extraction prompt assembly.
+
+The schema, function list, rules and few-shot examples of the extraction
+prompt do not change between turns, so they are rendered once into a static
+prefix. Each request only formats the dynamic tail: the collected
+information, a summary of the conversation before the history window (see
+`HistoryManager.prompt_summary`), the last HISTORY_WINDOW messages and the
+user query. `prompt_config.py` is
+reloaded, and the prefix rebuilt, when the file changes on disk. The category
+vocabulary is reloaded the same way; see `category_variants.get_matcher`.
+"""
+
+import importlib
+import json
+import os
+import threading
+
+from . import prompt_config
+
+PROMPT_CONFIG_PATH = prompt_config.__file__
+
+# Recent messages shown verbatim in the prompt (and hashed into the LLM cache key).
+HISTORY_WINDOW = 5
+
+# Few-shot example groups included in the prompt (first example of each).
+EXAMPLE_TYPES = ['itinerary', 'clarification', 'general']
+
+SCHEMA = """
+    {
+        "intents": [
+            {
+                "intent": "string",
+                "suggested_function": "string",
+                "slots": {
+                    "destination": null,
+                    "categories": [],
+                    "limit": null
+                }
+            }
+        ],
+        "context_action": "merge",
+        "followup": false,
+        "clarify_question": null
+    }
+    """
+
+PROMPT_HEADER = """Extract travel information from user query into JSON format.
+
+SCHEMA:
+{schema}
+
+FUNCTIONS:
+- itinerary_planning: Plan trip itinerary (needs limit, categories optional)
+- suggest_categories: Suggest place categories
+- suggest_attractions: Suggest specific attractions
+- search_by_name: Search place by name
+- ask_clarify: Ask for clarification
+
+FIELDS:
+- destination: City/area (e.g., "Hanoi", "Ho Chi Minh City")
+- categories: List of place types (e.g., ["museum", "cafe", "park"])
+- limit: Number of places (integer)
+- context_action: How to handle collected info
+  * "merge": Add to existing collected info (default)
+  * "reset": Clear all collected info and start fresh
+  * "replace": Replace specific fields only
+
+RULES:
+- Extract destination, categories, limit from query
+- Set followup=true if info is missing
+- Use COLLECTED INFO and HISTORY to avoid redundant questions
+- Set context_action="reset" if user changes topic completely (e.g., "actually, let's go somewhere else" or "never mind, I want to visit a different place")
+- Set context_action="merge" for adding/refining current context
+- Set context_action="replace" when user corrects previous information
+{examples}
+"""
+
+
+def build_examples(few_shot_examples, example_types=EXAMPLE_TYPES):
+    """Render the few-shot examples section of the prompt."""
+    examples_text = "\n\nEXAMPLES:\n"
+    for ex_type in example_types:
+        if ex_type in few_shot_examples and few_shot_examples[ex_type]:
+            ex = few_shot_examples[ex_type][0]
+            examples_text += f"\nInput: \"{ex['input']}\"\nOutput:\n{json.dumps(ex['output'], indent=2)}\n"
+    return examples_text
+
+
+def build_static_prefix(few_shot_examples):
+    return PROMPT_HEADER.format(schema=SCHEMA, examples=build_examples(few_shot_examples))
+
+
+def format_history_summary(history_summary):
+    """The EARLIER IN CONVERSATION section for messages older than the history window."""
+    if not history_summary:
+        return ""
+    summary_str = f"\n\nEARLIER IN CONVERSATION ({history_summary.get('summarized_messages', 0)} older messages):\n"
+    if history_summary.get('confirmed_places'):
+        summary_str += "Places added to the trip: " + ", ".join(history_summary['confirmed_places']) + "\n"
+    if history_summary.get('rejected_places'):
+        summary_str += "Places offered but not added: " + ", ".join(history_summary['rejected_places']) + "\n"
+    return summary_str
+
+
+def format_dynamic_tail(user_input, collected_information=None, conversation_history=None, history_summary=None):
+    """Collected info, the earlier-conversation summary, recent history and the user query."""
+    collected_info_str = ""
+    if collected_information:
+        collected_info_str = "\n\nCOLLECTED INFO:\n"
+        collected_info_str += json.dumps(collected_information, ensure_ascii=False)
+    collected_info_str += format_history_summary(history_summary)
+
+    # Last HISTORY_WINDOW messages only, to keep the prompt short
+    context_str = ""
+    if conversation_history:
+        num_messages = min(HISTORY_WINDOW, len(conversation_history))
+        context_str = f"\n\nRECENT CONVERSATION (last {num_messages} messages):\n"
+        for msg in conversation_history[-num_messages:]:
+            context_str += f"{msg.get('role', 'unknown')}: {msg.get('message', '')}\n"
+
+    return f"{collected_info_str}\n{context_str}\n\nUSER QUERY: \"{user_input}\"\n"
+
+
+class ExtractionPrompt:
+    """Static prompt prefix, rebuilt when `prompt_config.py` changes."""
+
+    def __init__(self, config_path=PROMPT_CONFIG_PATH):
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._mtime = self._config_mtime()
+        self._prefix = build_static_prefix(prompt_config.FEW_SHOT_EXAMPLES)
+
+    def _config_mtime(self):
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+
+    @property
+    def prefix(self):
+        mtime = self._config_mtime()
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        importlib.reload(prompt_config)
+                        self._prefix = build_static_prefix(prompt_config.FEW_SHOT_EXAMPLES)
+                    except Exception as e:
+                        # Keep serving the last good prompt until the file is fixed.
+                        print(f"⚠️ Could not reload prompt_config.py: {e}")
+                    self._mtime = mtime
+        return self._prefix
+
+    def render(self, user_input, collected_information=None, conversation_history=None, history_summary=None):
+        return self.prefix + format_dynamic_tail(user_input, collected_information, conversation_history,
+                                                 history_summary)
+
+
+_prompt = None
+_prompt_lock = threading.Lock()
+
+
+def get_extraction_prompt():
+    """Process-wide ExtractionPrompt, built on first use."""
+    global _prompt
+    if _prompt is None:
+        with _prompt_lock:
+            if _prompt is None:
+                _prompt = ExtractionPrompt()
+    return _prompt
@@ -40,20 +40,113 @@
 
 from deep_translator import GoogleTranslator
 from langdetect import detect, DetectorFactory, LangDetectException
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
 import re
+import sqlite3
+import threading
 
 # Cài đặt seed để kết quả nhận diện ngôn ngữ ổn định hơn (giống random seed)
 DetectorFactory.seed = 0
 
+# Upper bound on concurrent translation requests made by translate_batch.
+MAX_TRANSLATION_WORKERS = int(os.getenv('TRANSLATION_WORKERS', 8))
+
+
+class TranslationMemo:
+    """
+    Memo of detected languages and translations keyed by a hash of the text.
+
+    An LRU dict in memory, optionally backed by a SQLite file (TRANSLATION_CACHE_DB)
+    so translations survive restarts. Only successful translations are stored.
+    """
+
+    def __init__(self, max_entries=4096, db_path=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS translation_memo (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.commit()
+
+    @staticmethod
+    def key(kind, text, target=''):
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"{kind}:{target}:{digest}"
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None and self._conn is not None:
+                row = self._conn.execute("SELECT value FROM translation_memo WHERE key = ?", (key,)).fetchone()
+                if row:
+                    value = row[0]
+                    self._remember(key, value)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO translation_memo (key, value) VALUES (?, ?)", (key, value))
+                self._conn.commit()
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_translation_memo():
+    """Process-wide TranslationMemo configured from TRANSLATION_CACHE_SIZE / TRANSLATION_CACHE_DB."""
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = TranslationMemo(
+                    max_entries=int(os.getenv('TRANSLATION_CACHE_SIZE', 4096)),
+                    db_path=os.getenv('TRANSLATION_CACHE_DB') or None,
+                )
+    return _memo
+
+
 def detectLanguage(text):
     """
     Detect the primary language of text, with improved handling for mixed-language content.
     Returns language code (e.g., 'vi', 'en').
     
     For tourism apps: Handles English text with Vietnamese place names gracefully.
+    Results are memoized per text (see TranslationMemo).
     """
     if not text or not text.strip():
         return 'en'
+
+    memo = get_translation_memo()
+    key = memo.key('detect', text)
+    lang = memo.get(key)
+    if lang is None:
+        lang = _detect_language_uncached(text)
+        memo.set(key, lang)
+    return lang
+
+
+def _detect_language_uncached(text):
     
     try:
         # Remove numbers, punctuation for better detection
@@ -93,37 +186,72 @@ def translate(text, target_language='en'):
     Translate text with smart handling for proper nouns and mixed-language content.
     
     For tourism apps: Preserves Vietnamese place names when translating to English.
-    Returns translated text (String).
+    Returns translated text (String). Successful translations are memoized per
+    (text, target language); on error the original text is returned and nothing is stored.
     """
     if not text or not text.strip():
         return text
-    
+
+    memo = get_translation_memo()
+    key = memo.key('translate', text, target_language)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        # Detect source language
-        source_lang = detectLanguage(text)
-        
-        # No translation needed if already in target language
-        # This is crucial: English text with Vietnamese names should NOT be translated
-        if source_lang == target_language:
-            return text
-        
-        # Special handling for Vietnamese -> English (tourism use case)
-        if source_lang == 'vi' and target_language == 'en':
-            return _smart_translate_vi_to_en(text)
-        
-        # For English -> Vietnamese, also preserve proper nouns
-        if source_lang == 'en' and target_language == 'vi':
-            return _preserve_names_translate(text, source_lang, target_language)
-        
-        # Standard translation for other cases
-        translator = GoogleTranslator(source='auto', target=target_language)
-        translated_text = translator.translate(text)
-        return translated_text
-        
+        translated_text = _translate_uncached(text, target_language)
     except Exception as e:
         print(f"Translation error: {e}")
         # Return original text on error
         return text
+    if translated_text:
+        memo.set(key, translated_text)
+    return translated_text
+
+
+def translate_batch(texts, target_language='en', max_workers=None):
+    """
+    Translate a list of texts, returning the translations in the same order.
+
+    Duplicates are translated once and distinct texts are translated concurrently
+    on a bounded thread pool, so the wall time is that of the slowest request
+    rather than the sum. Like translate(), a failed item comes back unchanged.
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(t for t in texts if t and t.strip()))
+    if not unique:
+        return texts
+
+    workers = min(max_workers or MAX_TRANSLATION_WORKERS, len(unique))
+    if workers <= 1:
+        translated = {t: translate(t, target_language) for t in unique}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda t: translate(t, target_language), unique)
+            translated = dict(zip(unique, results))
+    return [translated.get(t, t) for t in texts]
+
+
+def _translate_uncached(text, target_language):
+    # Detect source language
+    source_lang = detectLanguage(text)
+    
+    # No translation needed if already in target language
+    # This is crucial: English text with Vietnamese names should NOT be translated
+    if source_lang == target_language:
+        return text
+    
+    # Special handling for Vietnamese -> English (tourism use case)
+    if source_lang == 'vi' and target_language == 'en':
+        return _smart_translate_vi_to_en(text)
+    
+    # For English -> Vietnamese, also preserve proper nouns
+    if source_lang == 'en' and target_language == 'vi':
+        return _preserve_names_translate(text, source_lang, target_language)
+    
+    # Standard translation for other cases
+    translator = GoogleTranslator(source='auto', target=target_language)
+    return translator.translate(text)
 
 def _preserve_names_translate(text, source_lang, target_lang):
     """
@@ -1,44 +1,66 @@
 """Database utility functions for querying places"""
-import sqlite3
 import os
+import sqlite3
+from contextlib import closing
+
+try:
+    # The ChatSystem connection pool and FTS sidecar, when the repository root is
+    # importable (e.g. `python -m DataCollector.db_utils`); otherwise plain connections.
+    from ChatSystem.db_pool import get_pool
+    from ChatSystem.fts_index import fts_search
+except ImportError:
+    get_pool = None
+    fts_search = None
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 RESULT_DIR = os.path.join(SCRIPT_DIR, 'result')
+DB_PATH = os.path.join(RESULT_DIR, 'places.db')
+
 
-def search_by_name(name, exact=True, limit=10):
+def _fetchall(query, params=()):
+    if get_pool is not None:
+        return get_pool(DB_PATH).fetchall(query, params)
+    with closing(sqlite3.connect(DB_PATH)) as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def search_by_name(name, exact=True, limit=10, backend="like"):
     """Search for places by name with fuzzy matching support
     
     Args:
         name: The name to search for
         exact: If True, search for exact match. If False, fuzzy search
         limit: Maximum number of results to return (only for fuzzy search)
+        backend: "like" scans Name with LIKE; "fts" uses the BM25-ranked FTS5 sidecar
+            (see ChatSystem/fts_index.py) and falls back to LIKE if it is missing, stale
+            or ChatSystem is not importable
     
     Returns:
         List of rowids matching the query
     """
-    db_path = os.path.join(RESULT_DIR, 'places.db')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
+    if exact:
+        rows = _fetchall("SELECT rowid FROM places WHERE Name = ?", (name,))
+        return [row[0] for row in rows]
 
-        if exact:
-            cursor.execute("SELECT rowid FROM places WHERE Name = ?", (name,))
-            return [row[0] for row in cursor.fetchall()]
+    if backend == "fts" and fts_search is not None:
+        hits = fts_search(DB_PATH, name, limit)
+        if hits is not None:
+            return hits
 
-        # Split search term into keywords for better matching
-        keywords = name.lower().split()
+    # Split search term into keywords for better matching
+    keywords = name.lower().split()
 
-        # Build query to match any keyword
-        conditions = []
-        params = []
-        for keyword in keywords:
-            conditions.append("LOWER(Name) LIKE ?")
-            params.append(f"%{keyword}%")
+    # Build query to match any keyword
+    conditions = []
+    params = []
+    for keyword in keywords:
+        conditions.append("LOWER(Name) LIKE ?")
+        params.append(f"%{keyword}%")
 
-        query = f"SELECT rowid FROM places WHERE {' OR '.join(conditions)} LIMIT ?"
-        params.append(limit)
+    query = f"SELECT rowid FROM places WHERE {' OR '.join(conditions)} LIMIT ?"
+    params.append(limit)
 
-        cursor.execute(query, params)
-        return [row[0] for row in cursor.fetchall()]
+    return [row[0] for row in _fetchall(query, params)]
 
 def search_by_category(category, limit=10):
     """Search for places by category
@@ -50,15 +72,11 @@ def search_by_category(category, limit=10):
     Returns:
         List of rowids for matching places
     """
-    db_path = os.path.join(RESULT_DIR, 'places.db')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT rowid FROM places WHERE Categories LIKE ? LIMIT ?",
-            (f"%{category}%", limit)
-        )
-        return [row[0] for row in cursor.fetchall()]
+    rows = _fetchall(
+        "SELECT rowid FROM places WHERE Categories LIKE ? LIMIT ?",
+        (f"%{category}%", limit)
+    )
+    return [row[0] for row in rows]
 
 def get_all_places():
     """Get all places from database
@@ -66,11 +84,8 @@ def get_all_places():
     Returns:
         List of all rowids
     """
-    db_path = os.path.join(RESULT_DIR, 'places.db')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT rowid FROM places")
-        return [row[0] for row in cursor.fetchall()]
+    rows = _fetchall("SELECT rowid FROM places")
+    return [row[0] for row in rows]
 
 if __name__ == "__main__":
     # Test search by name